@@ -0,0 +1,235 @@
+/*
+ * Compiled versions of the tile game's per-board hot paths, over flat boards packed one
+ * byte per tile in row-major order (TileGameState.to_bytes). Build with
+ * `python build_tile_kernels.py`; import through tile_kernels, which falls back to the
+ * pure-Python versions when this module is not built. Every function returns exactly
+ * what its pure-Python counterpart in tile_kernels returns.
+ */
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <stdint.h>
+#include <stdlib.h>
+
+/*
+ * Reads the dimension of a flat board and checks that every tile is between 1 and
+ * dim * dim, or sets a ValueError and returns -1
+ */
+static Py_ssize_t
+board_dim(const Py_buffer *tiles)
+{
+    Py_ssize_t length = tiles->len;
+    Py_ssize_t dim = 0;
+    while ((dim + 1) * (dim + 1) <= length)
+        dim++;
+    if (dim * dim != length || dim > 15) {
+        PyErr_SetString(PyExc_ValueError, "a board must hold dim * dim tiles, with dim at most 15");
+        return -1;
+    }
+    const unsigned char *t = tiles->buf;
+    for (Py_ssize_t p = 0; p < length; p++) {
+        if (t[p] < 1 || t[p] > length) {
+            PyErr_Format(PyExc_ValueError, "tile %d at position %zd is not between 1 and %zd",
+                         (int)t[p], p, length);
+            return -1;
+        }
+    }
+    return dim;
+}
+
+/* Checks that a keys buffer holds the flat Zobrist table of a board of n tiles */
+static int
+check_keys(const Py_buffer *keys, Py_ssize_t n)
+{
+    if (keys->itemsize != 8 || keys->len != n * (n + 1) * 8) {
+        PyErr_SetString(PyExc_ValueError, "keys must be the flat 64-bit Zobrist table of the board");
+        return -1;
+    }
+    return 0;
+}
+
+static PyObject *
+manhattan(PyObject *self, PyObject *args)
+{
+    Py_buffer tiles;
+    if (!PyArg_ParseTuple(args, "y*", &tiles))
+        return NULL;
+    Py_ssize_t dim = board_dim(&tiles);
+    if (dim < 0) {
+        PyBuffer_Release(&tiles);
+        return NULL;
+    }
+    const unsigned char *t = tiles.buf;
+    long total = 0;
+    for (Py_ssize_t p = 0; p < tiles.len; p++) {
+        long goal = (long)t[p] - 1;
+        total += labs(goal / dim - p / dim) + labs(goal % dim - p % dim);
+    }
+    PyBuffer_Release(&tiles);
+    return PyLong_FromLong(total);
+}
+
+static PyObject *
+my_heuristic(PyObject *self, PyObject *args)
+{
+    Py_buffer tiles;
+    if (!PyArg_ParseTuple(args, "y*", &tiles))
+        return NULL;
+    Py_ssize_t dim = board_dim(&tiles);
+    if (dim < 0) {
+        PyBuffer_Release(&tiles);
+        return NULL;
+    }
+    const unsigned char *t = tiles.buf;
+    double value = 0;
+    /* The same tests, in the same order, as heuristics.my_heuristic */
+    for (long i = 0; i < dim; i++) {
+        for (long j = 0; j < dim; j++) {
+            long num = t[i * dim + j];
+            long row = (num - 1) / dim;
+            long col = (num - 1) % dim;
+            long here = i * dim + j;
+            if (num != here) {
+                if (i > 0 && num == (i - 1) * dim + j && t[(i - 1) * dim + j] == here) {
+                    value += 0.5;
+                    continue;
+                }
+                if (i < dim - 1 && num == (i + 1) * dim + j && t[(i + 1) * dim + j] == here) {
+                    value += 0.5;
+                    continue;
+                }
+                if (j > 0 && num == i * dim + j - 1 && t[i * dim + j - 1] == here) {
+                    value += 0.5;
+                    continue;
+                }
+                if (j < dim - 1 && num == i * dim + j + 1 && t[i * dim + j + 1] == here) {
+                    value += 0.5;
+                    continue;
+                }
+            }
+            value += labs(row - i) + labs(col - j);
+        }
+    }
+    PyBuffer_Release(&tiles);
+    return PyFloat_FromDouble(value);
+}
+
+static PyObject *
+zobrist_hash(PyObject *self, PyObject *args)
+{
+    Py_buffer tiles, keys;
+    if (!PyArg_ParseTuple(args, "y*y*", &tiles, &keys))
+        return NULL;
+    PyObject *result = NULL;
+    Py_ssize_t n = tiles.len;
+    if (board_dim(&tiles) >= 0 && check_keys(&keys, n) == 0) {
+        const unsigned char *t = tiles.buf;
+        const uint64_t *k = keys.buf;
+        uint64_t hash = 0;
+        for (Py_ssize_t p = 0; p < n; p++)
+            hash ^= k[p * (n + 1) + t[p]];
+        result = PyLong_FromUnsignedLongLong(hash);
+    }
+    PyBuffer_Release(&tiles);
+    PyBuffer_Release(&keys);
+    return result;
+}
+
+/*
+ * Appends the successors of a board to a new list, in TileGame.swaps order: for every
+ * position, the swap with the tile below it and then with the tile to its right. With
+ * keys, every successor is a (board, zobrist) tuple, its hash updated from zobrist.
+ */
+static PyObject *
+expand(Py_buffer *tiles, Py_ssize_t dim, const uint64_t *k, uint64_t zobrist)
+{
+    Py_ssize_t n = tiles->len;
+    PyObject *children = PyList_New(0);
+    if (children == NULL)
+        return NULL;
+    for (Py_ssize_t p = 0; p < n; p++) {
+        Py_ssize_t neighbours[2] = {p / dim < dim - 1 ? p + dim : -1, p % dim < dim - 1 ? p + 1 : -1};
+        for (int s = 0; s < 2; s++) {
+            Py_ssize_t q = neighbours[s];
+            if (q < 0)
+                continue;
+            PyObject *child = PyBytes_FromStringAndSize(tiles->buf, n);
+            if (child == NULL)
+                goto error;
+            unsigned char *c = (unsigned char *)PyBytes_AS_STRING(child);
+            unsigned char a = c[p], b = c[q];
+            c[p] = b;
+            c[q] = a;
+            PyObject *item = child;
+            if (k != NULL) {
+                uint64_t hash = zobrist ^ k[p * (n + 1) + a] ^ k[q * (n + 1) + b]
+                                ^ k[q * (n + 1) + a] ^ k[p * (n + 1) + b];
+                item = Py_BuildValue("(NK)", child, (unsigned long long)hash);
+                if (item == NULL)
+                    goto error;
+            }
+            int failed = PyList_Append(children, item);
+            Py_DECREF(item);
+            if (failed)
+                goto error;
+        }
+    }
+    return children;
+error:
+    Py_DECREF(children);
+    return NULL;
+}
+
+static PyObject *
+successors(PyObject *self, PyObject *args)
+{
+    Py_buffer tiles;
+    if (!PyArg_ParseTuple(args, "y*", &tiles))
+        return NULL;
+    PyObject *result = NULL;
+    Py_ssize_t dim = board_dim(&tiles);
+    if (dim >= 0)
+        result = expand(&tiles, dim, NULL, 0);
+    PyBuffer_Release(&tiles);
+    return result;
+}
+
+static PyObject *
+zobrist_successors(PyObject *self, PyObject *args)
+{
+    Py_buffer tiles, keys;
+    unsigned long long zobrist;
+    if (!PyArg_ParseTuple(args, "y*Ky*", &tiles, &zobrist, &keys))
+        return NULL;
+    PyObject *result = NULL;
+    Py_ssize_t dim = board_dim(&tiles);
+    if (dim >= 0 && check_keys(&keys, tiles.len) == 0)
+        result = expand(&tiles, dim, keys.buf, zobrist);
+    PyBuffer_Release(&tiles);
+    PyBuffer_Release(&keys);
+    return result;
+}
+
+static PyMethodDef methods[] = {
+    {"manhattan", manhattan, METH_VARARGS,
+     "manhattan(tiles) -> the sum of the tiles' Manhattan distances to their goal positions"},
+    {"my_heuristic", my_heuristic, METH_VARARGS,
+     "my_heuristic(tiles) -> heuristics.my_heuristic of the board"},
+    {"zobrist_hash", zobrist_hash, METH_VARARGS,
+     "zobrist_hash(tiles, keys) -> the Zobrist hash of the board"},
+    {"successors", successors, METH_VARARGS,
+     "successors(tiles) -> the boards one swap away, in TileGame.swaps order"},
+    {"zobrist_successors", zobrist_successors, METH_VARARGS,
+     "zobrist_successors(tiles, zobrist, keys) -> (board, zobrist) of the boards one swap away"},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef module = {
+    PyModuleDef_HEAD_INIT, "_tile_kernels",
+    "Compiled tile game kernels; use them through tile_kernels.", -1, methods
+};
+
+PyMODINIT_FUNC
+PyInit__tile_kernels(void)
+{
+    return PyModule_Create(&module);
+}
@@ -0,0 +1,325 @@
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import Executor
+from typing import Callable, Dict, Generator, List, Optional, Tuple
+
+from search_problem import SearchProblem, State
+from heuristic_search_problem import HeuristicSearchProblem
+from tile_game import HeuristicTileGame, TileGameState
+from informed_search import astar, astar_steps
+from blind_search import depth_limited_steps, iterative_deepening_search, iterative_deepening_steps
+from heuristics import admissible_heuristic, inadmissible_heuristic, my_heuristic
+
+# Asyncio-friendly versions of the search engines, and a small local solve service.
+#
+# The async engines run the very same search generators as their blocking counterparts
+# (astar_steps, depth_limited_steps, iterative_deepening_steps), but hand control back to
+# the event loop every yield_every expansions. That is also where a
+# cancellation (task.cancel(), asyncio.wait_for, asyncio.timeout) takes effect, so a long
+# search can be stopped between any two slices of work.
+
+
+async def run_steps_async(steps: Generator[None, None, Tuple[Optional[List[State]], Dict[str, any]]],
+                          yield_every: int = 1000) -> Tuple[Optional[List[State]], Dict[str, any]]:
+    """
+    Runs a search written as a generator (see bfs_and_dfs.run_steps), handing control back
+    to the event loop every yield_every expansions.
+
+    Args:
+        steps: The search generator, e.g. informed_search.astar_steps(problem).
+        yield_every (int): The number of expansions between yields.
+
+    Returns:
+        What the generator returned.
+    """
+    expansions = 0
+    while True:
+        try:
+            next(steps)
+        except StopIteration as done:
+            return done.value
+        expansions += 1
+        if expansions % yield_every == 0:
+            await asyncio.sleep(0)
+
+
+async def async_astar(problem: HeuristicSearchProblem[State],
+                      yield_every: int = 1000) -> Tuple[Optional[List[State]], Dict[str, any]]:
+    """
+    A* search that yields to the event loop every yield_every expansions.
+
+    Args:
+        problem (HeuristicSearchProblem[State]): The problem to solve.
+        yield_every (int): The number of expansions between yields.
+
+    Returns:
+        The same path and stats as astar.
+    """
+    return await run_steps_async(astar_steps(problem), yield_every)
+
+
+async def async_iterative_deepening_search(problem: SearchProblem[State],
+                                           yield_every: int = 1000) -> Tuple[Optional[List[State]], Dict[str, int]]:
+    """
+    Iterative deepening search that yields to the event loop every yield_every expansions,
+    counted across all depth limits.
+
+    Args:
+        problem (SearchProblem[State]): The problem to solve.
+        yield_every (int): The number of expansions between yields.
+
+    Returns:
+        The same path and stats as iterative_deepening_search.
+    """
+    return await run_steps_async(iterative_deepening_steps(problem), yield_every)
+
+
+async def async_depth_limited_search(problem: SearchProblem[State], depth: int,
+                                     yield_every: int = 1000) -> Tuple[Optional[List[State]], Dict[str, int]]:
+    """
+    Depth-limited search that yields to the event loop every yield_every expansions.
+
+    Args:
+        problem (SearchProblem[State]): The problem to solve.
+        depth (int): The maximum depth to which the search should explore.
+        yield_every (int): The number of expansions between yields.
+
+    Returns:
+        The same path and stats as depth_limited_search.
+    """
+    return await run_steps_async(depth_limited_steps(problem, depth), yield_every)
+
+
+async def run_in_executor(engine: Callable, problem: SearchProblem[State],
+                          executor: Optional[Executor] = None):
+    """
+    Runs a blocking engine (e.g. astar) in an executor, so the event loop stays free.
+    With a ProcessPoolExecutor the search also runs on another core. The problem (and its
+    heuristic) must be picklable in that case.
+
+    Cancelling the awaiting task returns control straight away, but a search that has
+    already started in a worker process runs to completion there.
+
+    Args:
+        engine (Callable): The search to run.
+        problem (SearchProblem[State]): The problem to solve.
+        executor (Optional[Executor]): Where to run it. The loop's default thread pool if
+            not provided.
+
+    Returns:
+        Whatever the engine returns.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, engine, problem)
+
+
+HEURISTICS = {
+    "admissible": admissible_heuristic,
+    "inadmissible": inadmissible_heuristic,
+    "my": my_heuristic,
+}
+
+ENGINES = {
+    "astar": (async_astar, astar),
+    "ids": (async_iterative_deepening_search, iterative_deepening_search),
+}
+
+
+class SearchServer:
+    """
+    A local request/response solve service on a Unix socket.
+
+    Each request is one line of JSON, for example
+        {"board": [[2, 1], [3, 4]], "heuristic": "admissible", "engine": "astar"}
+    and is answered with one line of JSON holding the "path" (a list of boards), the "stats",
+    and how long the job took to solve ("solve_seconds"), or with an "error"; either way it
+    says how long the job waited in the queue ("queue_seconds").
+
+    Jobs wait in a bounded queue. When it is full, the server stops reading from the
+    connection that sent the job until there is room, so busy clients are slowed down rather
+    than the queue growing without bound. A job that takes longer than job_timeout seconds
+    is answered with an error, so an unsolvable board cannot hold a solver forever.
+
+    Attributes:
+        stats (Dict[str, float]): The number of 'jobs' finished and their 'total_queue_seconds'
+            and 'max_queue_seconds'.
+    """
+
+    def __init__(self, path: str, num_solvers: int = 1, max_queue: int = 16,
+                 executor: Optional[Executor] = None, yield_every: int = 1000,
+                 job_timeout: Optional[float] = 60.0):
+        """
+        Args:
+            path (str): The path of the Unix socket to listen on.
+            num_solvers (int): The number of jobs solved at the same time.
+            max_queue (int): The most jobs allowed to wait.
+            executor (Optional[Executor]): If given, jobs are run there with the blocking
+                engines. Otherwise they run on the event loop with the async engines.
+            yield_every (int): The number of expansions between yields of the async engines.
+            job_timeout (Optional[float]): The most seconds a job may take to solve, or None
+                for no limit. A job run in an executor keeps running there after it times out.
+        """
+        self.path = path
+        self.num_solvers = num_solvers
+        self.max_queue = max_queue
+        self.executor = executor
+        self.yield_every = yield_every
+        self.job_timeout = job_timeout
+        self.stats = {"jobs": 0, "total_queue_seconds": 0.0, "max_queue_seconds": 0.0}
+        self.queue = None
+        self.server = None
+        self.solvers = []
+        self.clients = {}  # maps each connection's handler task to its writer
+        self.pending = set()  # the futures of jobs not answered yet
+        self.closing = False
+
+    async def start(self):
+        """
+        Starts listening and starts the solver tasks.
+        """
+        self.queue = asyncio.Queue(self.max_queue)
+        self.solvers = [asyncio.create_task(self._solve_jobs()) for _ in range(self.num_solvers)]
+        self.server = await asyncio.start_unix_server(self._handle_client, path=self.path)
+
+    async def close(self):
+        """
+        Stops listening, cancels the solver tasks and any jobs not answered yet, and hangs up
+        on any connected clients.
+        """
+        self.closing = True
+        self.server.close()
+        for solver in self.solvers:
+            solver.cancel()
+        await asyncio.gather(*self.solvers, return_exceptions=True)
+        for done in self.pending:
+            done.cancel()
+        for writer in self.clients.values():
+            writer.close()
+        await asyncio.gather(*self.clients, return_exceptions=True)
+        await self.server.wait_closed()
+
+    async def __aenter__(self) -> "SearchServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self.clients[task] = writer
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                done = asyncio.get_running_loop().create_future()
+                self.pending.add(done)
+                try:
+                    await self.queue.put((line, time.perf_counter(), done))
+                    response = await done
+                except asyncio.CancelledError:
+                    if self.closing:
+                        break
+                    raise
+                finally:
+                    self.pending.discard(done)
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        finally:
+            del self.clients[task]
+            writer.close()
+
+    async def _solve_jobs(self):
+        while True:
+            line, queued_at, done = await self.queue.get()
+            queue_seconds = time.perf_counter() - queued_at
+            self.stats["jobs"] += 1
+            self.stats["total_queue_seconds"] += queue_seconds
+            self.stats["max_queue_seconds"] = max(self.stats["max_queue_seconds"], queue_seconds)
+            try:
+                response = await asyncio.wait_for(self._solve(json.loads(line)), self.job_timeout)
+            except asyncio.TimeoutError:
+                response = {"error": f"no solution found within {self.job_timeout} seconds"}
+            except Exception as e:
+                response = {"error": str(e)}
+            response["queue_seconds"] = queue_seconds
+            if not done.cancelled():
+                done.set_result(response)
+            self.queue.task_done()
+
+    async def _solve(self, request: dict) -> dict:
+        rows = tuple(tuple(row) for row in request["board"])
+        dim = len(rows)
+        if (any(len(row) != dim for row in rows)
+                or sorted(tile for row in rows for tile in row) != list(range(1, dim * dim + 1))):
+            raise ValueError("board must be square and hold each tile 1..n*n exactly once")
+        board = TileGameState(rows)
+        heuristic = HEURISTICS[request.get("heuristic", "admissible")]
+        async_engine, engine = ENGINES[request.get("engine", "astar")]
+        problem = HeuristicTileGame(len(board.board), heuristic, start_state=board)
+
+        solve_start = time.perf_counter()
+        if self.executor is None:
+            path, stats = await async_engine(problem, self.yield_every)
+        else:
+            path, stats = await run_in_executor(engine, problem, self.executor)
+        return {
+            "path": [state.board for state in path] if path else None,
+            "stats": stats,
+            "solve_seconds": time.perf_counter() - solve_start,
+        }
+
+
+async def request_solve(path: str, board: Tuple[Tuple[int]], heuristic: str = "admissible",
+                        engine: str = "astar") -> dict:
+    """
+    Sends one solve request to a SearchServer and waits for the answer.
+
+    Args:
+        path (str): The path of the server's Unix socket.
+        board (Tuple[Tuple[int]]): The start board.
+        heuristic (str): The name of the heuristic ("admissible", "inadmissible" or "my").
+        engine (str): The name of the engine ("astar" or "ids").
+
+    Returns:
+        dict: The server's response.
+    """
+    reader, writer = await asyncio.open_unix_connection(path)
+    try:
+        request = {"board": board, "heuristic": heuristic, "engine": engine}
+        writer.write(json.dumps(request).encode() + b"\n")
+        await writer.drain()
+        return json.loads(await reader.readline())
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+def main():
+    """
+    Runs a SearchServer until interrupted.
+    """
+    parser = argparse.ArgumentParser(
+        description='Serve TileGame solve requests on a Unix socket.')
+    parser.add_argument('--socket', type=str, default='/tmp/tile_game_search.sock',
+                        help='Path of the Unix socket (default: /tmp/tile_game_search.sock)')
+    parser.add_argument('--solvers', type=int, default=1,
+                        help='Number of jobs solved at the same time (default: 1)')
+    parser.add_argument('--max-queue', type=int, default=16,
+                        help='Most jobs allowed to wait (default: 16)')
+
+    args = parser.parse_args()
+
+    async def serve():
+        async with SearchServer(args.socket, args.solvers, args.max_queue) as server:
+            print(f"Listening on {args.socket}")
+            await server.server.serve_forever()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
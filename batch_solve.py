@@ -0,0 +1,164 @@
+import argparse
+import itertools
+import multiprocessing
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from tile_game import HeuristicTileGame, TileGame, TileGameState
+from informed_search import astar
+from heuristics import admissible_heuristic
+from result_io import SolutionWriter, StatsWriter, encode_moves
+
+# Batch solving for many TileGame boards of the same dimension.
+#
+# Each worker process builds one HeuristicTileGame up front (goal state, swap list,
+# Zobrist keys and heuristic, which is pickled once per worker rather than once per board)
+# and then only swaps in each new start board. Heuristics backed by a SharedTable are
+# mapped once per worker and shared between all of them.
+
+# The game and engine each worker process reuses for every board it solves, and whether it
+# sends paths back packed by result_io.encode_moves
+_batch_game = None
+_batch_engine = None
+_batch_compact = False
+
+
+def _make_game(dim: int, heuristic: Callable[[TileGameState], float]) -> HeuristicTileGame:
+    """
+    Builds the game reused for every board of a batch.
+    """
+    # Built from the goal board, so no random start state is drawn
+    goal_state = TileGameState.from_bytes(bytes(range(1, dim * dim + 1)))
+    return HeuristicTileGame(dim, heuristic, start_state=goal_state)
+
+
+def _init_worker(dim: int, heuristic: Callable[[TileGameState], float], engine: Callable, compact: bool):
+    """
+    Builds the game a worker process reuses for every board it is given.
+    """
+    global _batch_game, _batch_engine, _batch_compact
+    _batch_game = _make_game(dim, heuristic)
+    _batch_engine = engine
+    _batch_compact = compact
+
+
+def _solve_one(board: TileGameState) -> Tuple[TileGameState, Optional[List[TileGameState]], Dict[str, int]]:
+    """
+    Solves one board with the worker process's game and engine.
+    """
+    return _solve_with(_batch_game, _batch_engine, board, _batch_compact)
+
+
+def _solve_with(game: HeuristicTileGame, engine: Callable, board: TileGameState,
+                compact: bool = False) -> Tuple[TileGameState, Optional[List[TileGameState]], Dict[str, int]]:
+    """
+    Solves one board with the given game and engine.
+    """
+    if len(board.board) != game.dim:
+        raise ValueError(f"every board of a batch must be {game.dim} x {game.dim}, got {board}")
+    game.start_state = board
+    path, stats = engine(game)
+    return board, encode_moves(path) if compact else path, stats
+
+
+def solve_batch(
+    boards: Iterable[TileGameState],
+    heuristic: Callable[[TileGameState], float],
+    engine: Callable = astar,
+    processes: Optional[int] = None,
+    chunksize: int = 1,
+    summary: Optional[Dict[str, float]] = None,
+    compact_paths: bool = False,
+) -> Iterator[Tuple[TileGameState, Optional[List[TileGameState]], Dict[str, int]]]:
+    """
+    Solves many boards of the same dimension, yielding each result as soon as it is ready
+    (not necessarily in the order the boards were given).
+
+    Args:
+        boards (Iterable[TileGameState]): The start boards to solve. They must all have the
+            same dimension (a ValueError is raised for the first that does not) and are
+            consumed lazily.
+        heuristic (Callable[[TileGameState], float]): The heuristic for every game.
+        engine (Callable): The search to run on each HeuristicTileGame, e.g. astar or bfs.
+        processes (Optional[int]): The number of worker processes. One per CPU by default;
+            0 solves everything in this process.
+        chunksize (int): The number of boards handed to a worker at a time.
+        summary (Optional[Dict[str, float]]): If given, kept up to date with the number of
+            'boards' solved, the 'seconds' elapsed, 'boards_per_second' and the total
+            'states_expanded', so throughput can be read at any point.
+        compact_paths (bool): Whether to return every path as the swap indices it takes
+            (see result_io.encode_moves), which workers send back far more cheaply than
+            a list of states.
+
+    Returns:
+        Iterator[Tuple[TileGameState, Optional[List[TileGameState]], Dict[str, int]]]:
+            (board, path, stats) for every board, where path and stats are what the engine
+            returned (path packed into bytes with compact_paths).
+    """
+    boards = iter(boards)
+    first_board = next(boards, None)
+    if first_board is None:
+        return
+    dim = len(first_board.board)
+    boards = itertools.chain([first_board], boards)
+
+    if summary is None:
+        summary = {}
+    summary.update({"boards": 0, "seconds": 0.0, "boards_per_second": 0.0, "states_expanded": 0})
+    start_time = time.perf_counter()
+
+    def record(result):
+        summary["boards"] += 1
+        summary["states_expanded"] += result[2]["states_expanded"]
+        summary["seconds"] = time.perf_counter() - start_time
+        summary["boards_per_second"] = summary["boards"] / summary["seconds"] if summary["seconds"] else 0.0
+        return result
+
+    if processes == 0:
+        # A game of its own, so batches consumed side by side do not disturb each other
+        game = _make_game(dim, heuristic)
+        for board in boards:
+            yield record(_solve_with(game, engine, board, compact_paths))
+        return
+
+    with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(dim, heuristic, engine, compact_paths)) as pool:
+        for result in pool.imap_unordered(_solve_one, boards, chunksize):
+            yield record(result)
+
+
+def main():
+    """
+    Solves a batch of random TileGames with A* and prints the throughput.
+    """
+    parser = argparse.ArgumentParser(
+        description='Solve a batch of random TileGame problems.')
+    parser.add_argument('--size', type=int, default=3,
+                        help='Size of the TileGames (default: 3)')
+    parser.add_argument('--boards', type=int, default=100,
+                        help='Number of boards to solve (default: 100)')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='Number of worker processes (default: one per CPU)')
+    parser.add_argument('--output', default=None,
+                        help='Append the solutions to OUTPUT.sol and their stats to OUTPUT.stats '
+                             '(see result_io; default: do not save them)')
+
+    args = parser.parse_args()
+    boards = (TileGame.random_start(args.size) for _ in range(args.boards))
+    summary = {}
+    results = solve_batch(boards, admissible_heuristic, processes=args.processes, summary=summary,
+                          compact_paths=args.output is not None)
+    if args.output is None:
+        for _ in results:
+            pass
+    else:
+        with SolutionWriter(args.output + '.sol', args.size) as solutions, StatsWriter(args.output + '.stats') as rows:
+            for board, moves, stats in results:
+                solutions.append(board, moves)
+                rows.append(stats)
+    print(f"Solved {summary['boards']} boards in {summary['seconds']:.2f}s "
+          f"({summary['boards_per_second']:.1f} boards/s, "
+          f"{summary['states_expanded']} states expanded)")
+
+
+if __name__ == "__main__":
+    main()
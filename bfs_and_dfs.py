@@ -0,0 +1,176 @@
+from collections import deque
+from typing import Dict, Generator, List, Optional, Tuple
+
+from search_problem import SearchProblem, State
+
+
+def reconstruct_path(parents: Dict[State, Optional[State]], end: State) -> List[State]:
+    """
+    Walks the parent pointers back from the given end state to the start state.
+
+    Args:
+        parents (Dict[State, Optional[State]]): Maps each visited state to the state it
+            was reached from. The start state maps to None.
+        end (State): The state to trace back from.
+
+    Returns:
+        List[State]: The path from the start state to end (inclusive).
+    """
+    path = [end]
+    while parents[end] is not None:
+        end = parents[end]
+        path.append(end)
+    path.reverse()
+    return path
+
+
+def run_steps(steps: Generator[None, None, Tuple[Optional[List[State]], Dict[str, int]]]) -> Tuple[Optional[List[State]], Dict[str, int]]:
+    """
+    Runs a search written as a generator (one that yields after every expansion and returns
+    its path and stats) to the end. The blocking engines run their generators with this,
+    and async_search runs the same generators with pauses in between.
+
+    Args:
+        steps: The search generator.
+
+    Returns:
+        Tuple[Optional[List[State]], Dict[str, int]]: What the generator returned.
+    """
+    while True:
+        try:
+            next(steps)
+        except StopIteration as done:
+            return done.value
+
+
+def _make_stats(path: Optional[List[State]], states_expanded: int, max_frontier_size: int) -> Dict[str, int]:
+    """
+    Builds the stats dictionary shared by every search in this module.
+    """
+    return {
+        "path_length": len(path) if path else 0,
+        "states_expanded": states_expanded,
+        "total_cost": len(path) - 1 if path else 0,
+        "max_frontier_size": max_frontier_size,
+    }
+
+
+def bfs(problem: SearchProblem[State]) -> Tuple[Optional[List[State]], Dict[str, int]]:
+    """
+    Breadth-first search.
+
+    The frontier is a deque and every state is marked as visited (with its parent) the
+    moment it is generated, so no state is ever queued twice. The goal test is applied when
+    a state is generated, which saves expanding the whole layer the goal sits in.
+
+    Args:
+        problem (SearchProblem[State]): The search problem to solve.
+
+    Returns:
+        Tuple[Optional[List[State]], Dict[str, int]]:
+            - A list of states representing the solution path, or None if no solution was found.
+            - A dictionary of search statistics ('path_length', 'states_expanded',
+              'total_cost', 'max_frontier_size').
+    """
+    start_state = problem.get_start_state()
+    if problem.is_goal_state(start_state):
+        return [start_state], _make_stats([start_state], 0, 1)
+
+    frontier = deque([start_state])
+    parents = {start_state: None}
+    states_expanded = 0
+    max_frontier_size = 1
+
+    while frontier:
+        state = frontier.popleft()
+        states_expanded += 1
+        for child in problem.get_successors(state):
+            if child in parents:
+                continue
+            parents[child] = state
+            if problem.is_goal_state(child):
+                path = reconstruct_path(parents, child)
+                return path, _make_stats(path, states_expanded, max_frontier_size)
+            frontier.append(child)
+        max_frontier_size = max(max_frontier_size, len(frontier))
+
+    return None, _make_stats(None, states_expanded, max_frontier_size)
+
+
+def level_bfs(problem: SearchProblem[State]) -> Tuple[Optional[List[State]], Dict[str, int]]:
+    """
+    Level-synchronous breadth-first search.
+
+    Instead of popping one state at a time, the whole current layer is expanded at once
+    into the next layer. This finds the same (shortest) paths as bfs, but the frontier is
+    two plain lists that are swapped between layers, and max_frontier_size is the size of
+    the largest layer.
+
+    Args:
+        problem (SearchProblem[State]): The search problem to solve.
+
+    Returns:
+        Tuple[Optional[List[State]], Dict[str, int]]: The solution path (or None) and the
+        search statistics, as in bfs.
+    """
+    start_state = problem.get_start_state()
+    if problem.is_goal_state(start_state):
+        return [start_state], _make_stats([start_state], 0, 1)
+
+    layer = [start_state]
+    parents = {start_state: None}
+    states_expanded = 0
+    max_frontier_size = 1
+
+    while layer:
+        next_layer = []
+        for state in layer:
+            states_expanded += 1
+            for child in problem.get_successors(state):
+                if child in parents:
+                    continue
+                parents[child] = state
+                if problem.is_goal_state(child):
+                    path = reconstruct_path(parents, child)
+                    return path, _make_stats(path, states_expanded, max_frontier_size)
+                next_layer.append(child)
+        layer = next_layer
+        max_frontier_size = max(max_frontier_size, len(layer))
+
+    return None, _make_stats(None, states_expanded, max_frontier_size)
+
+
+def dfs(problem: SearchProblem[State]) -> Tuple[Optional[List[State]], Dict[str, int]]:
+    """
+    Depth-first (graph) search.
+
+    The frontier is a deque used as a stack. A state is marked as visited when it is
+    pushed, so the frontier never holds duplicates. The path found is not necessarily
+    the shortest one.
+
+    Args:
+        problem (SearchProblem[State]): The search problem to solve.
+
+    Returns:
+        Tuple[Optional[List[State]], Dict[str, int]]: The solution path (or None) and the
+        search statistics, as in bfs.
+    """
+    start_state = problem.get_start_state()
+    frontier = deque([start_state])
+    parents = {start_state: None}
+    states_expanded = 0
+    max_frontier_size = 1
+
+    while frontier:
+        state = frontier.pop()
+        if problem.is_goal_state(state):
+            path = reconstruct_path(parents, state)
+            return path, _make_stats(path, states_expanded, max_frontier_size)
+        states_expanded += 1
+        for child in problem.get_successors(state):
+            if child not in parents:
+                parents[child] = state
+                frontier.append(child)
+        max_frontier_size = max(max_frontier_size, len(frontier))
+
+    return None, _make_stats(None, states_expanded, max_frontier_size)
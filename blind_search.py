@@ -1,9 +1,9 @@
 import argparse
 from queue import LifoQueue, Queue
-from typing import List, Dict, Optional, Tuple
+from typing import Dict, Generator, List, Optional, Tuple
 from search_problem import SearchProblem, State
-from tile_game import TileGame
-from bfs_and_dfs import bfs, dfs
+from tile_game import TileGame, TileGameState
+from bfs_and_dfs import bfs, dfs, level_bfs, run_steps
 import tqdm
 
 
@@ -24,32 +24,34 @@ def iterative_deepening_search(problem: SearchProblem[State]) -> Tuple[Optional[
                 d. 'max_frontier_size': The maximum size of the frontier during the search.
     """
 
+    return run_steps(iterative_deepening_steps(problem))
+
+
+def iterative_deepening_steps(problem: SearchProblem[State]) -> Generator[None, None, Tuple[Optional[List[State]], Dict[str, int]]]:
+    """
+    Iterative deepening search as a generator, which yields after every expansion (at any
+    depth limit) and returns what iterative_deepening_search returns, with states_expanded
+    summed over every depth limit.
+    """
     stats = {"path_length": 0, "states_expanded": 0,
              "total_cost": 0, "max_frontier_size": 0}
 
     cutoff_depth = 1
-    goal_found = False
-    while not goal_found:
+    while True:
         # Run depth-limited search with the current cutoff depth
-        result, stats = depth_limited_search(problem, cutoff_depth)
+        result, depth_stats = yield from depth_limited_steps(problem, cutoff_depth)
 
         # Update stats
-        states_expanded = stats["states_expanded"]
-        max_frontier_size = stats["max_frontier_size"]
-        stats["states_expanded"] += states_expanded
+        stats["states_expanded"] += depth_stats["states_expanded"]
         stats["max_frontier_size"] = max(
-            stats["max_frontier_size"], max_frontier_size)
-        if not result:
-            # If no solution was found, increase the cutoff depth and continue
-            cutoff_depth += 1
-        else:
+            stats["max_frontier_size"], depth_stats["max_frontier_size"])
+        if result:
             # If a solution was found, return the path and stats
-            goal_found = True
             stats["path_length"] = len(result)
             stats["total_cost"] = len(result) - 1
             return result, stats
-
-    return None, stats
+        # If no solution was found, increase the cutoff depth and continue
+        cutoff_depth += 1
 
 
 def depth_limited_search(problem: SearchProblem[State], depth: int) -> tuple[List[State], Dict[str, any]]:
@@ -64,6 +66,14 @@ def depth_limited_search(problem: SearchProblem[State], depth: int) -> tuple[Lis
         a list of states representing the path of the solution
         the number of states expanded during the search
     """
+    return run_steps(depth_limited_steps(problem, depth))
+
+
+def depth_limited_steps(problem: SearchProblem[State], depth: int) -> Generator[None, None, tuple[List[State], Dict[str, any]]]:
+    """
+    Depth-limited search as a generator, which yields after every expansion and returns
+    what depth_limited_search returns.
+    """
     frontier = LifoQueue()
     start_state = problem.get_start_state()
     frontier.put(start_state)
@@ -117,13 +127,112 @@ def depth_limited_search(problem: SearchProblem[State], depth: int) -> tuple[Lis
                     parents_dict[child] = state
                     if depth_of_state[child] <= depth:
                         frontier.put(child)
+            yield
 
     return None, {'states_expanded': num_states_expanded, 'max_frontier_size': max_frontier_size}
 
 
+def frontier_search(problem: TileGame) -> Tuple[Optional[List[TileGameState]], Dict[str, int]]:
+    """
+    Breadth-first frontier search: finds a shortest path without storing a closed list.
+
+    Only the current and next layers are kept in memory. Every swap is its own inverse, so
+    each state in a layer remembers (as a bitmask over problem.swaps) which swaps lead back
+    to the layer it was generated from, and those swaps are never applied to it. Every swap
+    also flips the parity of the board, so a state's neighbours are always one layer away
+    and nothing else can be regenerated.
+
+    Because there are no parent pointers, the path is rebuilt by divide-and-conquer: once
+    the goal depth d is known, the search is repeated with every state past layer d // 2
+    carrying the state it passed through at that layer. That middle state splits the
+    problem into two half-depth searches, which are solved the same way.
+
+    Args:
+        problem (TileGame): The tile game to solve.
+
+    Returns:
+        Tuple[Optional[List[TileGameState]], Dict[str, int]]:
+            - A list of states representing the solution path, or None if no solution was found.
+            - A dictionary of search statistics ('path_length', 'states_expanded',
+              'total_cost', 'max_frontier_size'). max_frontier_size counts the states held
+              in both stored layers.
+    """
+    stats = {"path_length": 0, "states_expanded": 0,
+             "total_cost": 0, "max_frontier_size": 0}
+
+    start_state = problem.get_start_state()
+    depth, goal_state, _ = _frontier_layers(problem, start_state, problem.is_goal_state, None, stats)
+    if goal_state is None:
+        return None, stats
+
+    path = _frontier_path(problem, start_state, goal_state, depth, stats)
+    stats["path_length"] = len(path)
+    stats["total_cost"] = len(path) - 1
+    return path, stats
+
+
+def _frontier_path(problem: TileGame, start_state: TileGameState, goal_state: TileGameState,
+                   depth: int, stats: Dict[str, int]) -> List[TileGameState]:
+    """
+    Rebuilds a shortest path of the given depth between two states by divide-and-conquer.
+    """
+    if depth == 0:
+        return [start_state]
+    if depth == 1:
+        return [start_state, goal_state]
+
+    middle_depth = depth // 2
+    _, _, middle_state = _frontier_layers(
+        problem, start_state, lambda state: state == goal_state, middle_depth, stats)
+    first_half = _frontier_path(problem, start_state, middle_state, middle_depth, stats)
+    second_half = _frontier_path(problem, middle_state, goal_state, depth - middle_depth, stats)
+    return first_half + second_half[1:]
+
+
+def _frontier_layers(problem: TileGame, start_state: TileGameState, is_goal, relay_depth: Optional[int],
+                     stats: Dict[str, int]) -> Tuple[int, Optional[TileGameState], Optional[TileGameState]]:
+    """
+    Runs one layer-by-layer frontier search from start_state.
+
+    Each layer maps a state to [used_swaps, relay], where used_swaps is the bitmask of swaps
+    leading back to the previous layer, and relay is the ancestor of the state at relay_depth
+    (None until that layer is reached).
+
+    Returns:
+        The depth of the first goal state found, the goal state, and its relay.
+        The goal state is None if the whole space was searched without reaching a goal.
+    """
+    num_swaps = len(problem.swaps)
+    layer = {start_state: [0, start_state if relay_depth == 0 else None]}
+    depth = 0
+    while layer:
+        for state, (_, relay) in layer.items():
+            if is_goal(state):
+                return depth, state, relay
+
+        next_layer = {}
+        for state, (used_swaps, relay) in layer.items():
+            stats["states_expanded"] += 1
+            for index in range(num_swaps):
+                if used_swaps >> index & 1:
+                    continue
+                child = problem.apply_swap(state, index)
+                entry = next_layer.get(child)
+                if entry is None:
+                    next_layer[child] = [1 << index, child if depth + 1 == relay_depth else relay]
+                else:
+                    entry[0] |= 1 << index
+            stats["max_frontier_size"] = max(
+                stats["max_frontier_size"], len(layer) + len(next_layer))
+        layer = next_layer
+        depth += 1
+
+    return depth, None, None
+
+
 def compile_stats(size: int, n_trials: int, ids_only: bool) -> Dict[str, Tuple[int, int]]:
     """
-    Collect stats for BFS, DFS, and IDS on TileGame problems.
+    Collect stats for BFS, level-synchronous BFS, DFS, and IDS on TileGame problems.
     This method is intended to be used for comparing the performance of blind-search algorithms
 
     Args:
@@ -138,7 +247,7 @@ def compile_stats(size: int, n_trials: int, ids_only: bool) -> Dict[str, Tuple[i
         The statistics are: the number of states expanded, the maximum frontier size, and the average path length.
     """
     # 0 = states expanded, 1 = max frontier size
-    stats = {'bfs': [0, 0, 0], 'dfs': [0, 0, 0], 'ids': [0, 0, 0]}
+    stats = {'bfs': [0, 0, 0], 'level_bfs': [0, 0, 0], 'dfs': [0, 0, 0], 'ids': [0, 0, 0]}
     if n_trials <= 0:
         return stats
 
@@ -152,6 +261,12 @@ def compile_stats(size: int, n_trials: int, ids_only: bool) -> Dict[str, Tuple[i
             stats['bfs'][1] += bfs_stats['max_frontier_size']
             stats['bfs'][2] += len(bfs_path)
 
+            # Level-synchronous BFS
+            level_bfs_path, level_bfs_stats = level_bfs(tile_game)
+            stats['level_bfs'][0] += level_bfs_stats['states_expanded']
+            stats['level_bfs'][1] += level_bfs_stats['max_frontier_size']
+            stats['level_bfs'][2] += len(level_bfs_path)
+
             # DFS
             dfs_path, dfs_stats = dfs(tile_game)
             stats['dfs'][0] += dfs_stats['states_expanded']
@@ -171,7 +286,7 @@ def compile_stats(size: int, n_trials: int, ids_only: bool) -> Dict[str, Tuple[i
 
 def main():
     """
-    Run 3 different search algorithms (BFS, DFS, IDS) on TileGame problems.
+    Run 4 different search algorithms (BFS, level-synchronous BFS, DFS, IDS) on TileGame problems.
     The results of each search are printed to the console.
     """
     parser = argparse.ArgumentParser(
@@ -192,15 +307,18 @@ def main():
         print("IDS Average Max Frontier Size: ", avg_stats['ids'][1])
         print("IDS Average Path Length: ", avg_stats['ids'][2])
     else:
-        print(f"Running BFS, DFS, IDS on {N_TRIALS} {SIZE}x{SIZE} TileGame problems...")
+        print(f"Running BFS, level BFS, DFS, IDS on {N_TRIALS} {SIZE}x{SIZE} TileGame problems...")
         avg_stats = compile_stats(SIZE, N_TRIALS, False)
         print("BFS Average States Expanded: ", avg_stats['bfs'][0])
+        print("Level BFS Average States Expanded: ", avg_stats['level_bfs'][0])
         print("DFS Average States Expanded: ", avg_stats['dfs'][0])
         print("IDS Average States Expanded: ", avg_stats['ids'][0])
         print("BFS Average Max Frontier Size: ", avg_stats['bfs'][1])
+        print("Level BFS Average Max Frontier Size: ", avg_stats['level_bfs'][1])
         print("DFS Average Max Frontier Size: ", avg_stats['dfs'][1])
         print("IDS Average Max Frontier Size: ", avg_stats['ids'][1])
         print("BFS Average Path Length: ", avg_stats['bfs'][2])
+        print("Level BFS Average Path Length: ", avg_stats['level_bfs'][2])
         print("DFS Average Path Length: ", avg_stats['dfs'][2])
         print("IDS Average Path Length: ", avg_stats['ids'][2])
 
@@ -0,0 +1,135 @@
+import argparse
+import random
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import bfs_and_dfs
+from tile_game import HeuristicTileGame, TileGame, TileGameState
+from informed_search import AStarSearch, astar_steps, ida_star
+from blind_search import frontier_search
+from heuristics import admissible_heuristic
+
+# A* under a memory budget.
+#
+# A* keeps every state it generates, so on large boards it grows until the process is
+# killed. budgeted_search runs A* while an estimate of the bytes held by its frontier and
+# visited tables stays under a budget. Once the budget is reached it drops those tables and
+# finishes with an engine whose memory does not grow with the search: IDA*, started at the
+# smallest f left on A*'s frontier (no solution is cheaper than that with an admissible
+# heuristic, so every IDA* iteration below it would be wasted), or frontier search.
+
+# The bytes one entry adds to a dict or set, on average
+_DICT_ENTRY_BYTES = sys.getsizeof(dict.fromkeys(range(1024))) / 1024
+
+
+def state_size(state: TileGameState) -> float:
+    """
+    Estimates the bytes a successor of a TileGameState adds: the object, its attribute
+    dict, its hash, its tuple of rows and the rows the swap rebuilt. The other rows are
+    shared with its parent (see TileGame.swap_tiles), and a swap rebuilds 1.5 rows on
+    average (two for the swaps between rows, one for the others, and there are as many of
+    each). The tile ints themselves are small ints that Python shares.
+
+    Args:
+        state (TileGameState): A state of the board size to estimate for.
+
+    Returns:
+        float: The estimated size.
+    """
+    return (sys.getsizeof(state) + sys.getsizeof(state.__dict__) + sys.getsizeof(state.zobrist)
+            + sys.getsizeof(state.board) + 1.5 * sys.getsizeof(state.board[0]))
+
+
+def budgeted_search(problem: HeuristicTileGame, memory_budget: int,
+                    fallback: str = "ida_star") -> Tuple[Optional[List[TileGameState]], Dict[str, any]]:
+    """
+    A* search that switches to a memory-bounded engine once its tables would use more than
+    memory_budget bytes.
+
+    The A* is informed_search.astar_steps itself. Every generated state costs it the state
+    itself and an entry in its parent table, and every state on the frontier costs a heap
+    entry; their sum is checked by the on_expand hook astar_steps calls after every
+    expansion. With an admissible heuristic the path found is optimal whichever engine
+    finds it.
+
+    Args:
+        problem (HeuristicTileGame): The tile game to solve.
+        memory_budget (int): The most bytes A*'s tables may use.
+        fallback (str): The engine to finish with, 'ida_star' (seeded with the smallest f
+            on A*'s frontier) or 'frontier_search' (which ignores the heuristic).
+
+    Returns:
+        Tuple[Optional[List[TileGameState]], Dict[str, any]]: The path and astar's stats,
+        summed over both engines, plus 'peak_memory_bytes' (the most bytes the tables of
+        either engine were estimated to use), 'engine' (the engines run, e.g.
+        'astar+ida_star') and, after a fallback, 'fallback_bound' (the f it started at).
+    """
+    if fallback not in ("ida_star", "frontier_search"):
+        raise ValueError(f"unknown fallback engine {fallback}")
+    search = AStarSearch.start(problem)
+    start_state = problem.get_start_state()
+    # Each generated state is stored once, as a key of the parent table (which is also the
+    # visited set)
+    generated_bytes = state_size(start_state) + _DICT_ENTRY_BYTES
+    # A heap slot holding (priority, (state, path_length))
+    entry = search.open_set[0]
+    frontier_bytes = 8 + sys.getsizeof(entry) + sys.getsizeof(entry[1]) + sys.getsizeof(entry[0])
+    peak_memory = 0
+
+    def over_budget(search: AStarSearch) -> bool:
+        nonlocal peak_memory
+        memory = int(len(search.parents) * generated_bytes + len(search.open_set) * frontier_bytes)
+        peak_memory = max(peak_memory, memory)
+        return memory >= memory_budget and bool(search.open_set)
+
+    path, stats = bfs_and_dfs.run_steps(astar_steps(problem, search, over_budget))
+    stats = dict(stats, peak_memory_bytes=peak_memory, engine="astar")
+    if path is not None or not search.open_set:
+        return path, stats
+
+    # Out of memory: let A*'s tables go and finish with the fallback engine
+    bound = search.open_set[0][0]
+    del search
+    if fallback == "ida_star":
+        path, fallback_stats = ida_star(problem, initial_bound=bound)
+        # IDA* holds the current path: one move and one on-path hash per state on it
+        fallback_memory = fallback_stats["max_frontier_size"] * (8 + _DICT_ENTRY_BYTES)
+    else:
+        path, fallback_stats = frontier_search(problem)
+        # Frontier search holds two layers of states, each with a bitmask
+        fallback_memory = fallback_stats["max_frontier_size"] * (generated_bytes + frontier_bytes)
+    stats["engine"] = f"astar+{fallback}"
+    stats["fallback_bound"] = bound
+    stats["states_expanded"] += fallback_stats["states_expanded"]
+    stats["max_frontier_size"] = max(stats["max_frontier_size"], fallback_stats["max_frontier_size"])
+    stats["peak_memory_bytes"] = max(stats["peak_memory_bytes"], int(fallback_memory))
+    stats["path_length"] = fallback_stats["path_length"]
+    stats["total_cost"] = fallback_stats["total_cost"]
+    return path, stats
+
+
+def main():
+    """
+    Solves a random TileGame with A* under a memory budget and prints the stats.
+    """
+    parser = argparse.ArgumentParser(
+        description='Solve a random TileGame with memory-budgeted A*.')
+    parser.add_argument('--size', type=int, default=3,
+                        help='Size of the TileGame (default: 3)')
+    parser.add_argument('--budget-mb', type=float, default=64,
+                        help='Memory budget of A* in megabytes (default: 64)')
+    parser.add_argument('--fallback', choices=['ida_star', 'frontier_search'], default='ida_star',
+                        help='Engine to finish with once the budget is reached (default: ida_star)')
+    parser.add_argument('--seed', type=int, default=2,
+                        help='Random seed for the board (default: 2)')
+
+    args = parser.parse_args()
+    random.seed(args.seed)
+    tile_game = HeuristicTileGame(args.size, admissible_heuristic, start_state=TileGame.random_start(args.size))
+    path, stats = budgeted_search(tile_game, int(args.budget_mb * 1024 * 1024), args.fallback)
+    TileGame.print_pretty_path(path)
+    print(stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import os
+import tempfile
+
+from setuptools import Extension, setup
+
+# Builds the optional _tile_kernels extension next to this file:
+#
+#     python build_tile_kernels.py
+#
+# Nothing else needs it; tile_kernels falls back to pure Python when it is missing.
+
+
+def main():
+    here = os.path.dirname(os.path.abspath(__file__))
+    os.chdir(here)
+    # Only the built module is kept, not the intermediate object files
+    with tempfile.TemporaryDirectory() as build_temp:
+        setup(
+            name="_tile_kernels",
+            ext_modules=[Extension("_tile_kernels", ["_tile_kernels.c"], extra_compile_args=["-O3"])],
+            script_args=["build_ext", "--inplace", "--build-temp", build_temp],
+        )
+
+
+if __name__ == "__main__":
+    main()
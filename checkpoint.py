@@ -0,0 +1,222 @@
+import argparse
+import os
+import pickle
+import random
+import tempfile
+import time
+from typing import Any, Dict, Generator, List, Optional, Tuple
+
+import bfs_and_dfs
+from search_problem import State
+from heuristic_search_problem import HeuristicSearchProblem
+from tile_game import HeuristicTileGame, TileGame
+from heuristics import admissible_heuristic
+from informed_search import AStarSearch, astar_steps
+
+# Checkpoints for long-running searches and experiments.
+#
+# A Checkpointer pickles a snapshot of a run's state to a local file every so often, and
+# hands the last snapshot back when the run is started again. Every snapshot replaces the
+# previous one atomically (written to a temporary file in the same directory, then moved
+# over it with os.replace), so a run killed mid-write still leaves the previous snapshot.
+#
+# Where fork is available the snapshot is written by a forked child: the fork shares the
+# parent's memory copy-on-write, so the run only pauses for the fork itself, however large
+# its frontier is, while the child pickles a frozen copy of it.
+
+CHECKPOINT_VERSION = 2
+
+
+class Checkpointer:
+    """
+    Periodically saves snapshots of a run to one file.
+
+    Attributes:
+        path (str): The checkpoint file.
+        interval (float): The least number of seconds between snapshots.
+        snapshots_written (int): The number of snapshots saved so far.
+    """
+
+    def __init__(self, path: str, interval: float = 60.0, use_fork: bool = True):
+        """
+        Args:
+            path (str): The checkpoint file.
+            interval (float): The least number of seconds between snapshots; see due.
+            use_fork (bool): Whether to write snapshots from a forked child, when the
+                platform can fork.
+        """
+        self.path = path
+        self.interval = interval
+        self.use_fork = use_fork and hasattr(os, "fork")
+        self.snapshots_written = 0
+        self._last_save = time.monotonic()
+        self._writer = None
+
+    def load(self, kind: str) -> Optional[Dict[str, Any]]:
+        """
+        Reads the last snapshot, if there is one.
+
+        Args:
+            kind (str): What the snapshot must be a snapshot of (e.g. 'astar').
+
+        Returns:
+            Optional[Dict[str, Any]]: The snapshot, or None if there is no checkpoint file.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                snapshot = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        if snapshot.get("version") != CHECKPOINT_VERSION or snapshot.get("kind") != kind:
+            raise ValueError(f"{self.path} is not a version {CHECKPOINT_VERSION} {kind} checkpoint")
+        return snapshot
+
+    def due(self) -> bool:
+        """
+        Tells whether interval seconds have passed since the last snapshot was saved.
+        """
+        return time.monotonic() - self._last_save >= self.interval
+
+    def save(self, kind: str, data: Dict[str, Any]):
+        """
+        Saves a snapshot, replacing the previous one. With fork, this returns as soon as
+        the child writing the snapshot has started; data may then be changed freely.
+
+        Args:
+            kind (str): What this is a snapshot of.
+            data (Dict[str, Any]): The state of the run. It must pickle.
+        """
+        snapshot = dict(data, version=CHECKPOINT_VERSION, kind=kind)
+        # One writer at a time, so snapshots land in the order they were taken
+        self.wait()
+        if self.use_fork:
+            pid = os.fork()
+            if pid == 0:
+                status = 1
+                try:
+                    _write_atomically(self.path, snapshot)
+                    status = 0
+                finally:
+                    # Leave without running the parent's cleanup handlers
+                    os._exit(status)
+            self._writer = pid
+        else:
+            _write_atomically(self.path, snapshot)
+        self.snapshots_written += 1
+        self._last_save = time.monotonic()
+
+    def wait(self):
+        """
+        Waits for the snapshot being written, if any, to reach the file.
+        """
+        if self._writer is not None:
+            _, status = os.waitpid(self._writer, 0)
+            self._writer = None
+            if status != 0:
+                raise RuntimeError(f"writing the checkpoint {self.path} failed")
+
+    def remove(self):
+        """
+        Deletes the checkpoint file, once the run it belongs to has finished.
+        """
+        self.wait()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _write_atomically(path: str, snapshot: Dict[str, Any]):
+    """
+    Pickles a snapshot to a temporary file next to path and moves it over path.
+    """
+    fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                     dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def resumable_astar(problem: HeuristicSearchProblem, checkpoint_path: str,
+                    checkpoint_interval: float = 60.0) -> Tuple[Optional[List[State]], Dict[str, int]]:
+    """
+    A* search that saves its state to checkpoint_path every checkpoint_interval seconds
+    and, when a checkpoint for the same start state is already there, carries on from it.
+    It runs astar's own core, informed_search.astar_steps, and snapshots its AStarSearch
+    between expansions, so an interrupted and resumed run finds the same path with the
+    same stats as an uninterrupted one. The checkpoint is deleted once the search ends.
+
+    Args:
+        problem (HeuristicSearchProblem): The problem to solve. Its states must pickle.
+        checkpoint_path (str): The checkpoint file.
+        checkpoint_interval (float): The least number of seconds between snapshots.
+
+    Returns:
+        Tuple[Optional[List[State]], Dict[str, int]]: The path and astar's stats, plus
+        'checkpoints_written' (snapshots saved by this call) and 'resumed' (whether it
+        started from a checkpoint).
+    """
+    return bfs_and_dfs.run_steps(resumable_astar_steps(problem, Checkpointer(checkpoint_path, checkpoint_interval)))
+
+
+def resumable_astar_steps(problem: HeuristicSearchProblem, checkpointer: Checkpointer
+                          ) -> Generator[None, None, Tuple[Optional[List[State]], Dict[str, int]]]:
+    """
+    resumable_astar as a generator, which yields after every expansion. Closing it waits
+    for the snapshot being written, so the file left behind is complete.
+    """
+    start_state = problem.get_start_state()
+    snapshot = checkpointer.load("astar")
+    if snapshot is not None and snapshot["start_state"] != start_state:
+        raise ValueError(f"{checkpointer.path} belongs to a search from another start state")
+    if snapshot is None:
+        search = AStarSearch.start(problem)
+    else:
+        search = AStarSearch(snapshot["open_set"], snapshot["parents"], snapshot["stats"])
+
+    def on_expand(search: AStarSearch) -> bool:
+        if checkpointer.due():
+            checkpointer.save("astar", {"start_state": start_state, "open_set": search.open_set,
+                                        "parents": search.parents, "stats": search.stats})
+        return False
+
+    try:
+        path, stats = yield from astar_steps(problem, search, on_expand)
+    finally:
+        checkpointer.wait()
+    checkpointer.remove()
+    return path, dict(stats, checkpoints_written=checkpointer.snapshots_written, resumed=snapshot is not None)
+
+
+def main():
+    """
+    Solves a random TileGame with resumable A*. Run it again with the same arguments after
+    killing it to carry on from the last checkpoint.
+    """
+    parser = argparse.ArgumentParser(
+        description='Solve a random TileGame with A*, checkpointing as it goes.')
+    parser.add_argument('--size', type=int, default=4,
+                        help='Size of the TileGame (default: 4)')
+    parser.add_argument('--seed', type=int, default=2,
+                        help='Random seed for the board (default: 2)')
+    parser.add_argument('--checkpoint', default='astar.checkpoint',
+                        help='Checkpoint file (default: astar.checkpoint)')
+    parser.add_argument('--interval', type=float, default=60.0,
+                        help='Seconds between checkpoints (default: 60)')
+
+    args = parser.parse_args()
+    random.seed(args.seed)
+    tile_game = HeuristicTileGame(args.size, admissible_heuristic, start_state=TileGame.random_start(args.size))
+    path, stats = resumable_astar(tile_game, args.checkpoint, args.interval)
+    TileGame.print_pretty_path(path)
+    print(stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,21 @@
 import random
 import matplotlib.pyplot as plt
-from typing import Callable
-from informed_search import astar
-from tile_game import TileGame, HeuristicTileGame, TileGameState
+from typing import Callable, Optional
+from informed_search import astar, beam_search, bounded_astar
+from tile_game import TileGame, HeuristicTileGame, MutableTileBoard, TileGameState, board_heuristic
 from heuristics import admissible_heuristic, inadmissible_heuristic, my_heuristic
+from heuristic_cache import CachedHeuristic
+from checkpoint import Checkpointer
+from shared_tables import ManhattanTableHeuristic, build_manhattan_table
 import numpy as np
 import tqdm
 import multiprocessing
 
+# The most memory a heuristic cache may use during a sweep. A sweep solves each board with
+# several lambdas in a row, so the recently used entries of the current board are the ones
+# worth keeping, and LRU eviction drops those of earlier boards.
+HEURISTIC_CACHE_BYTES = 64 * 1024 * 1024
+
 
 class ScaledHeuristic:
     def __init__(self, base_heuristic: Callable[[TileGameState], int], scale: float):
@@ -17,11 +25,22 @@ class ScaledHeuristic:
     def __call__(self, state: TileGameState) -> int:
         return int(self.scale * self.base_heuristic(state))
 
+    def board_heuristic(self, board: MutableTileBoard) -> int:
+        return int(self.scale * board_heuristic(self.base_heuristic, board))
+
 
-def completion_rate(heuristic: Callable[[TileGameState], int], num_trials=10, cutoff_time=10):
+def completion_rate(heuristic: Optional[Callable[[TileGameState], int]] = None, num_trials=10, cutoff_time=10,
+                    heuristic_for_size: Optional[Callable[[int], Callable[[TileGameState], int]]] = None):
     """
     make completion rate graph
+
+    heuristic_for_size, if given, is called with each board size to make the heuristic used
+    for that size instead of heuristic; one of the two must be given. make_completion_rate_plot uses it to hand every trial
+    process a heuristic backed by one SharedTable per size, which the processes map rather
+    than copy.
     """
+    if heuristic is None and heuristic_for_size is None:
+        raise ValueError("completion_rate needs a heuristic or a heuristic_for_size")
     # set random seed so that games are consistent
     random.seed(2)
     # Define symbols for matplotlib scatter plot to use for each tile size
@@ -31,10 +50,11 @@ def completion_rate(heuristic: Callable[[TileGameState], int], num_trials=10, cu
         num_successful = 0
         num_failed = 0
         print(f'Running for size {size}...')
+        size_heuristic = heuristic if heuristic_for_size is None else heuristic_for_size(size)
         for i in tqdm.tqdm(range(num_trials)):
             tg = TileGame(size)
             tile_game = HeuristicTileGame(
-                size, heuristic, start_state=tg.get_start_state())
+                size, size_heuristic, start_state=tg.get_start_state())
             # Make new thread to run astar, cutoff after cutoff_time
             p = multiprocessing.Process(target=astar, args=(tile_game,))
             p.start()
@@ -54,12 +74,23 @@ def completion_rate(heuristic: Callable[[TileGameState], int], num_trials=10, cu
 
 def make_completion_rate_plot():
     lambdas = np.geomspace(1, 5, 8, endpoint=True)
-    heuristics = [ScaledHeuristic(admissible_heuristic, l) for l in lambdas]
-    for i, heuristic in enumerate(heuristics):
-        print(f'Running for lambda={lambdas[i]:.2f}...')
-        solved = completion_rate(heuristic)
+    # admissible_heuristic read from one Manhattan distance table per board size, shared by
+    # every trial process and every lambda
+    tables = {}
+
+    def scaled_table_heuristic(size, scale):
+        if size not in tables:
+            tables[size] = build_manhattan_table(size)
+        return ScaledHeuristic(ManhattanTableHeuristic(tables[size], 0.5), scale)
+
+    for l in lambdas:
+        print(f'Running for lambda={l:.2f}...')
+        solved = completion_rate(heuristic_for_size=lambda size, l=l: scaled_table_heuristic(size, l))
         plt.plot(list(range(2, len(solved) + 2)), solved,
-                 label=f'lambda={lambdas[i]:.2f}')
+                 label=f'lambda={l:.2f}')
+    for table in tables.values():
+        table.close()
+        table.unlink()
     plt.legend()
     plt.ylabel('Completion Rate')
     plt.xlabel('Board Size')
@@ -136,10 +167,15 @@ def compare_problem_sizes(heuristics: dict[str, Callable[[TileGameState], int]],
     plt.clf()
 
 
-def compare_lambdas(admissible_heuristic, size=3, num_trials=1000):
+def compare_lambdas(admissible_heuristic, size=3, num_trials=1000, checkpoint_path=None, checkpoint_interval=60.0):
     """
     Compares the performance of A* search using varying levels of inadmissibility.
 
+    With checkpoint_path, the trial number, the random state and the results so far are
+    saved there every checkpoint_interval seconds, and a sweep started again with the same
+    checkpoint_path carries on from the last trial saved, drawing the same boards an
+    uninterrupted sweep would have.
+
     Args:
         admissible_heuristic (Callable[[TileGameState], int]):
             The admissible heuristic function to modify.
@@ -147,6 +183,10 @@ def compare_lambdas(admissible_heuristic, size=3, num_trials=1000):
             The size of the board to test, default is 3.
         num_trials (int, optional):
             The number of trials to run for each lambda value, default is 1000.
+        checkpoint_path (str, optional):
+            The checkpoint file, default is None (no checkpoints).
+        checkpoint_interval (float, optional):
+            The least number of seconds between checkpoints, default is 60.
 
     Saves:
         A scatter plot comparing the performance (solution length vs. states expanded)
@@ -156,11 +196,29 @@ def compare_lambdas(admissible_heuristic, size=3, num_trials=1000):
     states_expanded = {l: [] for l in lambdas}
     path_lengths = {l: [] for l in lambdas}
     my_heuristic_implemented = True
-
-    for _ in tqdm.tqdm(range(num_trials)):
+    # every lambda scales the same base values, so they can share one (bounded) cache
+    base_heuristic = CachedHeuristic(admissible_heuristic, max_bytes=HEURISTIC_CACHE_BYTES)
+
+    first_trial = 0
+    checkpointer = None
+    if checkpoint_path is not None:
+        checkpointer = Checkpointer(checkpoint_path, checkpoint_interval)
+        snapshot = checkpointer.load('compare_lambdas')
+        if snapshot is not None:
+            first_trial = snapshot['trial']
+            states_expanded, path_lengths = snapshot['states_expanded'], snapshot['path_lengths']
+            my_heuristic_implemented = snapshot['my_heuristic_implemented']
+            random.setstate(snapshot['random_state'])
+
+    for trial in tqdm.tqdm(range(first_trial, num_trials)):
+        # Saved before the trial's board is drawn, so a resumed sweep draws the same board
+        if checkpointer is not None and checkpointer.due():
+            checkpointer.save('compare_lambdas', {'trial': trial, 'random_state': random.getstate(),
+                                                  'states_expanded': states_expanded, 'path_lengths': path_lengths,
+                                                  'my_heuristic_implemented': my_heuristic_implemented})
         tg = TileGame(size)
         for l in lambdas:
-            def heuristic(x): return l * admissible_heuristic(x)
+            def heuristic(x): return l * base_heuristic(x)
             tile_game = HeuristicTileGame(
                 size, heuristic, start_state=tg.get_start_state())
             path, stats = astar(tile_game)
@@ -182,6 +240,9 @@ def compare_lambdas(admissible_heuristic, size=3, num_trials=1000):
             states_expanded[l].append(stats['states_expanded'])
             path_lengths[l].append(len(path))
 
+    if checkpointer is not None:
+        checkpointer.remove()
+    print("heuristic cache:", base_heuristic.stats())
     for l in lambdas:
         plt.scatter(np.mean(states_expanded[l]), np.mean(
             path_lengths[l]), label='lambda={:.2f}'.format(l))
@@ -200,6 +261,50 @@ def compare_lambdas(admissible_heuristic, size=3, num_trials=1000):
     plt.clf()
 
 
+def compare_bounded_search(size=3, num_trials=20, beam_widths=(1, 10, 100), frontier_caps=(30, 100, 1000)):
+    """
+    Compares beam search and bounded-frontier A* against plain A* on the same boards.
+
+    Args:
+        size (int, optional):
+            The size of the board to test, default is 3.
+        num_trials (int, optional):
+            The number of boards to solve, default is 20.
+        beam_widths (Tuple[int], optional):
+            The beam widths to try with beam_search.
+        frontier_caps (Tuple[int], optional):
+            The memory caps (most nodes held) to try with bounded_astar.
+
+    Returns:
+        A dictionary mapping each engine (e.g. 'beam 10', 'bounded 100') to its average
+        'states_expanded', 'states_pruned' and 'max_frontier_size', its average 'cost_ratio'
+        (solution cost over the optimal cost found by A* with the admissible heuristic),
+        and the fraction of boards it 'solved'.
+    """
+    random.seed(2)
+    engines = {f'beam {w}': (lambda problem, w=w: beam_search(problem, w)) for w in beam_widths}
+    engines.update({f'bounded {c}': (lambda problem, c=c: bounded_astar(problem, c)) for c in frontier_caps})
+    results = {name: {'states_expanded': [], 'states_pruned': [], 'max_frontier_size': [],
+                      'cost_ratio': [], 'solved': []} for name in engines}
+
+    for _ in tqdm.tqdm(range(num_trials)):
+        tile_game = HeuristicTileGame(size, admissible_heuristic, start_state=TileGame(size).get_start_state())
+        _, optimal_stats = astar(tile_game)
+        for name, engine in engines.items():
+            path, stats = engine(tile_game)
+            for key in ['states_expanded', 'states_pruned', 'max_frontier_size']:
+                results[name][key].append(stats[key])
+            results[name]['solved'].append(path is not None)
+            if path is not None and optimal_stats['total_cost'] > 0:
+                results[name]['cost_ratio'].append(stats['total_cost'] / optimal_stats['total_cost'])
+
+    averages = {name: {key: float(np.mean(values)) if values else None for key, values in result.items()}
+                for name, result in results.items()}
+    for name, average in averages.items():
+        print(f"{name}: {average}")
+    return averages
+
+
 def main():
     """
     Runs comparisons of heuristics and creates performance plots.
@@ -211,9 +316,11 @@ def main():
     # make_completion_rate_plot()
     compare_lambdas(admissible_heuristic, size=3, num_trials=50)
     lambdas = np.geomspace(1, 5, 8, endpoint=True)
+    base_heuristic = CachedHeuristic(admissible_heuristic, max_bytes=HEURISTIC_CACHE_BYTES)
     heuristics = {'{:.2f}'.format(l): ScaledHeuristic(
-        admissible_heuristic, l) for l in lambdas}
+        base_heuristic, l) for l in lambdas}
     # compare_problem_sizes(heuristics, sizes=range(1, 4))
+    # compare_bounded_search(size=3, num_trials=20)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,286 @@
+import argparse
+import heapq
+import os
+import tempfile
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from search_problem import SearchProblem, State
+from tile_game import TileGame, TileGameState
+
+# External-memory (disk-backed) breadth-first search.
+#
+# Every BFS layer lives in its own file of fixed-size records, sorted by state. A record is
+# the packed child state followed by the packed state it was generated from, so the path
+# can be traced back through the layer files at the end. Only a bounded buffer of records is
+# ever held in RAM: successors are collected into sorted runs on disk, the runs are merged
+# into one sorted stream, and that stream is deduplicated against the previous layers by
+# walking their (also sorted) files in lockstep.
+#
+# Every file read in a streaming pass gets an equal share of one buffer_size sized read
+# buffer, so RAM stays bounded however many runs or layers are open at once. When there
+# are more than MAX_MERGE_FAN_IN runs, they are first merged in groups into fewer, longer
+# runs, so the shares never get too small to read efficiently.
+MAX_MERGE_FAN_IN = 64
+
+
+def external_bfs(
+    problem: SearchProblem[State],
+    encode: Callable[[State], bytes],
+    decode: Callable[[bytes], State],
+    workdir: Optional[str] = None,
+    buffer_size: int = 100000,
+    undirected: bool = False,
+) -> Tuple[Optional[List[State]], Dict[str, int]]:
+    """
+    Breadth-first search that keeps its layers in sorted files on disk.
+
+    Args:
+        problem (SearchProblem[State]): The search problem to solve.
+        encode (Callable[[State], bytes]): Packs a state into bytes. Every state must
+            encode to the same number of bytes.
+        decode (Callable[[bytes], State]): Unpacks a state packed with encode.
+        workdir (Optional[str]): The directory to write layer files into. A temporary
+            directory (removed afterwards) is used if not provided.
+        buffer_size (int): The most successor records held in RAM before they are sorted
+            and written out as a run. It also bounds the records read into RAM at once
+            while merging, split evenly between the files being read.
+        undirected (bool): Whether every move can be undone by another move. If so, a new
+            state can only duplicate one in the current or previous layer, so only those two
+            layers are merged against instead of every earlier one.
+
+    Returns:
+        Tuple[Optional[List[State]], Dict[str, int]]:
+            - A list of states representing the solution path, or None if no solution was found.
+            - A dictionary of search statistics ('path_length', 'states_expanded',
+              'total_cost', 'max_frontier_size', 'bytes_written'). max_frontier_size is the
+              size of the largest layer.
+    """
+    if workdir is None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            return external_bfs(problem, encode, decode, tmpdir, buffer_size, undirected)
+
+    stats = {"path_length": 0, "states_expanded": 0, "total_cost": 0,
+             "max_frontier_size": 1, "bytes_written": 0}
+
+    start_state = problem.get_start_state()
+    start_bytes = encode(start_state)
+    state_size = len(start_bytes)
+    record_size = 2 * state_size
+
+    # The start state is its own parent, which is where path tracing stops
+    layer_paths = [os.path.join(workdir, "layer_0.bin")]
+    with open(layer_paths[0], "wb") as f:
+        f.write(start_bytes + start_bytes)
+    stats["bytes_written"] += record_size
+
+    depth = 0
+    while True:
+        try:
+            runs = []
+            buffer = []
+            layer_size = 0
+            for record in _read_records(layer_paths[depth], record_size, max(1, buffer_size // 8)):
+                state_bytes = record[:state_size]
+                state = decode(state_bytes)
+                if problem.is_goal_state(state):
+                    path = _trace_path(layer_paths, state_bytes, state_size, decode)
+                    stats["path_length"] = len(path)
+                    stats["total_cost"] = len(path) - 1
+                    return path, stats
+
+                stats["states_expanded"] += 1
+                for child in problem.get_successors(state):
+                    buffer.append(encode(child) + state_bytes)
+                if len(buffer) >= buffer_size:
+                    runs.append(_write_run(buffer, workdir, depth, len(runs), stats))
+                    buffer = []
+            if buffer:
+                runs.append(_write_run(buffer, workdir, depth, len(runs), stats))
+
+            # Merge the runs and drop anything already seen in an earlier layer
+            runs = _merge_runs(runs, record_size, buffer_size, workdir, depth, stats)
+            first_layer = max(0, depth - 1) if undirected else 0
+            seen_paths = layer_paths[first_layer:]
+            chunk = max(1, buffer_size // (len(runs) + len(seen_paths) + 1))
+            seen = [_read_keys(path, record_size, state_size, chunk) for path in seen_paths]
+            merged = heapq.merge(*[_read_records(run, record_size, chunk) for run in runs])
+            next_path = os.path.join(workdir, f"layer_{depth + 1}.bin")
+            with open(next_path, "wb", buffering=record_size * chunk) as f:
+                for record in _subtract_seen(_unique_states(merged, state_size), seen, state_size):
+                    f.write(record)
+                    layer_size += 1
+        finally:
+            # Whether the layer was finished, cut short by a goal or failed, none of its runs
+            # are needed any more
+            _remove_runs(workdir, depth)
+
+        stats["bytes_written"] += layer_size * record_size
+        if layer_size == 0:
+            return None, stats
+        stats["max_frontier_size"] = max(stats["max_frontier_size"], layer_size)
+        layer_paths.append(next_path)
+        depth += 1
+
+
+def _read_records(path: str, record_size: int, chunk_records: int) -> Iterator[bytes]:
+    """
+    Streams the fixed-size records of a file, reading chunk_records of them at a time.
+    """
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(record_size * chunk_records)
+            if not chunk:
+                return
+            for i in range(0, len(chunk), record_size):
+                yield chunk[i:i + record_size]
+
+
+def _read_keys(path: str, record_size: int, state_size: int, chunk_records: int) -> Iterator[bytes]:
+    """
+    Streams just the state part of each record in a layer file.
+    """
+    for record in _read_records(path, record_size, chunk_records):
+        yield record[:state_size]
+
+
+def _write_run(buffer: List[bytes], workdir: str, depth: int, run: int, stats: Dict[str, int]) -> str:
+    """
+    Sorts a buffer of records and writes it to disk as one run, without repeated states.
+    """
+    buffer.sort()
+    state_size = len(buffer[0]) // 2
+    path = os.path.join(workdir, f"run_{depth + 1}_{run}.bin")
+    with open(path, "wb") as f:
+        for record in _unique_states(buffer, state_size):
+            f.write(record)
+            stats["bytes_written"] += len(record)
+    return path
+
+
+def _remove_runs(workdir: str, depth: int):
+    """
+    Deletes every run file written while expanding the layer at depth, merged or not.
+    """
+    prefix = f"run_{depth + 1}_"
+    for name in os.listdir(workdir):
+        if name.startswith(prefix) and name.endswith(".bin"):
+            os.remove(os.path.join(workdir, name))
+
+
+def _merge_runs(runs: List[str], record_size: int, buffer_size: int, workdir: str,
+                depth: int, stats: Dict[str, int]) -> List[str]:
+    """
+    Merges runs in groups of MAX_MERGE_FAN_IN until at most that many are left.
+    """
+    merge_pass = 0
+    while len(runs) > MAX_MERGE_FAN_IN:
+        merged_runs = []
+        for i in range(0, len(runs), MAX_MERGE_FAN_IN):
+            group = runs[i:i + MAX_MERGE_FAN_IN]
+            chunk = max(1, buffer_size // (len(group) + 1))
+            path = os.path.join(workdir, f"run_{depth + 1}_pass{merge_pass}_{len(merged_runs)}.bin")
+            state_size = record_size // 2
+            merged = heapq.merge(*[_read_records(run, record_size, chunk) for run in group])
+            with open(path, "wb", buffering=record_size * chunk) as f:
+                for record in _unique_states(merged, state_size):
+                    f.write(record)
+                    stats["bytes_written"] += record_size
+            for run in group:
+                os.remove(run)
+            merged_runs.append(path)
+        runs = merged_runs
+        merge_pass += 1
+    return runs
+
+
+def _unique_states(records: Iterator[bytes], state_size: int) -> Iterator[bytes]:
+    """
+    Keeps the first record of each state from a sorted stream of records.
+    """
+    previous = None
+    for record in records:
+        key = record[:state_size]
+        if key != previous:
+            previous = key
+            yield record
+
+
+def _subtract_seen(records: Iterator[bytes], seen: List[Iterator[bytes]], state_size: int) -> Iterator[bytes]:
+    """
+    Drops records whose state appears in any of the sorted key streams in seen.
+    Every stream only ever moves forwards, so each layer file is read once.
+    """
+    heads = [next(keys, None) for keys in seen]
+    for record in records:
+        key = record[:state_size]
+        duplicate = False
+        for i, keys in enumerate(seen):
+            while heads[i] is not None and heads[i] < key:
+                heads[i] = next(keys, None)
+            if heads[i] == key:
+                duplicate = True
+        if not duplicate:
+            yield record
+
+
+def _trace_path(layer_paths: List[str], state_bytes: bytes, state_size: int,
+                decode: Callable[[bytes], State]) -> List[State]:
+    """
+    Follows parent pointers back through the layer files, binary searching each sorted
+    layer for the parent of the state found in the layer after it.
+    """
+    record_size = 2 * state_size
+    reverse_path = [decode(state_bytes)]
+    for depth in range(len(layer_paths) - 1, 0, -1):
+        record = _find_record(layer_paths[depth], state_bytes, record_size, state_size)
+        state_bytes = record[state_size:]
+        reverse_path.append(decode(state_bytes))
+    reverse_path.reverse()
+    return reverse_path
+
+
+def _find_record(path: str, key: bytes, record_size: int, state_size: int) -> bytes:
+    """
+    Binary searches a sorted layer file for the record of the given state.
+    """
+    with open(path, "rb") as f:
+        low = 0
+        high = os.path.getsize(path) // record_size
+        while low < high:
+            mid = (low + high) // 2
+            f.seek(mid * record_size)
+            record = f.read(record_size)
+            if record[:state_size] < key:
+                low = mid + 1
+            else:
+                high = mid
+        f.seek(low * record_size)
+        record = f.read(record_size)
+    if record[:state_size] != key:
+        raise ValueError("state missing from its layer file")
+    return record
+
+
+def main():
+    """
+    Runs external-memory BFS on a random TileGame and prints the results.
+    """
+    parser = argparse.ArgumentParser(
+        description='Run disk-backed BFS on a TileGame problem.')
+    parser.add_argument('--size', type=int, default=3,
+                        help='Size of the TileGame (default: 3)')
+    parser.add_argument('--buffer', type=int, default=100000,
+                        help='Records held in RAM before spilling a run to disk (default: 100000)')
+    parser.add_argument('--workdir', type=str, default=None,
+                        help='Directory for layer files (default: a temporary directory)')
+
+    args = parser.parse_args()
+    tile_game = TileGame(args.size)
+    path, stats = external_bfs(tile_game, TileGameState.to_keyed_bytes, TileGameState.from_keyed_bytes,
+                               workdir=args.workdir, buffer_size=args.buffer, undirected=True)
+    tile_game.print_pretty_path(path)
+    print("stats:", stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import sys
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from tile_game import MutableTileBoard, TileGameState
+
+# Rough cost of one entry's dictionary slot plus the eviction bookkeeping around it
+ENTRY_OVERHEAD_BYTES = 100
+
+
+class CachedHeuristic:
+    """
+    Memoizes a heuristic function, so a board that is scored again (by a re-expansion, or by
+    another run that shares this cache) is looked up instead of recomputed.
+
+    The cache can be capped by number of entries, by approximate bytes, or both. When full,
+    an entry is evicted using either LRU (least recently used) or CLOCK (second chance)
+    order. CLOCK is cheaper on hits, since a hit only sets a reference bit instead of
+    reordering the cache.
+
+    Wrapping a CachedHeuristic in several ScaledHeuristics lets all of them share one cache
+    of base heuristic values.
+
+    Attributes:
+        hits (int): The number of calls answered from the cache.
+        misses (int): The number of calls that ran the base heuristic.
+        evictions (int): The number of entries evicted to stay under the cap.
+    """
+
+    def __init__(
+        self,
+        base_heuristic: Callable[[TileGameState], float],
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        policy: str = "lru",
+    ):
+        """
+        Args:
+            base_heuristic (Callable[[TileGameState], float]): The heuristic to memoize.
+            max_entries (Optional[int]): The most states to keep. Unbounded if not provided.
+            max_bytes (Optional[int]): The most (approximate) bytes to keep. Unbounded if not
+                provided. The size of an entry is measured from the first state cached, and
+                at least one entry is kept however small the cap.
+            policy (str): The eviction policy, either "lru" or "clock".
+        """
+        if policy not in ("lru", "clock"):
+            raise ValueError(f"unknown eviction policy: {policy}")
+        if max_entries is not None and max_entries < 1:
+            raise ValueError(f"max_entries must be at least 1, got {max_entries}")
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError(f"max_bytes must be at least 1, got {max_bytes}")
+        self.base_heuristic = base_heuristic
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.entry_bytes = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.clear()
+
+    def __call__(self, state: TileGameState) -> float:
+        if self.policy == "lru":
+            return self._lru_call(state)
+        return self._clock_call(state)
+
+    def board_heuristic(self, board: MutableTileBoard) -> float:
+        """
+        Evaluates the heuristic on a MutableTileBoard. A base heuristic that reads the board
+        directly is cheaper than a cache lookup, so it is called without the cache.
+        """
+        evaluate = getattr(self.base_heuristic, "board_heuristic", None)
+        if evaluate is not None:
+            return evaluate(board)
+        return self(board.to_state())
+
+    def __len__(self) -> int:
+        return len(self.cache)
+
+    def clear(self):
+        """
+        Empties the cache (the hit, miss and eviction counters are kept).
+        """
+        if self.policy == "lru":
+            self.cache = OrderedDict()
+        else:
+            # CLOCK keeps its entries in a ring of slots. The cache maps a state to its slot,
+            # and each slot is [state, value, referenced].
+            self.cache = {}
+            self.slots = []
+            self.hand = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            Dict[str, int]: The cache size and its hit, miss and eviction counters.
+        """
+        return {"entries": len(self.cache), "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions}
+
+    def _capacity(self, state: TileGameState, value: float) -> Optional[int]:
+        """
+        The most entries the cache may hold, taking the tighter of the two caps.
+        """
+        capacity = self.max_entries
+        if self.max_bytes is not None:
+            if self.entry_bytes is None:
+                self.entry_bytes = _entry_size(state, value)
+            # A cap smaller than one entry still keeps one, so there is always one to evict
+            by_bytes = max(1, self.max_bytes // self.entry_bytes)
+            capacity = by_bytes if capacity is None else min(capacity, by_bytes)
+        return capacity
+
+    def _lru_call(self, state: TileGameState) -> float:
+        cache = self.cache
+        if state in cache:
+            self.hits += 1
+            cache.move_to_end(state)
+            return cache[state]
+
+        self.misses += 1
+        value = self.base_heuristic(state)
+        capacity = self._capacity(state, value)
+        if capacity is not None and len(cache) >= capacity:
+            cache.popitem(last=False)
+            self.evictions += 1
+        cache[state] = value
+        return value
+
+    def _clock_call(self, state: TileGameState) -> float:
+        slot = self.cache.get(state)
+        if slot is not None:
+            self.hits += 1
+            slot[2] = True
+            return slot[1]
+
+        self.misses += 1
+        value = self.base_heuristic(state)
+        capacity = self._capacity(state, value)
+        new_slot = [state, value, False]
+        if capacity is None or len(self.slots) < capacity:
+            self.slots.append(new_slot)
+        else:
+            # Sweep the hand, giving referenced entries a second chance, until an
+            # unreferenced one is found to replace
+            while self.slots[self.hand][2]:
+                self.slots[self.hand][2] = False
+                self.hand = (self.hand + 1) % len(self.slots)
+            del self.cache[self.slots[self.hand][0]]
+            self.slots[self.hand] = new_slot
+            self.hand = (self.hand + 1) % len(self.slots)
+            self.evictions += 1
+        self.cache[state] = new_slot
+        return value
+
+
+def _entry_size(state: TileGameState, value: float) -> int:
+    """
+    Approximates the bytes one cache entry costs: the state with its board, the value,
+    and the bookkeeping around them.
+    """
+    size = sys.getsizeof(state) + sys.getsizeof(value) + ENTRY_OVERHEAD_BYTES
+    board = getattr(state, "board", None)
+    if board is not None:
+        size += sys.getsizeof(board) + sum(sys.getsizeof(row) for row in board)
+    return size
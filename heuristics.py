@@ -1,3 +1,4 @@
+import tile_kernels
 from tile_game import TileGameState
 
 
@@ -15,15 +16,12 @@ def admissible_heuristic(state: TileGameState) -> float:
 
     Returns: a float.
     """
-    dimension = len(state.board)
-    total_distance = 0
-    for i in range(dimension):
-        for j in range(dimension):
-            num = state.board[i][j]
-            row = (num-1) // dimension
-            col = (num-1) % dimension
-            total_distance += abs(row-i) + abs(col-j)
-    return total_distance / 2
+    # Evaluated on the packed board by the compiled kernel when it is built
+    return tile_kernels.manhattan(state.to_bytes()) / 2
+
+
+# The Manhattan sum is kept up to date by MutableTileBoard itself
+admissible_heuristic.board_heuristic = lambda board: board.manhattan / 2
 
 
 def inadmissible_heuristic(state: TileGameState) -> float:
@@ -39,15 +37,10 @@ def inadmissible_heuristic(state: TileGameState) -> float:
 
     Returns: a float.
     """
-    dimension = len(state.board)
-    total_distance = 0
-    for i in range(dimension):
-        for j in range(dimension):
-            num = state.board[i][j]
-            row = (num-1) // dimension
-            col = (num-1) % dimension
-            total_distance += abs(row-i) + abs(col-j)
-    return total_distance
+    return tile_kernels.manhattan(state.to_bytes())
+
+
+inadmissible_heuristic.board_heuristic = lambda board: board.manhattan
 
 
 def my_heuristic(state: TileGameState) -> float:
@@ -58,45 +51,6 @@ def my_heuristic(state: TileGameState) -> float:
 
     Returns: a float (the heuristic value of state).
     """
-    heuristic_value = 0
-    dimension = len(state.board)
-    for i in range(dimension):
-        for j in range(dimension):
-            num = state.board[i][j]
-            row = (num-1) // dimension
-            col = (num-1) % dimension
-            cur_location_goal = (i * dimension) + j
-            if not num == cur_location_goal: #if the number is not where it belongs
-                if i > 0: #if we are not is the top row, swap up and see what happens
-                    num_goal_up = (i - 1) * dimension + j
-                    if num == num_goal_up:
-                        other_num_up = state.board[i - 1][j]
-                        if other_num_up == cur_location_goal:
-                            heuristic_value += 0.5
-                            continue
-
-                if i < dimension - 1: #if we are not is the bottom row, swap down and see what happens
-                    num_goal_down = (i + 1) * dimension + j
-                    if num == num_goal_down:
-                        other_num_down = state.board[i + 1][j]
-                        if other_num_down == cur_location_goal:
-                            heuristic_value += 0.5
-                            continue
-
-                if j > 0: #if we are not is the left-most row, swap left and see what happens
-                    num_goal_left = (i * dimension) + (j - 1)
-                    if num == num_goal_left:
-                        other_num_left = state.board[i][j - 1]
-                        if other_num_left == cur_location_goal:
-                            heuristic_value += 0.5
-                            continue
-
-                if j < dimension - 1: #if we are not is the right-most row, swap right and see what happens
-                    num_goal_right = (i * dimension) + (j + 1)
-                    if num == num_goal_right:
-                        other_num_right = state.board[i][j + 1]
-                        if other_num_right == cur_location_goal:
-                            heuristic_value += 0.5
-                            continue
-            heuristic_value += (abs(row-i) + abs(col-j))
-    return heuristic_value
+    # A tile that trades places with a neighbour to reach its goal counts half a swap;
+    # every other tile counts its Manhattan distance (see tile_kernels)
+    return tile_kernels.my_heuristic(state.to_bytes())
@@ -1,9 +1,13 @@
+import heapq
+import itertools
+import math
 from queue import LifoQueue, PriorityQueue, Queue
-from typing import List, Dict, Tuple, Optional
+from typing import Callable, Dict, Generator, List, Optional, Tuple
 
+import bfs_and_dfs
 from search_problem import State
 from heuristic_search_problem import HeuristicSearchProblem
-from tile_game import HeuristicTileGame, TileGame
+from tile_game import HeuristicTileGame, MutableTileBoard, TileGame, TileGameState
 from heuristics import admissible_heuristic, inadmissible_heuristic
 
 
@@ -40,25 +44,74 @@ def astar(problem: HeuristicSearchProblem) -> tuple[Optional[List[State]], Dict[
     Output: a list of states representing the path of the solution
             and a dictionary with stats about the search
     """
-    stats = {
-                "path_length": 0,
-                "states_expanded": 0,
-                "total_cost": 0,
-                "max_frontier_size": 0
-            }
-    open_set = PriorityQueue()
-    start_state = problem.get_start_state()
-    #open_set contains a tuple of (priorty, (state, cur_path_length))
-    open_set.put((problem.heuristic(start_state), (start_state, 1)))
-    #has_been_added contains all states that have been put in the open_set
-    has_been_added = {start_state: True}
-    steps_taken = {} # will map a state to the predecessor state it came from
-    while not open_set.empty():
-        _ , state_and_path_length = open_set.get()
+    return bfs_and_dfs.run_steps(astar_steps(problem))
+
+
+class AStarSearch:
+    """
+    The working state of an A* search, which astar_steps advances one expansion at a time.
+    Callers that pause the search (to checkpoint it, or to measure it) read it between
+    expansions.
+
+    Attributes:
+        open_set (List[tuple]): The frontier, a heap of (priority, (state, path_length))
+            entries; on equal priorities, states compare to break the tie.
+        parents (Dict[State, Optional[State]]): Maps every state ever put on the open set
+            to the state it was reached from, and the start state to None. It is also the
+            set of states already generated.
+        stats (Dict[str, int]): astar's stats so far.
+    """
+
+    def __init__(self, open_set: List[tuple], parents: Dict[State, Optional[State]], stats: Dict[str, int]):
+        self.open_set = open_set
+        self.parents = parents
+        self.stats = stats
+
+    @staticmethod
+    def start(problem: HeuristicSearchProblem) -> "AStarSearch":
+        """
+        Produces the state of a search that has not expanded anything yet.
+
+        Args:
+            problem (HeuristicSearchProblem): The problem to solve.
+
+        Returns:
+            AStarSearch: A search holding only the start state.
+        """
+        start_state = problem.get_start_state()
+        stats = {
+                    "path_length": 0,
+                    "states_expanded": 0,
+                    "total_cost": 0,
+                    "max_frontier_size": 0
+                }
+        return AStarSearch([(problem.heuristic(start_state), (start_state, 1))], {start_state: None}, stats)
+
+
+def astar_steps(problem: HeuristicSearchProblem, search: Optional[AStarSearch] = None,
+                on_expand: Optional[Callable[[AStarSearch], bool]] = None
+                ) -> Generator[None, None, tuple[Optional[List[State]], Dict[str, any]]]:
+    """
+    A* search as a generator, which yields after every expansion and returns what astar
+    returns. astar runs it straight through; async_search.async_astar pauses at the yields.
+
+    Args:
+        problem - the problem on which the search is conducted, a HeuristicSearchProblem
+        search - the search to carry on with, e.g. one restored from a checkpoint. A new
+            one (AStarSearch.start(problem)) if not provided.
+        on_expand - called with the search after every expansion; if it returns True, the
+            search stops there and returns None with the stats so far, leaving the open
+            set as it is.
+    """
+    if search is None:
+        search = AStarSearch.start(problem)
+    open_set, parents, stats = search.open_set, search.parents, search.stats
+    while open_set:
+        _ , state_and_path_length = heapq.heappop(open_set)
         cur_state, cur_path_length = state_and_path_length
         if problem.is_goal_state(cur_state):
             #path-length is the length of the path (including the start and goal state)
-            path = reconstruct_path(steps_taken, cur_state, problem)
+            path = bfs_and_dfs.reconstruct_path(parents, cur_state)
             stats["path_length"] = len(path)
             if not len(path) == cur_path_length:
                 raise ValueError("error, not correct cur_path_length")
@@ -67,16 +120,314 @@ def astar(problem: HeuristicSearchProblem) -> tuple[Optional[List[State]], Dict[
             return path, stats
         successors = problem.get_successors(cur_state)
         for successor in successors:
-            if successor not in has_been_added:
-                steps_taken[successor] = cur_state
+            if successor not in parents:
+                parents[successor] = cur_state
                 priority = problem.heuristic(successor) + cur_path_length
-                open_set.put((priority, (successor, cur_path_length + 1)))
-                has_been_added[successor] = True
+                heapq.heappush(open_set, (priority, (successor, cur_path_length + 1)))
         stats["states_expanded"] = stats["states_expanded"] + 1
-        stats["max_frontier_size"] = max(stats["max_frontier_size"], open_set.qsize())
+        stats["max_frontier_size"] = max(stats["max_frontier_size"], len(open_set))
+        if on_expand is not None and on_expand(search):
+            return None, stats
+        yield
     return None, stats
 
 
+def beam_search(problem: HeuristicSearchProblem, beam_width: int) -> tuple[Optional[List[State]], Dict[str, any]]:
+    """
+    Beam search: a breadth-first search that only keeps the beam_width best states (by
+    heuristic) of each layer. It gives up optimality, and even completeness, for a frontier
+    that never grows past beam_width.
+
+    Args:
+        problem - the problem on which the search is conducted, a HeuristicSearchProblem
+        beam_width - the number of states kept in each layer
+
+    Output: a list of states representing the path of the solution (or None if every state
+            left the beam without reaching the goal) and a dictionary with stats about the
+            search, which adds 'states_pruned' (states dropped from a layer) to astar's stats
+    """
+    stats = {
+                "path_length": 0,
+                "states_expanded": 0,
+                "total_cost": 0,
+                "max_frontier_size": 1,
+                "states_pruned": 0
+            }
+    start_state = problem.get_start_state()
+    parents = {start_state: None}
+    beam = [start_state]
+    while beam:
+        candidates = []
+        for state in beam:
+            if problem.is_goal_state(state):
+                path = bfs_and_dfs.reconstruct_path(parents, state)
+                stats["path_length"] = len(path)
+                stats["total_cost"] = len(path) - 1
+                return path, stats
+            stats["states_expanded"] += 1
+            for successor in problem.get_successors(state):
+                if successor not in parents:
+                    parents[successor] = state
+                    candidates.append((problem.heuristic(successor), successor))
+        candidates.sort()
+        stats["states_pruned"] += max(0, len(candidates) - beam_width)
+        for _, pruned_state in candidates[beam_width:]:
+            # forget pruned states, so a later layer may reach them again
+            del parents[pruned_state]
+        beam = [state for _, state in candidates[:beam_width]]
+        stats["max_frontier_size"] = max(stats["max_frontier_size"], len(beam))
+    return None, stats
+
+
+class _BoundedNode:
+    """
+    A node of the search tree bounded_astar keeps in memory.
+    """
+    __slots__ = ("state", "g", "f", "depth", "parent", "children", "pending", "forgotten", "entry", "leaf_entry")
+
+    def __init__(self, state, g, f, parent):
+        self.state = state
+        self.g = g
+        self.f = f
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.parent = parent
+        self.children = []
+        self.pending = None  # successors not generated yet (None until the node is first expanded)
+        self.forgotten = {}  # maps a pruned child's state to its f
+        self.entry = None  # the node's current entry in the queue, or None if it is not queued
+        self.leaf_entry = None  # the node's current entry among the leaves, or None if it is not a leaf
+
+
+def bounded_astar(problem: HeuristicSearchProblem, max_frontier_size: int) -> tuple[Optional[List[State]], Dict[str, any]]:
+    """
+    Memory-bounded A* (SMA*): the search tree held in memory, frontier included, never
+    grows past max_frontier_size nodes.
+
+    Successors are generated one at a time. When memory is full, the worst leaf (highest
+    f, and shallowest among those) is pruned, and its parent remembers its f, so the
+    pruned branch is regenerated if it ever becomes the most promising one again. Once all
+    of a node's successors are in memory, its f is backed up to the lowest f among them.
+    A node at the deepest level memory can hold that is not a goal gets an f of infinity.
+
+    With an admissible heuristic, the path found is optimal as long as an optimal path
+    fits in memory (max_frontier_size is at least its number of states). When no solution
+    fits, None is returned, though only after every path that does fit has been ruled
+    out, which takes long when the cap is just short of the solution length.
+
+    Args:
+        problem - the problem on which the search is conducted, a HeuristicSearchProblem
+        max_frontier_size - the most nodes held in memory (at least 2)
+
+    Output: a list of states representing the path of the solution and a dictionary with
+            stats about the search, which adds 'states_pruned' to astar's stats.
+            max_frontier_size is the most nodes held at once.
+    """
+    if max_frontier_size < 2:
+        raise ValueError("bounded_astar needs room for at least 2 nodes")
+    stats = {
+                "path_length": 0,
+                "states_expanded": 0,
+                "total_cost": 0,
+                "max_frontier_size": 1,
+                "states_pruned": 0
+            }
+    # The queue holds every node with successors still to generate, ordered best first
+    # (lowest f, deepest). The leaves are also kept worst first (highest f, shallowest), to
+    # find the one to prune. When a node is re-queued its entry is replaced, and stale
+    # entries are skipped when they reach the top of either heap.
+    best_first = []
+    worst_leaves = []
+    counter = itertools.count()
+    in_memory = {}  # maps a state to the node with the lowest g that holds it
+
+    def enqueue(node):
+        node.entry = next(counter)
+        heapq.heappush(best_first, (node.f, -node.depth, node.entry, node))
+        if not node.children:
+            node.leaf_entry = node.entry
+            heapq.heappush(worst_leaves, (-node.f, node.depth, node.entry, node))
+
+    def best():
+        while best_first:
+            _, _, entry, node = best_first[0]
+            if node.entry == entry:
+                return node
+            heapq.heappop(best_first)
+        return None
+
+    def prune_worst_leaf():
+        while True:
+            _, _, entry, node = heapq.heappop(worst_leaves)
+            if node.leaf_entry == entry and node.parent is not None:
+                break
+        node.entry = node.leaf_entry = None
+        if in_memory.get(node.state) is node:
+            del in_memory[node.state]
+        parent = node.parent
+        parent.children.remove(node)
+        parent.forgotten[node.state] = node.f
+        enqueue(parent)
+        stats["states_pruned"] += 1
+
+    def back_up(node):
+        # Once all of a node's successors have been generated, it is as good as the best of
+        # them, whether still in memory or forgotten
+        while node is not None and node.pending == []:
+            f = min([child.f for child in node.children] + list(node.forgotten.values()), default=math.inf)
+            if f == node.f:
+                return
+            node.f = f
+            if node.entry is not None:
+                enqueue(node)
+            node = node.parent
+
+    start_state = problem.get_start_state()
+    root = _BoundedNode(start_state, 0, problem.heuristic(start_state), None)
+    in_memory[start_state] = root
+    enqueue(root)
+    nodes_held = 1
+    while True:
+        node = best()
+        if node is None or node.f == math.inf:
+            return None, stats
+        if problem.is_goal_state(node.state):
+            path = []
+            while node is not None:
+                path.append(node.state)
+                node = node.parent
+            path.reverse()
+            stats["path_length"] = len(path)
+            stats["total_cost"] = len(path) - 1
+            return path, stats
+
+        if node.pending is None:
+            # Successors already on the path back to the start would only lead in circles
+            on_path = set()
+            ancestor = node
+            while ancestor is not None:
+                on_path.add(ancestor.state)
+                ancestor = ancestor.parent
+            node.pending = [s for s in problem.get_successors(node.state) if s not in on_path]
+            node.pending.reverse()
+            stats["states_expanded"] += 1
+
+        # Generate the next successor: an untried one, or else the best forgotten one. A
+        # state already held with no higher g is skipped, since that copy (or the f
+        # remembered for it once it is pruned) already covers every path through it.
+        child = None
+        while node.pending:
+            state = node.pending.pop()
+            held = in_memory.get(state)
+            if held is None or held.g > node.g + 1:
+                break
+        else:
+            state = None
+        if state is not None:
+            if node.depth + 2 >= max_frontier_size and not problem.is_goal_state(state):
+                f = math.inf  # no room left below this child to reach a goal
+            else:
+                f = max(node.f, node.g + 1 + problem.heuristic(state))
+        elif node.forgotten:
+            state = min(node.forgotten, key=node.forgotten.get)
+            f = node.forgotten.pop(state)
+        else:
+            state = None
+        if state is not None:
+            child = _BoundedNode(state, node.g + 1, f, node)
+            node.children.append(child)
+            node.leaf_entry = None
+            in_memory[state] = child
+            nodes_held += 1
+        if not node.pending and not node.forgotten and node.children:
+            node.entry = None  # every successor is in memory, so nothing is left to generate
+        back_up(node)
+        if nodes_held > max_frontier_size:
+            prune_worst_leaf()
+            nodes_held -= 1
+        if child is not None:
+            enqueue(child)
+        stats["max_frontier_size"] = max(stats["max_frontier_size"], nodes_held)
+
+
+def ida_star(problem: HeuristicTileGame, initial_bound: Optional[float] = None) -> tuple[Optional[List[TileGameState]], Dict[str, any]]:
+    """
+    Iterative deepening A* (IDA*) on a tile game, run on one MutableTileBoard that every
+    move is applied to and undone on, so no state is created per node. The heuristic is
+    evaluated through problem.board_heuristic, which reads the board directly for
+    heuristics that support it (see tile_game.board_heuristic).
+
+    Each iteration is a depth-first search that cuts off every node whose f = g + h is over
+    the bound, and the next bound is the smallest f that was cut off. Moves that undo the
+    previous move, or return to a board already on the current path, are skipped.
+
+    Args:
+        problem (HeuristicTileGame): The tile game to solve.
+        initial_bound (Optional[float]): The bound of the first iteration. The heuristic
+            value of the start state if not provided.
+
+    Returns:
+        Tuple[Optional[List[TileGameState]], Dict[str, any]]:
+            - A list of states representing the solution path, or None if no solution was found.
+            - A dictionary of search statistics ('path_length', 'states_expanded',
+              'total_cost', 'max_frontier_size'), where states_expanded is summed over every
+              iteration and max_frontier_size is the longest path held.
+    """
+    stats = {
+                "path_length": 0,
+                "states_expanded": 0,
+                "total_cost": 0,
+                "max_frontier_size": 0
+            }
+    start_state = problem.get_start_state()
+    board = MutableTileBoard(start_state)
+    goal_state = problem.goal_state
+    heuristic = lambda: problem.board_heuristic(board)
+    goal_tiles = goal_state.to_bytes()
+    num_swaps = len(board.swaps)
+    moves = []  # the swaps taken from the start state to the current board
+    on_path = {start_state.zobrist}
+    found = object()
+
+    def search(g, bound, previous):
+        f = g + heuristic()
+        if f > bound:
+            return f
+        if board.zobrist == goal_state.zobrist and board.tiles == goal_tiles:
+            return found
+        stats["states_expanded"] += 1
+        stats["max_frontier_size"] = max(stats["max_frontier_size"], g + 1)
+        next_bound = math.inf
+        for index in range(num_swaps):
+            if index == previous:
+                continue
+            board.apply_swap(index)
+            if board.zobrist not in on_path:
+                on_path.add(board.zobrist)
+                moves.append(index)
+                result = search(g + 1, bound, index)
+                if result is found:
+                    return found
+                moves.pop()
+                on_path.remove(board.zobrist)
+                next_bound = min(next_bound, result)
+            board.undo_swap(index)
+        return next_bound
+
+    bound = heuristic() if initial_bound is None else initial_bound
+    while True:
+        result = search(0, bound, None)
+        if result is found:
+            path = [start_state]
+            for index in moves:
+                path.append(problem.apply_swap(path[-1], index))
+            stats["path_length"] = len(path)
+            stats["total_cost"] = len(path) - 1
+            return path, stats
+        if result == math.inf:
+            return None, stats
+        bound = result
+
+
 def main():
     dim = 3
     tg = TileGame(dim)
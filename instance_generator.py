@@ -0,0 +1,288 @@
+import argparse
+import math
+from typing import Iterator, List, Optional
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from shared_tables import SharedTable, build_distance_table
+from tile_game import TileGameState, flat_swaps
+
+# Random TileGame boards in bulk, with control over how hard they are.
+#
+# Boards are rows of a uint8 NumPy array, one byte per tile in row-major order (the layout
+# of TileGameState.to_bytes), and are generated a batch at a time with whole-array
+# operations. A board of optimal distance at most d comes from a random walk of d swaps
+# back from the goal; every swap flips the parity of the permutation, so the distance of
+# the board always has the parity of the walk. Boards are then kept or rejected by their
+# distance: exactly, from the table of every board's distance, on boards small enough for
+# one, or by the admissible Manhattan bound on larger boards.
+#
+# Every board is solvable (the adjacent swaps reach every permutation), so no solvability
+# filter is needed. Batches can be streamed straight into a .npy file and read back
+# memory-mapped, so the same benchmark set is reused across runs.
+
+# The largest board for which the exact distance of every board is looked up
+MAX_EXACT_DIM = 3
+
+# The distance table of every board size looked up so far, built once per process
+_distance_tables = {}
+
+
+def distance_table(dim: int) -> SharedTable:
+    """
+    Produces the table of every dim x dim board's distance, building it the first time it
+    is asked for. The table is kept for the life of the process.
+
+    Args:
+        dim (int): The dimension of the board.
+
+    Returns:
+        SharedTable: The table, as shared_tables.build_distance_table builds it.
+    """
+    table = _distance_tables.get(dim)
+    if table is None:
+        table = build_distance_table(dim)
+        _distance_tables[dim] = table
+    return table
+
+
+def random_walk_boards(dim: int, num_boards: int, walk_lengths, rng: np.random.Generator) -> np.ndarray:
+    """
+    Walks num_boards boards random swaps back from the goal at once. No swap undoes the
+    swap just before it.
+
+    Args:
+        dim (int): The dimension of the board.
+        num_boards (int): The number of boards.
+        walk_lengths (int or np.ndarray): The number of swaps of every walk, or of each.
+        rng (np.random.Generator): The random generator.
+
+    Returns:
+        np.ndarray: The boards, an array of shape (num_boards, dim * dim).
+    """
+    n = dim * dim
+    boards = np.tile(np.arange(1, n + 1, dtype=np.uint8), (num_boards, 1))
+    swaps = np.array(flat_swaps(dim), dtype=np.intp).reshape(-1, 2)
+    if len(swaps) == 0:
+        return boards
+    walk_lengths = np.broadcast_to(walk_lengths, num_boards)
+    previous = np.full(num_boards, -1)
+    for step in range(int(walk_lengths.max(initial=0))):
+        if len(swaps) > 1:
+            # Draw from every swap but the previous one
+            choice = rng.integers(0, len(swaps) - (previous >= 0), size=num_boards)
+            choice += (previous >= 0) & (choice >= previous)
+        else:
+            choice = np.zeros(num_boards, dtype=np.intp)
+        # Only the walks that are not over yet take the step
+        rows = np.flatnonzero(walk_lengths > step)
+        i, j = swaps[choice[rows], 0], swaps[choice[rows], 1]
+        tiles_i = boards[rows, i]
+        boards[rows, i] = boards[rows, j]
+        boards[rows, j] = tiles_i
+        previous = choice
+    return boards
+
+
+def board_ranks(boards: np.ndarray) -> np.ndarray:
+    """
+    Ranks boards as shared_tables.board_rank does, all at once.
+
+    Args:
+        boards (np.ndarray): The boards, an array of shape (number of boards, n).
+
+    Returns:
+        np.ndarray: The ranks, int64.
+    """
+    n = boards.shape[1]
+    ranks = np.zeros(len(boards), dtype=np.int64)
+    for i in range(n):
+        smaller = (boards[:, i + 1:] < boards[:, i:i + 1]).sum(axis=1)
+        ranks = ranks * (n - i) + smaller
+    return ranks
+
+
+def exact_distances(boards: np.ndarray, table) -> np.ndarray:
+    """
+    Looks boards up in a table from shared_tables.build_distance_table.
+
+    Args:
+        boards (np.ndarray): The boards, an array of shape (number of boards, n).
+        table (SharedTable): The distance table of boards of that size.
+
+    Returns:
+        np.ndarray: The optimal number of swaps of every board.
+    """
+    return np.frombuffer(table.values, dtype=np.uint8)[board_ranks(boards)]
+
+
+def manhattan_bounds(boards: np.ndarray) -> np.ndarray:
+    """
+    Computes admissible_heuristic (half the Manhattan distance, rounded up) of boards, a
+    lower bound on their optimal number of swaps.
+
+    Args:
+        boards (np.ndarray): The boards, an array of shape (number of boards, dim * dim).
+
+    Returns:
+        np.ndarray: The lower bounds.
+    """
+    n = boards.shape[1]
+    dim = math.isqrt(n)
+    positions = np.arange(n)
+    tiles = boards.astype(np.intp) - 1
+    distance = np.abs(tiles // dim - positions // dim) + np.abs(tiles % dim - positions % dim)
+    return (distance.sum(axis=1) + 1) // 2
+
+
+def iter_boards(dim: int, num_boards: int, min_distance: int = 0, max_distance: Optional[int] = None,
+                seed: Optional[int] = None, batch_size: int = 10000,
+                exact: Optional[bool] = None, table: Optional[SharedTable] = None) -> Iterator[np.ndarray]:
+    """
+    Generates random boards whose optimal number of swaps is between min_distance and
+    max_distance, in batches.
+
+    With max_distance, every board is a random walk of max_distance or max_distance - 1
+    swaps from the goal (half of each, so boards of both parities come up), and so is no
+    farther than max_distance; without it, boards are uniformly random. Boards nearer than
+    min_distance are then rejected. With an exact table that is exact; without one, a
+    board is only kept when its Manhattan bound is at least min_distance, which guarantees
+    the range but rejects some boards that are in it.
+
+    Args:
+        dim (int): The dimension of the board.
+        num_boards (int): The number of boards to generate.
+        min_distance (int): The least optimal number of swaps of a board.
+        max_distance (Optional[int]): The most optimal number of swaps of a board.
+        seed (Optional[int]): The random seed; the same seed gives the same boards.
+        batch_size (int): The number of boards generated at a time.
+        exact (Optional[bool]): Whether to filter by exact distances (which builds the
+            table of every board's distance). By default, only for boards up to
+            MAX_EXACT_DIM x MAX_EXACT_DIM.
+        table (Optional[SharedTable]): The distance table to filter by, if exact. The one
+            distance_table(dim) keeps if not provided.
+
+    Yields:
+        np.ndarray: Batches of at most batch_size boards, num_boards boards in all, each
+        an array of shape (batch, dim * dim) of uint8.
+    """
+    if max_distance is not None and max_distance < min_distance:
+        raise ValueError("max_distance must be at least min_distance")
+    if exact is None:
+        exact = dim <= MAX_EXACT_DIM
+    rng = np.random.default_rng(seed)
+    if not exact:
+        table = None
+    elif table is None:
+        table = distance_table(dim)
+    remaining = num_boards
+    empty_batches = 0
+    while remaining > 0:
+        if max_distance is None:
+            boards = rng.permuted(np.tile(np.arange(1, dim * dim + 1, dtype=np.uint8), (batch_size, 1)), axis=1)
+        else:
+            walk_lengths = max_distance - rng.integers(0, 2, size=batch_size) * (max_distance > min_distance)
+            boards = random_walk_boards(dim, batch_size, walk_lengths, rng)
+        if table is not None:
+            distances = exact_distances(boards, table)
+            keep = distances >= min_distance
+            if max_distance is not None:
+                keep &= distances <= max_distance
+        else:
+            keep = manhattan_bounds(boards) >= min_distance
+        boards = boards[keep][:remaining]
+        if len(boards) == 0:
+            empty_batches += 1
+            if empty_batches == 100:
+                raise ValueError(f"no {dim} x {dim} boards found between {min_distance} and {max_distance} swaps")
+            continue
+        empty_batches = 0
+        remaining -= len(boards)
+        yield boards
+
+
+def generate_boards(dim: int, num_boards: int, min_distance: int = 0, max_distance: Optional[int] = None,
+                    seed: Optional[int] = None, exact: Optional[bool] = None) -> np.ndarray:
+    """
+    Generates random boards in memory; see iter_boards.
+
+    Returns:
+        np.ndarray: The boards, an array of shape (num_boards, dim * dim) of uint8.
+    """
+    batches = list(iter_boards(dim, num_boards, min_distance, max_distance, seed, exact=exact))
+    if not batches:
+        return np.zeros((0, dim * dim), dtype=np.uint8)
+    return np.concatenate(batches)
+
+
+def save_boards(path: str, dim: int, num_boards: int, min_distance: int = 0, max_distance: Optional[int] = None,
+                seed: Optional[int] = None, batch_size: int = 10000, exact: Optional[bool] = None):
+    """
+    Generates random boards straight into a .npy file, a batch at a time, so the whole set
+    never has to fit in memory; see iter_boards.
+
+    Args:
+        path (str): The .npy file to write.
+    """
+    out = open_memmap(path, mode="w+", dtype=np.uint8, shape=(num_boards, dim * dim))
+    start = 0
+    for boards in iter_boards(dim, num_boards, min_distance, max_distance, seed, batch_size, exact):
+        out[start:start + len(boards)] = boards
+        start += len(boards)
+    out.flush()
+    del out
+
+
+def load_boards(path: str) -> np.ndarray:
+    """
+    Maps a .npy file written by save_boards without reading it into memory.
+
+    Args:
+        path (str): The .npy file.
+
+    Returns:
+        np.ndarray: The boards, a read-only memory-mapped array.
+    """
+    return np.load(path, mmap_mode="r")
+
+
+def to_states(boards: np.ndarray) -> List[TileGameState]:
+    """
+    Turns rows of boards into TileGameStates, e.g. to pass them to solve_batch.
+
+    Args:
+        boards (np.ndarray): The boards, an array of shape (number of boards, dim * dim).
+
+    Returns:
+        List[TileGameState]: The states.
+    """
+    return [TileGameState.from_bytes(board.tobytes()) for board in boards]
+
+
+def main():
+    """
+    Generates random boards in a range of difficulty and saves them to a .npy file.
+    """
+    parser = argparse.ArgumentParser(
+        description='Generate random TileGame boards of controlled difficulty.')
+    parser.add_argument('--size', type=int, default=3,
+                        help='Size of the boards (default: 3)')
+    parser.add_argument('--boards', type=int, default=1000,
+                        help='Number of boards (default: 1000)')
+    parser.add_argument('--min-distance', type=int, default=0,
+                        help='Least optimal number of swaps (default: 0)')
+    parser.add_argument('--max-distance', type=int, default=None,
+                        help='Most optimal number of swaps (default: no limit)')
+    parser.add_argument('--seed', type=int, default=2,
+                        help='Random seed (default: 2)')
+    parser.add_argument('--output', default='boards.npy',
+                        help='Where to save the boards (default: boards.npy)')
+
+    args = parser.parse_args()
+    save_boards(args.output, args.size, args.boards, args.min_distance, args.max_distance, args.seed)
+    print(f"Wrote {args.boards} boards to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
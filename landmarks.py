@@ -0,0 +1,184 @@
+import argparse
+import heapq
+import math
+import random
+from array import array
+from typing import List, Optional
+
+from directed_graphy import DirectedGraph
+from heuristic_search_problem import HeuristicSearchProblem
+from informed_search import astar
+
+# Landmark (ALT) heuristics for DirectedGraph.
+#
+# A few nodes are picked as landmarks, and the distance from every landmark to every node
+# and from every node to every landmark is computed once, by Dijkstra's algorithm forwards
+# and backwards. By the triangle inequality, for any landmark L the distance from v to a
+# goal g is at least d(L, g) - d(L, v) and at least d(v, L) - d(g, L), so the largest of
+# these bounds over the landmarks is an admissible (and consistent) heuristic. Landmarks
+# "behind" the start or "beyond" the goal make the bounds tight, so they are picked
+# farthest-first: each new landmark is the node farthest from those already picked.
+
+
+class LandmarkTable:
+    """
+    The distances between every node of a graph and a set of landmarks.
+
+    Attributes:
+        landmarks (List[int]): The landmark nodes.
+        forward (List[array]): forward[i][v] is the distance from landmarks[i] to v.
+        backward (List[array]): backward[i][v] is the distance from v to landmarks[i].
+            Unreachable nodes are at distance math.inf.
+    """
+
+    def __init__(self, graph: DirectedGraph, num_landmarks: int = 4, weighted: bool = False,
+                 first: Optional[int] = None):
+        """
+        Picks the landmarks and computes their distances.
+
+        Args:
+            graph (DirectedGraph): The graph.
+            num_landmarks (int): The number of landmarks (at most the number of nodes).
+            weighted (bool): Whether distances add up the edge costs of the matrix. By
+                default every edge counts 1, which is the cost astar and the blind
+                searches charge for a move.
+            first (Optional[int]): The node the farthest-first selection starts from (it is
+                not itself a landmark). The graph's start state if not provided.
+        """
+        n = len(graph.matrix)
+        self.outgoing = [[] for _ in range(n)]
+        self.incoming = [[] for _ in range(n)]
+        for u, row in enumerate(graph.matrix):
+            for v, cost in enumerate(row):
+                if cost is not None:
+                    cost = cost if weighted else 1
+                    self.outgoing[u].append((v, cost))
+                    self.incoming[v].append((u, cost))
+
+        self.landmarks = []
+        self.forward = []
+        self.backward = []
+        # The distance of every node to the landmarks picked so far, either way round
+        nearest = _dijkstra(self.outgoing, graph.get_start_state() if first is None else first)
+        for _ in range(min(num_landmarks, n)):
+            # Unreachable nodes count as the farthest, so landmarks cover every component
+            landmark = max((v for v in range(n) if v not in self.landmarks), key=lambda v: nearest[v])
+            self.landmarks.append(landmark)
+            self.forward.append(_dijkstra(self.outgoing, landmark))
+            self.backward.append(_dijkstra(self.incoming, landmark))
+            for v in range(n):
+                nearest[v] = min(nearest[v], self.forward[-1][v], self.backward[-1][v])
+
+    def lower_bound(self, node: int, goal: int) -> float:
+        """
+        Produces the best triangle-inequality bound on the distance from node to goal.
+
+        Args:
+            node (int): The node to measure from.
+            goal (int): The node to measure to.
+
+        Returns:
+            float: A lower bound on the distance, math.inf if goal cannot be reached.
+        """
+        bound = 0
+        for forward, backward in zip(self.forward, self.backward):
+            # d(node, goal) >= d(L, goal) - d(L, node), unless L cannot reach node
+            if forward[node] != math.inf:
+                bound = max(bound, forward[goal] - forward[node])
+            # d(node, goal) >= d(node, L) - d(goal, L), unless goal cannot reach L
+            if backward[goal] != math.inf:
+                bound = max(bound, backward[node] - backward[goal])
+        return bound
+
+
+def _dijkstra(edges: List[List[tuple]], source: int) -> array:
+    """
+    Produces the distance from source to every node over the given adjacency lists.
+    """
+    distances = array("d", [math.inf]) * len(edges)
+    distances[source] = 0
+    queue = [(0, source)]
+    while queue:
+        distance, u = heapq.heappop(queue)
+        if distance > distances[u]:
+            continue
+        for v, cost in edges[u]:
+            if distance + cost < distances[v]:
+                distances[v] = distance + cost
+                heapq.heappush(queue, (distance + cost, v))
+    return distances
+
+
+class LandmarkGraph(DirectedGraph, HeuristicSearchProblem):
+    """
+    A DirectedGraph with a landmark heuristic, so informed searches such as astar can run
+    on it. The heuristic of a node is its smallest lower bound over the goal nodes.
+    """
+
+    def __init__(self, graph: DirectedGraph, num_landmarks: int = 4, weighted: bool = False,
+                 table: Optional[LandmarkTable] = None):
+        """
+        Args:
+            graph (DirectedGraph): The graph, with its goals and start state.
+            num_landmarks (int): The number of landmarks to pick, if table is not given.
+            weighted (bool): Whether the heuristic estimates edge costs rather than moves,
+                if table is not given.
+            table (Optional[LandmarkTable]): Landmarks already computed for the same graph,
+                so searches with other start states or goals can share them.
+        """
+        super().__init__(graph.matrix, graph.goal_indices, graph.start_state)
+        self.table = table if table is not None else LandmarkTable(graph, num_landmarks, weighted)
+
+    def heuristic(self, state: int) -> float:
+        return min((self.table.lower_bound(state, goal) for goal in self.goal_indices), default=math.inf)
+
+
+def grid_graph(width: int, keep: float = 0.9, seed: Optional[int] = None) -> List[List[Optional[float]]]:
+    """
+    Builds the matrix of a random width x width grid: node r * width + c has an edge to each
+    of its four neighbours, kept with probability keep, so that some moves are one-way.
+
+    Args:
+        width (int): The number of nodes along each side.
+        keep (float): The probability that each edge is in the graph.
+        seed (Optional[int]): The random seed.
+
+    Returns:
+        List[List[Optional[float]]]: The adjacency matrix, with costs between 1 and 2.
+    """
+    rng = random.Random(seed)
+    n = width * width
+    matrix = [[None] * n for _ in range(n)]
+    for u in range(n):
+        r, c = divmod(u, width)
+        for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+            if 0 <= r + dr < width and 0 <= c + dc < width and rng.random() < keep:
+                matrix[u][(r + dr) * width + c + dc] = 1 + rng.random()
+    return matrix
+
+
+def main():
+    """
+    Compares A* with landmarks against A* without a heuristic on a random grid.
+    """
+    parser = argparse.ArgumentParser(
+        description='Run A* with landmark heuristics on a random DirectedGraph.')
+    parser.add_argument('--width', type=int, default=40,
+                        help='Number of nodes along each side of the grid (default: 40)')
+    parser.add_argument('--landmarks', type=int, default=4,
+                        help='Number of landmarks (default: 4)')
+    parser.add_argument('--seed', type=int, default=2,
+                        help='Random seed for the graph (default: 2)')
+
+    args = parser.parse_args()
+    n = args.width * args.width
+    graph = DirectedGraph(grid_graph(args.width, seed=args.seed), {n - 1}, args.width // 2)
+    blind = LandmarkGraph(graph, num_landmarks=0)
+    informed = LandmarkGraph(graph, num_landmarks=args.landmarks)
+    for name, problem in [('no landmarks', blind), (f'{args.landmarks} landmarks', informed)]:
+        path, stats = astar(problem)
+        print(f"{name}: {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+import argparse
+import heapq
+import math
+import multiprocessing
+import os
+import queue
+import time
+from typing import Dict, List, Optional, Tuple
+
+from search_problem import State
+from heuristic_search_problem import HeuristicSearchProblem
+from tile_game import HeuristicTileGame
+from heuristics import admissible_heuristic
+
+# Hash-distributed A* (HDA*).
+#
+# Every state has exactly one owner: the worker process given by a hash of the state. Only
+# the owner keeps that state's g-value and parent, and only the owner expands it. Workers
+# run A* on their own share of the space and send the successors they generate to the
+# owners in batches, through one inbox queue per worker.
+#
+# The search is over once no worker has a node left that could beat the best solution
+# found so far and no batch is still in flight. Workers and the coordinating process share
+# a counter of batches sent, a counter of batches received and an idle flag per worker, all
+# updated under one lock: a worker marks itself busy in the same step as it counts a batch
+# as received, and only goes idle after sending everything it generated. So if every worker
+# is idle and the two counters agree, no work is left anywhere.
+
+
+def partition_key(state: State) -> int:
+    """
+    Produces the number used to pick the worker that owns a state. It must be the same in
+    every process, which rules out hashes of strings (they are salted per process).
+    TileGameStates use their Zobrist hash, which is already stored on the state.
+
+    Args:
+        state (State): The state to place.
+
+    Returns:
+        int: A hash of the state.
+    """
+    zobrist = getattr(state, "zobrist", None)
+    return hash(state) if zobrist is None else zobrist
+
+
+def hda_star(problem: HeuristicSearchProblem[State], num_workers: Optional[int] = None,
+             batch_size: int = 64) -> Tuple[Optional[List[State]], Dict[str, any]]:
+    """
+    Parallel A* search, with the states hash-partitioned across worker processes.
+
+    With an admissible heuristic the path found is optimal, like astar's (though it may be a
+    different path of the same length).
+
+    Args:
+        problem (HeuristicSearchProblem[State]): The problem to solve.
+        num_workers (Optional[int]): The number of worker processes. One per CPU by default.
+        batch_size (int): The number of generated nodes buffered for another worker before
+            they are sent, and the number of expansions between flushes of those buffers.
+
+    Returns:
+        Tuple[Optional[List[State]], Dict[str, any]]:
+            - A list of states representing the solution path, or None if no solution was found.
+            - A dictionary of search statistics, as in astar ('path_length', 'states_expanded',
+              'total_cost', 'max_frontier_size') plus 'workers', a list with the
+              'states_expanded', 'max_frontier_size' and 'nodes_received' of each worker.
+              max_frontier_size is the sum of the workers' largest open lists.
+    """
+    num_workers = num_workers or os.cpu_count() or 1
+    context = multiprocessing.get_context()
+    lock = context.Lock()
+    control = {
+        "lock": lock,
+        "sent": context.Value("q", 0, lock=False),
+        "received": context.Value("q", 0, lock=False),
+        "idle": context.Array("b", num_workers, lock=False),
+        "incumbent": context.Value("d", math.inf, lock=False),
+    }
+    inboxes = [context.Queue() for _ in range(num_workers)]
+    results = context.Queue()
+    workers = [context.Process(target=_worker, args=(problem, i, inboxes, results, control, batch_size),
+                               daemon=True)
+               for i in range(num_workers)]
+    for worker in workers:
+        worker.start()
+
+    try:
+        start_state = problem.get_start_state()
+        with lock:
+            control["sent"].value += 1
+        inboxes[partition_key(start_state) % num_workers].put(("nodes", [(start_state, 0, None)]))
+
+        # Wait until every worker is idle with nothing in flight
+        while True:
+            with lock:
+                if all(control["idle"]) and control["sent"].value == control["received"].value:
+                    break
+            _check_workers(workers)
+            time.sleep(0.001)
+
+        for inbox in inboxes:
+            inbox.put(("report",))
+        reports = sorted(_get_result(results, workers) for _ in range(num_workers))
+        worker_stats = [report[1] for report in reports]
+        goals = [report[2] for report in reports if report[2] is not None]
+
+        stats = {
+            "path_length": 0,
+            "states_expanded": sum(w["states_expanded"] for w in worker_stats),
+            "total_cost": 0,
+            "max_frontier_size": sum(w["max_frontier_size"] for w in worker_stats),
+            "workers": worker_stats,
+        }
+        if not goals:
+            return None, stats
+
+        # Walk the parent pointers back, asking each state's owner for its parent
+        _, goal_state = min(goals)
+        path = [goal_state]
+        while True:
+            inboxes[partition_key(path[-1]) % num_workers].put(("trace", path[-1]))
+            parent = _get_result(results, workers)
+            if parent is None:
+                break
+            path.append(parent)
+        path.reverse()
+        stats["path_length"] = len(path)
+        stats["total_cost"] = len(path) - 1
+        return path, stats
+    finally:
+        for inbox in inboxes:
+            inbox.put(("stop",))
+        for worker in workers:
+            worker.join(timeout=1)
+            if worker.is_alive():
+                worker.terminate()
+
+
+def _check_workers(workers: List[multiprocessing.Process]):
+    """
+    Raises if any worker has exited, which (before it is told to stop) means it crashed,
+    e.g. with an exception from the heuristic. Its traceback is printed by the worker.
+    """
+    for i, worker in enumerate(workers):
+        if not worker.is_alive():
+            raise RuntimeError(f"HDA* worker {i} exited unexpectedly with exit code {worker.exitcode}")
+
+
+def _get_result(results, workers: List[multiprocessing.Process]):
+    """
+    Waits for the next result from the workers, raising if one of them has crashed.
+    """
+    while True:
+        try:
+            return results.get(timeout=0.1)
+        except queue.Empty:
+            _check_workers(workers)
+
+
+def _worker(problem: HeuristicSearchProblem[State], index: int, inboxes, results, control, batch_size: int):
+    """
+    Runs A* over the states owned by one worker, until told to stop.
+    """
+    num_workers = len(inboxes)
+    inbox = inboxes[index]
+    lock = control["lock"]
+    incumbent = control["incumbent"]
+    open_list = []
+    g_table = {}  # maps a state to (g, parent)
+    outboxes = [[] for _ in range(num_workers)]
+    best_goal = None
+    stats = {"states_expanded": 0, "max_frontier_size": 0, "nodes_received": 0}
+
+    def insert(state, g, parent):
+        known = g_table.get(state)
+        if known is not None and known[0] <= g:
+            return
+        g_table[state] = (g, parent)
+        f = g + problem.heuristic(state)
+        if f < incumbent.value:
+            heapq.heappush(open_list, (f, state, g))
+
+    def flush(owner):
+        if outboxes[owner]:
+            with lock:
+                control["sent"].value += 1
+            inboxes[owner].put(("nodes", outboxes[owner]))
+            outboxes[owner] = []
+
+    def handle(message) -> bool:
+        kind = message[0]
+        if kind == "nodes":
+            with lock:
+                control["idle"][index] = 0
+                control["received"].value += 1
+            stats["nodes_received"] += len(message[1])
+            for state, g, parent in message[1]:
+                insert(state, g, parent)
+        elif kind == "trace":
+            results.put(g_table[message[1]][1])
+        elif kind == "report":
+            results.put((index, stats, best_goal))
+        elif kind == "stop":
+            return False
+        return True
+
+    while True:
+        # Take in everything that has arrived, without waiting
+        try:
+            while True:
+                if not handle(inbox.get_nowait()):
+                    return
+        except queue.Empty:
+            pass
+
+        if open_list and open_list[0][0] < incumbent.value:
+            for _ in range(batch_size):
+                if not open_list or open_list[0][0] >= incumbent.value:
+                    break
+                _, state, g = heapq.heappop(open_list)
+                if g > g_table[state][0]:
+                    continue  # a shorter way here was found after this entry was queued
+                if problem.is_goal_state(state):
+                    with lock:
+                        if g < incumbent.value:
+                            incumbent.value = g
+                            best_goal = (g, state)
+                    continue
+                stats["states_expanded"] += 1
+                for child in problem.get_successors(state):
+                    owner = partition_key(child) % num_workers
+                    if owner == index:
+                        insert(child, g + 1, state)
+                    else:
+                        outboxes[owner].append((child, g + 1, state))
+                        if len(outboxes[owner]) >= batch_size:
+                            flush(owner)
+                stats["max_frontier_size"] = max(stats["max_frontier_size"], len(open_list))
+            for owner in range(num_workers):
+                flush(owner)
+            continue
+
+        # Nothing worth expanding: send what is buffered, go idle and wait for work
+        for owner in range(num_workers):
+            flush(owner)
+        with lock:
+            control["idle"][index] = 1
+        if not handle(inbox.get()):
+            return
+
+
+def main():
+    """
+    Runs HDA* on a random TileGame with the admissible heuristic and prints the results.
+    """
+    parser = argparse.ArgumentParser(
+        description='Run hash-distributed A* on a TileGame problem.')
+    parser.add_argument('--size', type=int, default=3,
+                        help='Size of the TileGame (default: 3)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of worker processes (default: one per CPU)')
+
+    args = parser.parse_args()
+    tile_game = HeuristicTileGame(args.size, admissible_heuristic)
+    path, stats = hda_star(tile_game, num_workers=args.workers)
+    tile_game.print_pretty_path(path)
+    print("stats:", stats)
+
+
+if __name__ == "__main__":
+    main()
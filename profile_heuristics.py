@@ -0,0 +1,271 @@
+import argparse
+import json
+import math
+import random
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+import bfs_and_dfs
+from tile_game import HeuristicTileGame, TileGame, TileGameState
+from informed_search import astar_steps
+from heuristics import admissible_heuristic, inadmissible_heuristic, my_heuristic
+from symmetry import SymmetricDistanceHeuristic
+
+# Profiles the heuristics of heuristics.py by what they cost and what they buy.
+#
+# A more informed heuristic expands fewer states but may cost more per evaluation, so the
+# heuristic that expands the least is not always the one that solves fastest. For every
+# heuristic and board size this measures both sides: the time per evaluation, and the
+# expansions, effective branching factor and wall-clock time of A* with it. On boards small
+# enough for an exact distance table (3 x 3 and below) it also measures how far the
+# heuristic is from the true distance, and on every size it counts the edges along which
+# it is inconsistent, that is changes by more than the cost of the move. Every solve is
+# capped at a number of expansions, since the weaker heuristics can take very long on
+# 4 x 4 boards; boards not solved within it are counted and left out of the averages.
+
+HEURISTICS = {
+    'admissible': admissible_heuristic,
+    'inadmissible': inadmissible_heuristic,
+    'my_heuristic': my_heuristic,
+}
+
+# The largest board for which the exact distance of every board is computed
+MAX_EXACT_DIM = 3
+
+# The most states A* may expand on one board before the board is given up on
+MAX_EXPANSIONS = 200000
+
+
+def effective_branching_factor(states_expanded: int, depth: int) -> Optional[float]:
+    """
+    Produces the branching factor b* of the uniform tree of the given depth that has as many
+    nodes as the search expanded, that is the b* for which
+    1 + b* + b*^2 + ... + b*^depth = states_expanded + 1.
+
+    Args:
+        states_expanded (int): The number of states the search expanded.
+        depth (int): The number of moves of the solution found.
+
+    Returns:
+        Optional[float]: The effective branching factor, or None if depth is 0.
+    """
+    if depth == 0:
+        return None
+    target = states_expanded + 1
+
+    def tree_size(b):
+        return sum(b ** i for i in range(depth + 1))
+
+    low, high = 0.0, max(1.0, float(states_expanded))
+    for _ in range(100):
+        mid = (low + high) / 2
+        if tree_size(mid) < target:
+            low = mid
+        else:
+            high = mid
+    return (low + high) / 2
+
+
+def time_per_evaluation(heuristic: Callable[[TileGameState], float], states: List[TileGameState],
+                        repeats: int = 5) -> float:
+    """
+    Times a heuristic on a list of states.
+
+    Args:
+        heuristic (Callable[[TileGameState], float]): The heuristic to time.
+        states (List[TileGameState]): The states to evaluate it on.
+        repeats (int): How many times to evaluate every state; the fastest run is kept.
+
+    Returns:
+        float: Nanoseconds per evaluation.
+    """
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        for state in states:
+            heuristic(state)
+        elapsed = time.perf_counter_ns() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(states)
+
+
+def _mean(values: List[float]) -> Optional[float]:
+    return sum(values) / len(values) if values else None
+
+
+def profile_heuristic(heuristic: Callable[[TileGameState], float], boards: List[TileGameState],
+                      exact: Optional[Callable[[TileGameState], float]] = None,
+                      max_expansions: Optional[int] = MAX_EXPANSIONS) -> Dict[str, any]:
+    """
+    Profiles one heuristic on boards of one size.
+
+    Every board is solved with A*, giving up after max_expansions expansions. The states on
+    the solutions found (and the start boards of those not solved), together with all their
+    successors, are then used to time the heuristic, to check it for consistency along
+    every edge between them and, if exact is given, to measure its error.
+
+    Args:
+        heuristic (Callable[[TileGameState], float]): The heuristic to profile.
+        boards (List[TileGameState]): The start boards, all of the same size.
+        exact (Optional[Callable[[TileGameState], float]]): The true distance of a board
+            to the goal, e.g. a SymmetricDistanceHeuristic.
+        max_expansions (Optional[int]): The most states A* may expand on one board.
+            Unlimited if None.
+
+    Returns:
+        Dict[str, any]: The number of boards 'unsolved' within max_expansions, the averages
+        over the solved boards of 'states_expanded', 'path_length', 'seconds_per_solve' and
+        'effective_branching_factor', the 'ns_per_eval', the
+        'consistency_violations' among the 'edges_checked' and, if exact is given, the
+        'mean_error' and 'mean_abs_error' of the heuristic, its 'max_overestimate', the
+        fraction of states it overestimates ('overestimate_rate') and the mean
+        'suboptimality' of the solutions (their cost over the optimal cost).
+    """
+    dim = len(boards[0].board)
+    expanded, lengths, seconds, branching, suboptimality = [], [], [], [], []
+    path_states = []
+    unsolved = 0
+    give_up = None
+    if max_expansions is not None:
+        give_up = lambda search: search.stats['states_expanded'] >= max_expansions
+    for board in boards:
+        game = HeuristicTileGame(dim, heuristic, start_state=board)
+        start = time.perf_counter()
+        path, stats = bfs_and_dfs.run_steps(astar_steps(game, on_expand=give_up))
+        if path is None:
+            unsolved += 1
+            path_states.append(board)
+            continue
+        seconds.append(time.perf_counter() - start)
+        expanded.append(stats['states_expanded'])
+        lengths.append(stats['path_length'])
+        b = effective_branching_factor(stats['states_expanded'], len(path) - 1)
+        if b is not None:
+            branching.append(b)
+        if exact is not None and exact(board) > 0:
+            suboptimality.append((len(path) - 1) / exact(board))
+        path_states.extend(path)
+
+    # Every state on a solution and every edge out of it
+    game = TileGame(dim, start=boards[0])
+    edges = {state: game.get_successors(state) for state in path_states}
+    states = list(set(edges).union(*edges.values()))
+    values = {state: heuristic(state) for state in states}
+    violations = 0
+    edges_checked = 0
+    for state, successors in edges.items():
+        for successor in successors:
+            edges_checked += 1
+            # Every move costs 1 and can be undone, so a consistent heuristic changes by at
+            # most 1 along an edge
+            if abs(values[state] - values[successor]) > 1:
+                violations += 1
+
+    profile = {
+        'boards': len(boards),
+        'unsolved': unsolved,
+        'ns_per_eval': time_per_evaluation(heuristic, states),
+        'states_expanded': _mean(expanded),
+        'path_length': _mean(lengths),
+        'seconds_per_solve': _mean(seconds),
+        'effective_branching_factor': _mean(branching),
+        'consistency_violations': violations,
+        'edges_checked': edges_checked,
+    }
+    if exact is not None:
+        errors = [values[state] - exact(state) for state in states]
+        profile.update({
+            'mean_error': _mean(errors),
+            'mean_abs_error': _mean([abs(error) for error in errors]),
+            'max_overestimate': max(0, max(errors)),
+            'overestimate_rate': sum(error > 0 for error in errors) / len(errors),
+            'suboptimality': _mean(suboptimality),
+        })
+    return profile
+
+
+def profile_heuristics(heuristics: Dict[str, Callable[[TileGameState], float]] = HEURISTICS,
+                       sizes: Iterable[int] = (2, 3), num_boards: int = 20,
+                       seed: int = 2, max_expansions: Optional[int] = MAX_EXPANSIONS) -> List[Dict[str, any]]:
+    """
+    Profiles every heuristic on every board size. All heuristics see the same boards.
+
+    Args:
+        heuristics (Dict[str, Callable[[TileGameState], float]]): The heuristics by name.
+        sizes (Iterable[int]): The board sizes to profile.
+        num_boards (int): The number of random boards of each size.
+        seed (int): The random seed the boards are drawn with.
+        max_expansions (Optional[int]): The most states A* may expand on one board.
+
+    Returns:
+        List[Dict[str, any]]: One profile_heuristic result per heuristic and size, with its
+        'heuristic' and 'size' added.
+    """
+    random.seed(seed)
+    report = []
+    for size in sizes:
+        boards = [TileGame.random_start(size) for _ in range(num_boards)]
+        exact = SymmetricDistanceHeuristic(size) if size <= MAX_EXACT_DIM else None
+        for name, heuristic in heuristics.items():
+            profile = {'heuristic': name, 'size': size}
+            profile.update(profile_heuristic(heuristic, boards, exact, max_expansions))
+            report.append(profile)
+    return report
+
+
+def format_report(report: List[Dict[str, any]]) -> str:
+    """
+    Lays a report out as a table, within each size the heuristic that solved the most
+    boards first, and the fastest first among those.
+
+    Args:
+        report (List[Dict[str, any]]): A report from profile_heuristics.
+
+    Returns:
+        str: The table.
+    """
+    columns = [('heuristic', 'heuristic', '{}'), ('size', 'size', '{}'), ('ns/eval', 'ns_per_eval', '{:.0f}'),
+               ('expanded', 'states_expanded', '{:.1f}'), ('b*', 'effective_branching_factor', '{:.3f}'),
+               ('s/solve', 'seconds_per_solve', '{:.4f}'), ('length', 'path_length', '{:.2f}'),
+               ('subopt', 'suboptimality', '{:.3f}'), ('|error|', 'mean_abs_error', '{:.2f}'),
+               ('overest', 'overestimate_rate', '{:.2f}'), ('inconsistent', 'consistency_violations', '{}'),
+               ('unsolved', 'unsolved', '{}')]
+    rows = [[title for title, _, _ in columns]]
+    for profile in sorted(report, key=lambda p: (p['size'], p['unsolved'],
+                                                  p['seconds_per_solve'] if p['seconds_per_solve'] is not None else math.inf)):
+        rows.append([fmt.format(profile[key]) if profile.get(key) is not None else '-'
+                     for _, key, fmt in columns])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    return '\n'.join('  '.join(cell.rjust(width) for cell, width in zip(row, widths)) for row in rows)
+
+
+def main():
+    """
+    Profiles the heuristics of heuristics.py, prints a table and writes a JSON report.
+    """
+    parser = argparse.ArgumentParser(
+        description='Profile the cost and quality of the TileGame heuristics.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[2, 3],
+                        help='Board sizes to profile (default: 2 3)')
+    parser.add_argument('--boards', type=int, default=20,
+                        help='Number of random boards per size (default: 20)')
+    parser.add_argument('--heuristics', nargs='+', choices=list(HEURISTICS), default=list(HEURISTICS),
+                        help='Heuristics to profile (default: all)')
+    parser.add_argument('--seed', type=int, default=2,
+                        help='Random seed for the boards (default: 2)')
+    parser.add_argument('--max-expansions', type=int, default=MAX_EXPANSIONS,
+                        help=f'Most states expanded per board before giving up on it (default: {MAX_EXPANSIONS})')
+    parser.add_argument('--output', default='heuristic_profile.json',
+                        help='Where to write the JSON report (default: heuristic_profile.json)')
+
+    args = parser.parse_args()
+    heuristics = {name: HEURISTICS[name] for name in args.heuristics}
+    report = profile_heuristics(heuristics, args.sizes, args.boards, args.seed, args.max_expansions)
+    print(format_report(report))
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+import math
+import mmap
+import os
+import struct
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from tile_game import TileGame, TileGameState, flat_swaps
+
+# Compact binary files for experiment results, written by appending and read in place.
+#
+# A solutions file stores a solution as its start board (one byte per tile, as
+# TileGameState.to_bytes packs it) followed by a little-endian uint16 move count and one
+# byte per move, the index of the swap in TileGame.swaps. A 12-move 3 x 3 solution takes
+# 23 bytes, against kilobytes for a pickled list of states. A count of NO_SOLUTION marks a
+# board with no solution. The file starts with an 8-byte header: SOLUTIONS_MAGIC, a
+# version byte and the board dimension.
+#
+# A stats file stores one STATS_DTYPE row per run after the 8-byte STATS_MAGIC header,
+# so the whole file maps straight onto a structured NumPy array.
+#
+# Both writers buffer what they append and only ever add to the end of a file, so a file
+# can be extended by later runs, and both readers hand out memoryviews and NumPy arrays of
+# the mapped file instead of copies. A run killed while flushing can leave a partial record
+# at the end of a file; readers leave it out, and writers cut it off before appending.
+
+SOLUTIONS_MAGIC = b"TGSOL\x00"
+SOLUTIONS_VERSION = 1
+STATS_MAGIC = b"TGSTATS\x01"
+NO_SOLUTION = 0xFFFF
+
+STATS_DTYPE = np.dtype([
+    ("path_length", "<u4"),
+    ("states_expanded", "<u8"),
+    ("total_cost", "<u4"),
+    ("max_frontier_size", "<u8"),
+    ("seconds", "<f8"),
+])
+
+_swap_indices = {}
+
+
+def _swap_index(dim: int) -> Dict[Tuple[int, int], int]:
+    """
+    Maps the flat position pairs of the swaps of a dim x dim board to their indices.
+    """
+    indices = _swap_indices.get(dim)
+    if indices is None:
+        indices = {pair: index for index, pair in enumerate(flat_swaps(dim))}
+        _swap_indices[dim] = indices
+    return indices
+
+
+def _record_offsets(data, dim: int, start: int) -> Tuple[array, int]:
+    """
+    Finds the offset of every whole record of a solutions file by hopping from one
+    record's count to the next.
+
+    Args:
+        data: The contents of the file.
+        dim (int): The dimension of the boards.
+        start (int): The offset of the first record, just past the header.
+
+    Returns:
+        Tuple[array, int]: The offsets, and where the last whole record ends (the length
+        of the file, unless it ends with a partial record).
+    """
+    n = dim * dim
+    offsets = array("Q")
+    offset = start
+    while offset + n + 2 <= len(data):
+        count = int.from_bytes(data[offset + n:offset + n + 2], "little")
+        end = offset + n + 2 + (0 if count == NO_SOLUTION else count)
+        if end > len(data):
+            break
+        offsets.append(offset)
+        offset = end
+    return offsets, offset
+
+
+def encode_moves(path: Optional[List[TileGameState]]) -> Optional[bytes]:
+    """
+    Packs a path into the indices (in TileGame.swaps) of the swaps it takes, one byte each.
+
+    Args:
+        path (Optional[List[TileGameState]]): A path of states, each one swap from the last.
+
+    Returns:
+        Optional[bytes]: The swap indices, or None if path is None.
+    """
+    if path is None:
+        return None
+    dim = len(path[0].board)
+    indices = _swap_index(dim)
+    moves = bytearray()
+    previous = path[0].to_bytes()
+    for state in path[1:]:
+        tiles = state.to_bytes()
+        changed = tuple(p for p in range(dim * dim) if tiles[p] != previous[p])
+        if changed not in indices:
+            raise ValueError(f"{state} is not one swap away from the state before it")
+        moves.append(indices[changed])
+        previous = tiles
+    return bytes(moves)
+
+
+def decode_moves(start_state: TileGameState, moves: Optional[bytes]) -> Optional[List[TileGameState]]:
+    """
+    Replays swap indices from a start state.
+
+    Args:
+        start_state (TileGameState): The first state of the path.
+        moves (Optional[bytes]): The swap indices, e.g. from encode_moves.
+
+    Returns:
+        Optional[List[TileGameState]]: The path, or None if moves is None.
+    """
+    if moves is None:
+        return None
+    game = TileGame(len(start_state.board), start=start_state)
+    path = [start_state]
+    for index in moves:
+        path.append(game.apply_swap(path[-1], index))
+    return path
+
+
+class SolutionWriter:
+    """
+    Appends solutions to a solutions file.
+    """
+
+    def __init__(self, path: str, dim: int, buffer_size: int = 1 << 20):
+        """
+        Opens a solutions file for appending, creating it if needed.
+
+        Args:
+            path (str): The solutions file.
+            dim (int): The dimension of the boards. An existing file must hold boards of
+                the same dimension.
+            buffer_size (int): The number of bytes buffered before they are written.
+        """
+        if len(flat_swaps(dim)) > 256:
+            raise ValueError(f"swaps of a {dim} x {dim} board do not fit in a byte")
+        self.dim = dim
+        header = SOLUTIONS_MAGIC + bytes([SOLUTIONS_VERSION, dim])
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists:
+            with open(path, "rb+") as f:
+                if f.read(len(header)) != header:
+                    raise ValueError(f"{path} is not a version {SOLUTIONS_VERSION} solutions file of {dim} x {dim} boards")
+                # Cut off a partial record left by a run killed mid-write, so new records
+                # start on a record boundary
+                if os.path.getsize(path) > len(header):
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        _, end = _record_offsets(mm, dim, len(header))
+                        size = len(mm)
+                    if end < size:
+                        f.truncate(end)
+        self.file = open(path, "ab", buffering=buffer_size)
+        if not exists:
+            self.file.write(header)
+
+    def append(self, start_state: TileGameState, moves: Optional[bytes]):
+        """
+        Appends one solution.
+
+        Args:
+            start_state (TileGameState): The board that was solved.
+            moves (Optional[bytes]): Its solution as swap indices (see encode_moves), or
+                None if it has none.
+        """
+        if len(start_state.board) != self.dim:
+            raise ValueError(f"every board must be {self.dim} x {self.dim}, got {start_state}")
+        if moves is not None and len(moves) >= NO_SOLUTION:
+            raise ValueError("solutions are limited to 65534 moves")
+        self.file.write(start_state.to_bytes())
+        self.file.write(struct.pack("<H", NO_SOLUTION if moves is None else len(moves)))
+        if moves:
+            self.file.write(moves)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self) -> "SolutionWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SolutionReader:
+    """
+    Reads a solutions file in place.
+
+    Attributes:
+        dim (int): The dimension of the boards.
+        partial_bytes (int): The length of the partial record the file ends with, left
+            out of the records, or 0.
+    """
+
+    def __init__(self, path: str):
+        """
+        Maps a solutions file and indexes its records.
+
+        Args:
+            path (str): The solutions file.
+        """
+        with open(path, "rb") as f:
+            header = f.read(len(SOLUTIONS_MAGIC) + 2)
+            if len(header) < len(SOLUTIONS_MAGIC) + 2 or header[:len(SOLUTIONS_MAGIC)] != SOLUTIONS_MAGIC \
+                    or header[-2] != SOLUTIONS_VERSION:
+                raise ValueError(f"{path} is not a version {SOLUTIONS_VERSION} solutions file")
+            self.dim = header[-1]
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.data = memoryview(self.mm)
+        self.offsets, end = _record_offsets(self.data, self.dim, len(header))
+        self.partial_bytes = len(self.data) - end
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __getitem__(self, index: int) -> Tuple[memoryview, Optional[memoryview]]:
+        """
+        Produces a record without copying it.
+
+        Args:
+            index (int): The position of the record in the file.
+
+        Returns:
+            Tuple[memoryview, Optional[memoryview]]: The start board and the swap indices
+            (None if the board has no solution), both views of the mapped file.
+        """
+        offset = self.offsets[index]
+        n = self.dim * self.dim
+        count = int.from_bytes(self.data[offset + n:offset + n + 2], "little")
+        start = self.data[offset:offset + n]
+        if count == NO_SOLUTION:
+            return start, None
+        return start, self.data[offset + n + 2:offset + n + 2 + count]
+
+    def moves_array(self, index: int) -> Optional[np.ndarray]:
+        """
+        Produces the swap indices of a record as a read-only uint8 array over the file.
+        """
+        _, moves = self[index]
+        return None if moves is None else np.frombuffer(moves, dtype=np.uint8)
+
+    def path(self, index: int) -> Optional[List[TileGameState]]:
+        """
+        Rebuilds the path of states of a record.
+        """
+        start, moves = self[index]
+        return decode_moves(TileGameState.from_bytes(bytes(start)), moves)
+
+    def close(self):
+        """
+        Unmaps the file. Views handed out by the reader must be released first.
+        """
+        self.data.release()
+        self.mm.close()
+
+    def __enter__(self) -> "SolutionReader":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class StatsWriter:
+    """
+    Appends stats rows to a stats file, a buffer of rows at a time.
+    """
+
+    def __init__(self, path: str, buffer_rows: int = 4096):
+        """
+        Opens a stats file for appending, creating it if needed.
+
+        Args:
+            path (str): The stats file.
+            buffer_rows (int): The number of rows buffered before they are written.
+        """
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists:
+            with open(path, "rb+") as f:
+                if f.read(len(STATS_MAGIC)) != STATS_MAGIC:
+                    raise ValueError(f"{path} is not a stats file")
+                # Cut off a partial row left by a run killed mid-flush
+                partial = (os.path.getsize(path) - len(STATS_MAGIC)) % STATS_DTYPE.itemsize
+                if partial:
+                    f.truncate(os.path.getsize(path) - partial)
+        self.file = open(path, "ab")
+        if not exists:
+            self.file.write(STATS_MAGIC)
+        self.buffer = np.zeros(buffer_rows, dtype=STATS_DTYPE)
+        self.count = 0
+
+    def append(self, stats: Dict[str, any], seconds: float = math.nan):
+        """
+        Appends one run's stats.
+
+        Args:
+            stats (Dict[str, any]): The stats dictionary of an engine; keys outside
+                STATS_DTYPE are left out.
+            seconds (float): How long the run took, if known.
+        """
+        row = self.buffer[self.count]
+        for key in STATS_DTYPE.names:
+            if key != "seconds":
+                row[key] = stats[key]
+        row["seconds"] = seconds
+        self.count += 1
+        if self.count == len(self.buffer):
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered rows to the file.
+        """
+        self.file.write(self.buffer[:self.count].tobytes())
+        self.file.flush()
+        self.count = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self) -> "StatsWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_stats(path: str) -> np.ndarray:
+    """
+    Maps a stats file as a structured array without reading it into memory, e.g.
+    read_stats(path)["states_expanded"].mean(). A partial row at the end of the file is
+    left out.
+
+    Args:
+        path (str): The stats file.
+
+    Returns:
+        np.ndarray: The rows, of STATS_DTYPE, read-only.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(STATS_MAGIC)) != STATS_MAGIC:
+            raise ValueError(f"{path} is not a stats file")
+    rows = (os.path.getsize(path) - len(STATS_MAGIC)) // STATS_DTYPE.itemsize
+    if rows == 0:
+        return np.zeros(0, dtype=STATS_DTYPE)
+    return np.memmap(path, dtype=STATS_DTYPE, mode="r", offset=len(STATS_MAGIC), shape=(rows,))
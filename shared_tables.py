@@ -0,0 +1,244 @@
+import math
+import mmap
+import os
+import tempfile
+import weakref
+from array import array
+from typing import Optional
+
+from tile_game import MutableTileBoard, TileGameState
+from tile_kernels import successors
+
+# Heuristic lookup tables shared between processes.
+#
+# A SharedTable is built once, by the process that creates it, into a memory-mapped file
+# (under /dev/shm when it exists, so it never touches a disk). It pickles down to just the
+# path of that file. Worker processes that receive one (as part of a HeuristicTileGame, for
+# example) map the same file read-only and use the table in place, so the operating system
+# keeps a single copy no matter how many workers there are.
+
+SHARED_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+class SharedTable:
+    """
+    A flat array of numbers stored in a memory-mapped file.
+
+    Attributes:
+        path (str): The path of the file holding the table.
+        typecode (str): The array module typecode of the values (e.g. 'B' for unsigned bytes).
+        values (memoryview): The table itself, a zero-copy view of the mapped file.
+    """
+
+    def __init__(self, path: str, typecode: str, owner: bool = False):
+        """
+        Maps an existing table file. Use SharedTable.create to make a new one.
+
+        Args:
+            path (str): The path of the file holding the table.
+            typecode (str): The array module typecode of the values.
+            owner (bool): Whether this process created the table, which makes the mapping
+                writable and makes this process responsible for unlinking the file.
+        """
+        self.path = path
+        self.typecode = typecode
+        self.owner = owner
+        itemsize = array(typecode).itemsize
+        self.length = os.path.getsize(path) // itemsize
+        with open(path, "r+b" if owner else "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE if owner else mmap.ACCESS_READ)
+        self.values = memoryview(self.mm).cast(typecode)
+        if owner:
+            # The file lives in RAM under /dev/shm, so make sure it goes away with its owner
+            # even if the table is never closed
+            self._finalizer = weakref.finalize(self, _remove_table_file, path, os.getpid())
+
+    @staticmethod
+    def create(typecode: str, length: int, fill: int = 0, path: Optional[str] = None) -> "SharedTable":
+        """
+        Allocates a new table file and maps it.
+
+        Args:
+            typecode (str): The array module typecode of the values.
+            length (int): The number of values in the table (at least 1).
+            fill (int): The value every entry starts at.
+            path (Optional[str]): Where to keep the table. A new temporary file is used if
+                not provided. Giving a path lets a finished table be reopened later.
+
+        Returns:
+            SharedTable: The new table, owned by this process.
+        """
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="heuristic_table_", suffix=".bin", dir=SHARED_DIR)
+            os.close(fd)
+        with open(path, "wb") as f:
+            f.truncate(length * array(typecode).itemsize)
+        table = SharedTable(path, typecode, owner=True)
+        if fill:
+            table.values[:] = array(typecode, [fill]) * length
+        return table
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index: int):
+        return self.values[index]
+
+    def __getstate__(self):
+        # Only the path travels between processes, never the table itself
+        return {"path": self.path, "typecode": self.typecode}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"], state["typecode"])
+
+    def __enter__(self) -> "SharedTable":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        if self.owner:
+            self.unlink()
+
+    def close(self):
+        """
+        Unmaps the table from this process.
+        """
+        self.values.release()
+        self.mm.close()
+
+    def unlink(self):
+        """
+        Deletes the table file. Workers that already mapped it keep their mapping, but no
+        new process can attach afterwards. The owner's file is also deleted automatically
+        once the owner's table is garbage collected or the interpreter exits.
+        """
+        if self.owner:
+            self._finalizer()
+        else:
+            os.remove(self.path)
+
+
+def _remove_table_file(path: str, owner_pid: int):
+    """
+    Deletes a table file, unless called in a forked child of the owner (which inherits the
+    owner's finalizers but must not delete the table its parent is still using).
+    """
+    if os.getpid() == owner_pid:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def board_rank(tiles: bytes) -> int:
+    """
+    Produces the position of a flat board (a permutation of 1..n) in lexicographic order,
+    which is its index into tables with one entry per board.
+
+    Args:
+        tiles (bytes): The board, one byte per tile in row-major order.
+
+    Returns:
+        int: A rank between 0 and n! - 1.
+    """
+    n = len(tiles)
+    rank = 0
+    for i in range(n):
+        tile = tiles[i]
+        smaller = 0
+        for j in range(i + 1, n):
+            if tiles[j] < tile:
+                smaller += 1
+        rank = rank * (n - i) + smaller
+    return rank
+
+
+def build_distance_table(dim: int) -> SharedTable:
+    """
+    Computes the exact number of swaps from every dim x dim board to the row-major goal,
+    by breadth-first search backwards from the goal, and stores them in shared memory
+    indexed by board_rank. This is only practical for small boards (3 x 3 has 9! entries).
+
+    Args:
+        dim (int): The dimension of the board.
+
+    Returns:
+        SharedTable: An unsigned byte table of n! distances, owned by this process.
+    """
+    goal = bytes(range(1, dim * dim + 1))
+    distances = {goal: 0}
+    layer = [goal]
+    depth = 0
+    while layer:
+        depth += 1
+        next_layer = []
+        for board in layer:
+            for child in successors(board):
+                if child not in distances:
+                    distances[child] = depth
+                    next_layer.append(child)
+        layer = next_layer
+
+    table = SharedTable.create("B", math.factorial(dim * dim))
+    for board, distance in distances.items():
+        table.values[board_rank(board)] = distance
+    return table
+
+
+def build_manhattan_table(dim: int) -> SharedTable:
+    """
+    Computes the Manhattan distance from every position to every tile's goal position,
+    indexed by (tile - 1) * dim * dim + position.
+
+    Args:
+        dim (int): The dimension of the board.
+
+    Returns:
+        SharedTable: An unsigned byte table of (dim * dim) ** 2 distances, owned by this process.
+    """
+    n = dim * dim
+    table = SharedTable.create("B", n * n)
+    for tile in range(n):
+        for position in range(n):
+            table.values[tile * n + position] = (abs(tile // dim - position // dim)
+                                                 + abs(tile % dim - position % dim))
+    return table
+
+
+class ExactDistanceHeuristic:
+    """
+    The perfect heuristic: looks a board up in a table built by build_distance_table.
+    """
+
+    def __init__(self, table: SharedTable):
+        self.table = table
+
+    def __call__(self, state: TileGameState) -> float:
+        return self.table.values[board_rank(state.to_bytes())]
+
+    def board_heuristic(self, board: MutableTileBoard) -> float:
+        return self.table.values[board_rank(bytes(board.tiles))]
+
+
+class ManhattanTableHeuristic:
+    """
+    The sum of every tile's Manhattan distance to its goal, read from a table built by
+    build_manhattan_table and multiplied by scale. A scale of 0.5 gives
+    admissible_heuristic and a scale of 1 gives inadmissible_heuristic.
+    """
+
+    def __init__(self, table: SharedTable, scale: float = 0.5):
+        self.table = table
+        self.scale = scale
+
+    def __call__(self, state: TileGameState) -> float:
+        values = self.table.values
+        n = len(state.board) ** 2
+        total_distance = 0
+        for position, tile in enumerate(state.to_bytes()):
+            total_distance += values[(tile - 1) * n + position]
+        return total_distance * self.scale
+
+    def board_heuristic(self, board: MutableTileBoard) -> float:
+        # The board keeps the same sum up to date as it is changed
+        return board.manhattan * self.scale
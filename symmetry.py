@@ -0,0 +1,203 @@
+import bisect
+from array import array
+from operator import itemgetter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from tile_game import HeuristicTileGame, TileGame, TileGameState
+from heuristics import admissible_heuristic
+from shared_tables import board_rank
+from tile_kernels import successors
+
+# Symmetry reduction for the tile game.
+#
+# With the row-major goal, the eight symmetries of the square (rotations and reflections)
+# map the puzzle onto itself: move every tile to the mirrored position and relabel it with
+# the tile whose goal is that mirrored position. The goal maps to the goal, and adjacent
+# positions stay adjacent, so a board and its images are exactly as far from the goal.
+# Searching over one canonical representative of each class (the smallest image) visits up
+# to eight times fewer states.
+
+_symmetries = {}
+
+
+def board_symmetries(dim: int) -> List[Tuple[Callable, bytes]]:
+    """
+    Produces the symmetries of a dim x dim board, each as a function that rearranges the
+    positions of a flat board and a bytes.translate table that relabels its tiles.
+
+    Args:
+        dim (int): The dimension of the board.
+
+    Returns:
+        List[Tuple[Callable, bytes]]: The (rearrange, relabel) pairs, identity first.
+    """
+    symmetries = _symmetries.get(dim)
+    if symmetries is None:
+        maps = [
+            lambda r, c: (r, c),
+            lambda r, c: (c, dim - 1 - r),
+            lambda r, c: (dim - 1 - r, dim - 1 - c),
+            lambda r, c: (dim - 1 - c, r),
+            lambda r, c: (r, dim - 1 - c),
+            lambda r, c: (dim - 1 - r, c),
+            lambda r, c: (c, r),
+            lambda r, c: (dim - 1 - c, dim - 1 - r),
+        ]
+        symmetries = []
+        seen = set()
+        n = dim * dim
+        for position_map in maps:
+            image = [0] * n
+            for r in range(dim):
+                for c in range(dim):
+                    new_r, new_c = position_map(r, c)
+                    image[r * dim + c] = new_r * dim + new_c
+            if tuple(image) in seen:
+                continue  # on a 1 x 1 board every symmetry is the identity
+            seen.add(tuple(image))
+            # The tile at position p moves to image[p], so position q takes from inverse[q]
+            inverse = [0] * n
+            for p in range(n):
+                inverse[image[p]] = p
+            relabel = bytearray(range(256))
+            for tile in range(1, n + 1):
+                relabel[tile] = image[tile - 1] + 1
+            rearrange = itemgetter(*inverse) if n > 1 else (lambda flat: (flat[0],))
+            symmetries.append((rearrange, bytes(relabel)))
+        _symmetries[dim] = symmetries
+    return symmetries
+
+
+def canonical_tiles(tiles: bytes, dim: int) -> Tuple[int]:
+    """
+    Produces the smallest image of a flat board under the board's symmetries.
+
+    Args:
+        tiles (bytes): The board, one byte per tile in row-major order.
+        dim (int): The dimension of the board.
+
+    Returns:
+        Tuple[int]: The canonical flat board.
+    """
+    return min(rearrange(tiles.translate(relabel)) for rearrange, relabel in board_symmetries(dim))
+
+
+def canonicalize(state: TileGameState) -> TileGameState:
+    """
+    Produces the canonical representative of a state's symmetry class. Two states are
+    symmetric exactly when their canonical states are equal.
+
+    Args:
+        state (TileGameState): The state to canonicalize.
+
+    Returns:
+        TileGameState: The canonical state.
+    """
+    dim = len(state.board)
+    flat = canonical_tiles(state.to_bytes(), dim)
+    return TileGameState(tuple(flat[i * dim:(i + 1) * dim] for i in range(dim)))
+
+
+class SymmetricTileGame(HeuristicTileGame):
+    """
+    A HeuristicTileGame whose states are canonical states, so any search engine run on it
+    treats symmetric boards as one. Use unfold_path to turn the path found back into the
+    moves of the original board.
+
+    The symmetries only hold for the row-major goal, so no other goal can be given.
+    """
+
+    def __init__(self, dim, heuristic=admissible_heuristic, start_state=None):
+        super().__init__(dim, heuristic, start_state)
+        self.original_start_state = self.start_state
+        self.start_state = canonicalize(self.start_state)
+
+    def get_successors(self, state: TileGameState) -> set([TileGameState]):
+        return {canonicalize(successor) for successor in super().get_successors(state)}
+
+    def unfold_path(self, path: Optional[List[TileGameState]]) -> Optional[List[TileGameState]]:
+        """
+        Maps a path of canonical states back to the original board: at every step, the
+        move taken is the one whose result is symmetric to the next state on the path.
+
+        Args:
+            path (Optional[List[TileGameState]]): A path of canonical states from the
+                canonical start state, as returned by a search on this game.
+
+        Returns:
+            Optional[List[TileGameState]]: The same path starting from the original start state.
+        """
+        if path is None:
+            return None
+        unfolded = [self.original_start_state]
+        for canonical_state in path[1:]:
+            for successor in TileGame.get_successors(self, unfolded[-1]):
+                if canonicalize(successor) == canonical_state:
+                    unfolded.append(successor)
+                    break
+            else:
+                raise ValueError("path does not follow the moves of the game")
+        return unfolded
+
+
+def symmetric_search(engine: Callable, problem: HeuristicTileGame) -> Tuple[Optional[List[TileGameState]], Dict[str, int]]:
+    """
+    Runs a search engine on the symmetry-reduced version of a tile game and maps the path
+    back to the original board.
+
+    Args:
+        engine (Callable): The search to run, e.g. astar or bfs.
+        problem (HeuristicTileGame): The game to solve. Its goal must be the row-major goal.
+
+    Returns:
+        Tuple[Optional[List[TileGameState]], Dict[str, int]]: The path from the original
+        start state and the engine's stats.
+    """
+    if problem.goal_state != problem.construct_goal():
+        raise ValueError("symmetry reduction needs the row-major goal")
+    game = SymmetricTileGame(problem.dim, problem.heuristic, problem.get_start_state())
+    path, stats = engine(game)
+    return game.unfold_path(path), stats
+
+
+class SymmetricDistanceHeuristic:
+    """
+    The perfect heuristic for small boards, from a table holding one distance per symmetry
+    class instead of one per board: the sorted ranks of the canonical boards, and their
+    distances to the goal. For a 3 x 3 board that is 45560 entries instead
+    of 9! = 362880.
+    """
+
+    def __init__(self, dim: int):
+        """
+        Builds the table by breadth-first search from the goal over canonical boards.
+
+        Args:
+            dim (int): The dimension of the board.
+        """
+        self.dim = dim
+        goal = bytes(range(1, dim * dim + 1))
+        distances = {goal: 0}
+        layer = [goal]
+        depth = 0
+        while layer:
+            depth += 1
+            next_layer = []
+            for board in layer:
+                for child in successors(board):
+                    child = bytes(canonical_tiles(child, dim))
+                    if child not in distances:
+                        distances[child] = depth
+                        next_layer.append(child)
+            layer = next_layer
+
+        entries = sorted((board_rank(board), distance) for board, distance in distances.items())
+        self.ranks = array("Q", (rank for rank, _ in entries))
+        self.distances = bytes(distance for _, distance in entries)
+
+    def __len__(self) -> int:
+        return len(self.ranks)
+
+    def __call__(self, state: TileGameState) -> float:
+        rank = board_rank(bytes(canonical_tiles(state.to_bytes(), self.dim)))
+        return self.distances[bisect.bisect_left(self.ranks, rank)]
@@ -1,14 +1,67 @@
-from typing import Tuple, Optional, Dict, List
+from typing import Callable, Dict, List, Optional, Tuple
 from search_problem import SearchProblem
 from heuristic_search_problem import HeuristicSearchProblem
 
 import itertools
+import math
 import random
 
 # The tile game search problem, implemented as a SearchProblem
 # States are board configurations.
 # Read the assignment handout for details.
 
+# Zobrist hashing: every (tile, position) pair gets a fixed random 64-bit key, and a board's
+# hash is the XOR of the keys of its tiles. Swapping two tiles changes only four of those
+# keys, so a successor's hash is computed from its parent's in O(1). The keys come from
+# their own seeded generator, so they are the same in every process (and never disturb the
+# global random module).
+ZOBRIST_SEED = 20250204
+_zobrist_tables = {}
+_flat_swaps = {}
+
+
+def zobrist_table(dim: int) -> List[List[int]]:
+    """
+    Produces the Zobrist keys for a dim x dim board.
+
+    Args:
+        dim (int): The dimension of the board.
+
+    Returns:
+        List[List[int]]: The 64-bit key of tile t at flat (row-major) position p is
+        table[p][t]. Index 0 of each position is unused.
+    """
+    table = _zobrist_tables.get(dim)
+    if table is None:
+        rng = random.Random(ZOBRIST_SEED + dim)
+        table = [[0] + [rng.getrandbits(64) for _ in range(dim * dim)] for _ in range(dim * dim)]
+        _zobrist_tables[dim] = table
+    return table
+
+
+def flat_swaps(dim: int) -> List[Tuple[int, int]]:
+    """
+    Produces the swaps of a dim x dim board as pairs of flat (row-major) positions, in the
+    same order as TileGame.swaps: for every position, the swap with the tile below it and
+    then the swap with the tile to its right. The list is shared, so it must not be changed.
+
+    Args:
+        dim (int): The dimension of the board.
+
+    Returns:
+        List[Tuple[int, int]]: The (p, q) position pairs, with p < q.
+    """
+    swaps = _flat_swaps.get(dim)
+    if swaps is None:
+        swaps = []
+        for p in range(dim * dim):
+            if p // dim < dim - 1:
+                swaps.append((p, p + dim))
+            if p % dim < dim - 1:
+                swaps.append((p, p + 1))
+        _flat_swaps[dim] = swaps
+    return swaps
+
 
 class TileGameState:
     """
@@ -16,18 +69,28 @@ class TileGameState:
 
     Attributes:
         board (List[List[int]]): The board of numbers that make up the tile game.
+        zobrist (int): The 64-bit Zobrist hash of the board.
     """
 
-    def __init__(self, board: Tuple[Tuple[int]]):
+    def __init__(self, board: Tuple[Tuple[int]], zobrist: Optional[int] = None):
         self.board = board
+        if zobrist is None:
+            table = zobrist_table(len(board))
+            zobrist = 0
+            position = 0
+            for row in board:
+                for tile in row:
+                    zobrist ^= table[position][tile]
+                    position += 1
+        self.zobrist = zobrist
 
     def __eq__(self, other):
         if not isinstance(other, TileGameState):
             return False
-        return self.board == other.board
+        return self.zobrist == other.zobrist and self.board == other.board
 
     def __hash__(self):
-        return hash(self.board)
+        return self.zobrist
 
     def __lt__(self, other):
         if not isinstance(other, TileGameState):
@@ -52,6 +115,129 @@ class TileGameState:
     def __repr__(self):
         return f"State({self.board})"
 
+    def to_bytes(self) -> bytes:
+        """
+        Packs the board into one byte per tile, in row-major order.
+
+        Returns:
+            bytes: A dim * dim byte encoding of the board.
+        """
+        return bytes(itertools.chain.from_iterable(self.board))
+
+    @staticmethod
+    def from_bytes(data: bytes) -> "TileGameState":
+        """
+        Unpacks a board packed with to_bytes.
+
+        Args:
+            data (bytes): A dim * dim byte encoding of the board.
+
+        Returns:
+            TileGameState: The decoded state.
+        """
+        dim = math.isqrt(len(data))
+        return TileGameState(tuple(tuple(data[i * dim:(i + 1) * dim]) for i in range(dim)))
+
+    def to_keyed_bytes(self) -> bytes:
+        """
+        Packs the board like to_bytes, prefixed with its 8-byte Zobrist hash. Sorting these
+        records orders boards by hash, and decoding them does not need to rehash the board.
+
+        Returns:
+            bytes: An 8 + dim * dim byte encoding of the board.
+        """
+        return self.zobrist.to_bytes(8, "big") + self.to_bytes()
+
+    @staticmethod
+    def from_keyed_bytes(data: bytes) -> "TileGameState":
+        """
+        Unpacks a board packed with to_keyed_bytes.
+
+        Args:
+            data (bytes): An 8 + dim * dim byte encoding of the board.
+
+        Returns:
+            TileGameState: The decoded state.
+        """
+        dim = math.isqrt(len(data) - 8)
+        board = tuple(tuple(data[8 + i * dim:8 + (i + 1) * dim]) for i in range(dim))
+        return TileGameState(board, int.from_bytes(data[:8], "big"))
+
+
+class MutableTileBoard:
+    """
+    A board that is changed in place, for depth-first engines that would otherwise build a
+    new TileGameState for every node. The tiles are kept flat in a bytearray, and the
+    Zobrist hash and the sum of the tiles' Manhattan distances to their row-major goal
+    positions are updated with every swap. Swaps are numbered as in TileGame.swaps.
+
+    Attributes:
+        tiles (bytearray): The board, one byte per tile in row-major order.
+        zobrist (int): The Zobrist hash of the board, as TileGameState computes it.
+        manhattan (int): The total Manhattan distance of the tiles from their goal positions.
+    """
+
+    def __init__(self, state: TileGameState):
+        self.dim = dim = len(state.board)
+        self.tiles = bytearray(state.to_bytes())
+        self.zobrist = state.zobrist
+        self._keys = zobrist_table(dim)
+        self.swaps = flat_swaps(dim)
+        # distances[tile][p] is the Manhattan distance of tile from its goal when at position p
+        self._distances = [[0] * (dim * dim)] + [
+            [abs((tile - 1) // dim - p // dim) + abs((tile - 1) % dim - p % dim) for p in range(dim * dim)]
+            for tile in range(1, dim * dim + 1)]
+        self.manhattan = sum(self._distances[tile][p] for p, tile in enumerate(self.tiles))
+
+    def apply_swap(self, index: int):
+        """
+        Swaps the two tiles of the swap at the given index of TileGame.swaps.
+
+        Args:
+            index (int): The index of the swap.
+        """
+        i, j = self.swaps[index]
+        tiles = self.tiles
+        a, b = tiles[i], tiles[j]
+        tiles[i], tiles[j] = b, a
+        key_i, key_j = self._keys[i], self._keys[j]
+        self.zobrist ^= key_i[a] ^ key_j[b] ^ key_j[a] ^ key_i[b]
+        distance_a, distance_b = self._distances[a], self._distances[b]
+        self.manhattan += distance_a[j] + distance_b[i] - distance_a[i] - distance_b[j]
+
+    # Every swap is its own inverse
+    undo_swap = apply_swap
+
+    def to_state(self) -> TileGameState:
+        """
+        Produces an immutable copy of the board.
+
+        Returns:
+            TileGameState: The current board.
+        """
+        dim = self.dim
+        return TileGameState(tuple(tuple(self.tiles[i * dim:(i + 1) * dim]) for i in range(dim)), self.zobrist)
+
+
+def board_heuristic(heuristic: Callable[[TileGameState], float], board: MutableTileBoard) -> float:
+    """
+    Evaluates a heuristic on a MutableTileBoard. A heuristic that can read the board
+    directly provides a board_heuristic(board) method (or function attribute) giving the
+    same value it gives the board's state; any other heuristic is given a TileGameState
+    copy of the board.
+
+    Args:
+        heuristic (Callable[[TileGameState], float]): The heuristic to evaluate.
+        board (MutableTileBoard): The board to evaluate.
+
+    Returns:
+        float: The heuristic value of the board.
+    """
+    evaluate = getattr(heuristic, "board_heuristic", None)
+    if evaluate is None:
+        return heuristic(board.to_state())
+    return evaluate(board)
+
 
 class TileGame(SearchProblem[TileGameState]):
     """
@@ -85,6 +271,8 @@ class TileGame(SearchProblem[TileGameState]):
         else:
             self.goal_state = self.construct_goal()
 
+        self.swaps = self.construct_swaps()
+
     ###### SEARCH PROBLEM IMPLEMENTATION ######
     ###### DO NOT CHANGE THESE FUNCTIONS ######
 
@@ -155,9 +343,25 @@ class TileGame(SearchProblem[TileGameState]):
         Returns:
             TileGameState: The new state after swapping the tiles.
         """
-        board = list(list(row) for row in state.board)
-        board[r1][c1], board[r2][c2] = board[r2][c2], board[r1][c1]
-        return TileGameState(tuple(tuple(row) for row in board))
+        # Only the rows holding the two tiles are rebuilt, the rest are shared with state
+        rows = list(state.board)
+        tile1, tile2 = rows[r1][c1], rows[r2][c2]
+        if r1 == r2:
+            row = list(rows[r1])
+            row[c1], row[c2] = tile2, tile1
+            rows[r1] = tuple(row)
+        else:
+            row1, row2 = list(rows[r1]), list(rows[r2])
+            row1[c1], row2[c2] = tile2, tile1
+            rows[r1], rows[r2] = tuple(row1), tuple(row2)
+
+        # Update the Zobrist hash: take both tiles out of their old positions
+        # and put them into their new ones
+        dim = len(rows)
+        keys = _zobrist_tables.get(dim) or zobrist_table(dim)
+        keys1, keys2 = keys[r1 * dim + c1], keys[r2 * dim + c2]
+        zobrist = state.zobrist ^ keys1[tile1] ^ keys2[tile2] ^ keys2[tile1] ^ keys1[tile2]
+        return TileGameState(tuple(rows), zobrist)
 
     @staticmethod
     def random_start(dim: int) -> TileGameState:
@@ -180,6 +384,39 @@ class TileGame(SearchProblem[TileGameState]):
                       for i in range(dim)])
         return TileGameState(board)
 
+    ###### SWAP OPERATORS ######
+
+    def construct_swaps(self) -> List[Tuple[int, int, int, int]]:
+        """
+        Lists every legal move as the pair of positions it swaps, in the same order that
+        get_successors generates them. Every swap is its own inverse: applying the same swap
+        twice gives back the original board.
+
+        Returns:
+            List[Tuple[int, int, int, int]]: A list of (r1, c1, r2, c2) tuples.
+        """
+        swaps = []
+        for r in range(self.dim):
+            for c in range(self.dim):
+                if r < self.dim - 1:
+                    swaps.append((r, c, r + 1, c))
+                if c < self.dim - 1:
+                    swaps.append((r, c, r, c + 1))
+        return swaps
+
+    def apply_swap(self, state: TileGameState, index: int) -> TileGameState:
+        """
+        Applies the swap at the given index of self.swaps to a state.
+
+        Args:
+            state (TileGameState): The current state of the board.
+            index (int): The index of the swap in self.swaps.
+
+        Returns:
+            TileGameState: The new state after swapping the tiles.
+        """
+        return self.swap_tiles(state, *self.swaps[index])
+
     ###### USE TO VISUALIZE BOARD IF YOU WISH ######
     @staticmethod
     def board_to_pretty_string(board: TileGameState) -> str:
@@ -242,4 +479,16 @@ class HeuristicTileGame(TileGame, HeuristicSearchProblem):
 
     def __init__(self, dim, heuristic, start_state=None, goal_state=None):
         super().__init__(dim, start_state, goal_state)
-        self.heuristic = heuristic
\ No newline at end of file
+        self.heuristic = heuristic
+
+    def board_heuristic(self, board: MutableTileBoard) -> float:
+        """
+        Evaluates the heuristic on a MutableTileBoard, for engines that search in place.
+
+        Args:
+            board (MutableTileBoard): The board to evaluate.
+
+        Returns:
+            float: The same value as self.heuristic(board.to_state()).
+        """
+        return board_heuristic(self.heuristic, board)
\ No newline at end of file
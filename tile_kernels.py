@@ -0,0 +1,197 @@
+import math
+from array import array
+from types import SimpleNamespace
+from typing import List, Tuple
+
+from tile_game import flat_swaps, zobrist_table
+
+# The per-board hot paths of the tile game over flat boards, packed one byte per tile in
+# row-major order (TileGameState.to_bytes): successor generation, Zobrist hashing and the
+# Manhattan and my_heuristic evaluations. The heuristics of the heuristics module are
+# evaluated through them.
+#
+# They come from the optional compiled module _tile_kernels when it has been built (run
+# `python build_tile_kernels.py`), and otherwise from the pure-Python versions below.
+# Both give identical results, and both raise ValueError for a board that is not dim * dim
+# tiles between 1 and dim * dim, so callers never need to know which one they got;
+# native_kernels tells them if they care.
+
+_flat_keys = {}
+
+
+def flat_zobrist_keys(dim: int) -> array:
+    """
+    Produces zobrist_table(dim) as one flat array of 64-bit keys, the key of tile t at flat
+    position p being at index p * (dim * dim + 1) + t.
+
+    Args:
+        dim (int): The dimension of the board.
+
+    Returns:
+        array: The keys, typecode 'Q'.
+    """
+    keys = _flat_keys.get(dim)
+    if keys is None:
+        keys = array("Q", [key for position in zobrist_table(dim) for key in position])
+        _flat_keys[dim] = keys
+    return keys
+
+
+def _board_dim(tiles: bytes) -> int:
+    # The dimension of a flat board, checked the way the compiled board_dim checks it
+    n = len(tiles)
+    dim = math.isqrt(n)
+    if dim * dim != n or dim > 15:
+        raise ValueError("a board must hold dim * dim tiles, with dim at most 15")
+    if n and (min(tiles) < 1 or max(tiles) > n):
+        position, tile = next((p, t) for p, t in enumerate(tiles) if not 1 <= t <= n)
+        raise ValueError(f"tile {tile} at position {position} is not between 1 and {n}")
+    return dim
+
+
+def _python_manhattan(tiles: bytes) -> int:
+    dim = _board_dim(tiles)
+    total = 0
+    for position, tile in enumerate(tiles):
+        total += abs((tile - 1) // dim - position // dim) + abs((tile - 1) % dim - position % dim)
+    return total
+
+
+def _python_my_heuristic(tiles: bytes) -> float:
+    dim = _board_dim(tiles)
+    value = 0
+    for i in range(dim):
+        for j in range(dim):
+            here = i * dim + j
+            num = tiles[here]
+            # A tile that trades places with a neighbour to reach its goal counts half a
+            # swap, as in heuristics.my_heuristic
+            if num != here:
+                if i > 0 and num == here - dim and tiles[here - dim] == here:
+                    value += 0.5
+                    continue
+                if i < dim - 1 and num == here + dim and tiles[here + dim] == here:
+                    value += 0.5
+                    continue
+                if j > 0 and num == here - 1 and tiles[here - 1] == here:
+                    value += 0.5
+                    continue
+                if j < dim - 1 and num == here + 1 and tiles[here + 1] == here:
+                    value += 0.5
+                    continue
+            value += abs((num - 1) // dim - i) + abs((num - 1) % dim - j)
+    return value
+
+
+def _python_zobrist_hash(tiles: bytes, keys: array) -> int:
+    _board_dim(tiles)
+    stride = len(tiles) + 1
+    zobrist = 0
+    for position, tile in enumerate(tiles):
+        zobrist ^= keys[position * stride + tile]
+    return zobrist
+
+
+def _python_successors(tiles: bytes) -> List[bytes]:
+    children = []
+    for i, j in flat_swaps(_board_dim(tiles)):
+        child = bytearray(tiles)
+        child[i], child[j] = child[j], child[i]
+        children.append(bytes(child))
+    return children
+
+
+def _python_zobrist_successors(tiles: bytes, zobrist: int, keys: array) -> List[Tuple[bytes, int]]:
+    stride = len(tiles) + 1
+    children = []
+    for i, j in flat_swaps(_board_dim(tiles)):
+        a, b = tiles[i], tiles[j]
+        child = bytearray(tiles)
+        child[i], child[j] = b, a
+        children.append((bytes(child), zobrist ^ keys[i * stride + a] ^ keys[j * stride + b]
+                         ^ keys[j * stride + a] ^ keys[i * stride + b]))
+    return children
+
+
+python_kernels = SimpleNamespace(
+    manhattan=_python_manhattan,
+    my_heuristic=_python_my_heuristic,
+    zobrist_hash=_python_zobrist_hash,
+    successors=_python_successors,
+    zobrist_successors=_python_zobrist_successors,
+)
+
+try:
+    import _tile_kernels as native_kernels
+except ImportError:
+    native_kernels = None
+
+kernels = native_kernels or python_kernels
+
+
+def manhattan(tiles: bytes) -> int:
+    """
+    Sums the Manhattan distances of the tiles of a flat board to their row-major goal
+    positions (twice admissible_heuristic, and exactly inadmissible_heuristic).
+
+    Args:
+        tiles (bytes): The board, one byte per tile in row-major order.
+
+    Returns:
+        int: The total Manhattan distance.
+    """
+    return kernels.manhattan(tiles)
+
+
+def my_heuristic(tiles: bytes) -> float:
+    """
+    Evaluates heuristics.my_heuristic on a flat board.
+
+    Args:
+        tiles (bytes): The board, one byte per tile in row-major order.
+
+    Returns:
+        float: The heuristic value of the board.
+    """
+    return kernels.my_heuristic(tiles)
+
+
+def zobrist_hash(tiles: bytes) -> int:
+    """
+    Hashes a flat board the way TileGameState does.
+
+    Args:
+        tiles (bytes): The board, one byte per tile in row-major order.
+
+    Returns:
+        int: The 64-bit Zobrist hash of the board.
+    """
+    return kernels.zobrist_hash(tiles, flat_zobrist_keys(math.isqrt(len(tiles))))
+
+
+def successors(tiles: bytes) -> List[bytes]:
+    """
+    Produces the flat boards one swap away from a flat board, in TileGame.swaps order.
+
+    Args:
+        tiles (bytes): The board, one byte per tile in row-major order.
+
+    Returns:
+        List[bytes]: The successor boards.
+    """
+    return kernels.successors(tiles)
+
+
+def zobrist_successors(tiles: bytes, zobrist: int) -> List[Tuple[bytes, int]]:
+    """
+    Produces the flat boards one swap away from a flat board, in TileGame.swaps order,
+    each with its Zobrist hash updated from the board's.
+
+    Args:
+        tiles (bytes): The board, one byte per tile in row-major order.
+        zobrist (int): The Zobrist hash of the board.
+
+    Returns:
+        List[Tuple[bytes, int]]: The (board, zobrist) pairs of the successors.
+    """
+    return kernels.zobrist_successors(tiles, zobrist, flat_zobrist_keys(math.isqrt(len(tiles))))
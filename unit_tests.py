@@ -1,11 +1,49 @@
+import asyncio
+import gc
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import tempfile
+import pickle
 import unittest
 
-# from directed_graph import DirectedGraph
-# from bfs_and_dfs import bfs, dfs
-from tile_game import TileGame, TileGameState, HeuristicTileGame
-from informed_search import astar
-from blind_search import iterative_deepening_search
-from heuristics import admissible_heuristic, inadmissible_heuristic
+import numpy as np
+
+from directed_graphy import DirectedGraph
+from bfs_and_dfs import bfs, dfs, level_bfs
+from tile_game import TileGame, TileGameState, HeuristicTileGame, MutableTileBoard
+from informed_search import astar, beam_search, bounded_astar, ida_star
+from parallel_search import hda_star
+from batch_solve import solve_batch
+from async_search import async_astar, async_iterative_deepening_search, SearchServer, request_solve
+from blind_search import iterative_deepening_search, frontier_search
+from heuristics import admissible_heuristic, inadmissible_heuristic, my_heuristic
+import external_search
+from external_search import external_bfs
+from heuristic_cache import CachedHeuristic
+from compare_heuristics import ScaledHeuristic, completion_rate
+from symmetry import board_symmetries, canonicalize, symmetric_search, SymmetricTileGame, SymmetricDistanceHeuristic
+import tile_kernels
+from instance_generator import (board_ranks, distance_table, generate_boards, iter_boards, load_boards,
+                                manhattan_bounds, save_boards, to_states)
+from result_io import (SolutionReader, SolutionWriter, StatsWriter, STATS_DTYPE,
+                       decode_moves, encode_moves, read_stats)
+from landmarks import LandmarkGraph, LandmarkTable, grid_graph
+from budgeted_search import budgeted_search
+from checkpoint import Checkpointer, resumable_astar, resumable_astar_steps
+from profile_heuristics import effective_branching_factor, format_report, profile_heuristic, profile_heuristics
+from shared_tables import (board_rank, build_distance_table, build_manhattan_table,
+                           ExactDistanceHeuristic, ManhattanTableHeuristic)
+
+
+def failing_heuristic(state):
+    raise ValueError("this heuristic always fails")
+
+
+def evaluate_in_worker(heuristic, boards):
+    return os.getpid(), heuristic.table.path, [heuristic(board) for board in boards]
 
 
 class IOTest(unittest.TestCase):
@@ -125,6 +163,707 @@ class IOTest(unittest.TestCase):
         self._check_tilegame(five_swap_start_state, five_swap_goal_state, length=5, heuristic=admissible_heuristic)
         self._check_tilegame(five_swap_start_state, five_swap_goal_state, heuristic=inadmissible_heuristic)
 
+    def test_blind_search(self):
+        start_state = TileGameState(((5, 1, 3), (4, 2, 6), (7, 8, 9)))
+        goal_state = TileGameState(((1, 2, 3), (4, 5, 6), (7, 8, 9)))
+        small_start_state = TileGameState(((4, 3), (2, 1)))
+        small_goal_state = TileGameState(((1, 2), (3, 4)))
+
+        #bfs, level_bfs and ids should find the shortest path, dfs just has to find a valid one
+        #(dfs runs on a 2-by-2 board since it wanders through most of a 3-by-3 space)
+        for search, search_start, search_goal in [(bfs, start_state, goal_state),
+                                                  (level_bfs, start_state, goal_state),
+                                                  (iterative_deepening_search, start_state, goal_state),
+                                                  (dfs, small_start_state, small_goal_state)]:
+            dim = len(search_start.board)
+            game = TileGame(dim, search_start, search_goal)
+            path, stats = search(game)
+            self.assertEqual(path[0], search_start)
+            self.assertEqual(path[-1], search_goal)
+            self.assertEqual(stats["path_length"], len(path))
+            self.assertEqual(stats["total_cost"], len(path) - 1)
+            for state, next_state in zip(path, path[1:]):
+                self.assertIn(next_state, game.get_successors(state))
+        game = TileGame(3, start_state, goal_state)
+        self.assertEqual(len(bfs(game)[0]), 3)
+        self.assertEqual(len(level_bfs(game)[0]), 3)
+
+        #starting at the goal takes no expansions
+        path, stats = bfs(TileGame(2, start=TileGameState(((1, 2), (3, 4)))))
+        self.assertEqual(path, [TileGameState(((1, 2), (3, 4)))])
+        self.assertEqual(stats["states_expanded"], 0)
+
+    def test_frontier_search(self):
+        #frontier search should find paths as short as bfs, including ones that need
+        #more than one round of divide-and-conquer to rebuild
+        for start_state in [TileGameState(((1, 2), (3, 4))),
+                            TileGameState(((3, 2), (1, 4))),
+                            TileGameState(((4, 3), (2, 1))),
+                            TileGameState(((5, 1, 3), (4, 2, 6), (7, 8, 9))),
+                            TileGameState(((2, 1, 6), (4, 3, 5), (7, 9, 8)))]:
+            game = TileGame(len(start_state.board), start_state)
+            path, stats = frontier_search(game)
+            self.assertEqual(path[0], start_state)
+            self.assertTrue(game.is_goal_state(path[-1]))
+            self.assertEqual(len(path), len(bfs(game)[0]))
+            self.assertEqual(stats["path_length"], len(path))
+            for state, next_state in zip(path, path[1:]):
+                self.assertIn(next_state, game.get_successors(state))
+
+    def test_external_bfs(self):
+        #a tiny buffer forces every layer to be spilled as several sorted runs
+        for start_state in [TileGameState(((1, 2), (3, 4))),
+                            TileGameState(((4, 3), (2, 1))),
+                            TileGameState(((2, 1, 6), (4, 3, 5), (7, 9, 8)))]:
+            game = TileGame(len(start_state.board), start_state)
+            for undirected in [True, False]:
+                path, _ = external_bfs(game, TileGameState.to_bytes, TileGameState.from_bytes,
+                                           buffer_size=7, undirected=undirected)
+                self.assertEqual(path[0], start_state)
+                self.assertTrue(game.is_goal_state(path[-1]))
+                self.assertEqual(len(path), len(bfs(game)[0]))
+                for state, next_state in zip(path, path[1:]):
+                    self.assertIn(next_state, game.get_successors(state))
+
+        #a goal found partway through a layer leaves no run files behind in the caller's workdir
+        star = DirectedGraph([[None, 1, 1, 1, 1]] + [[1, None, None, None, None] for _ in range(4)], {4})
+        with tempfile.TemporaryDirectory() as workdir:
+            path, _ = external_bfs(star, lambda node: node.to_bytes(4, "big"),
+                                   lambda data: int.from_bytes(data, "big"), workdir=workdir, buffer_size=1)
+            self.assertEqual(path, [0, 4])
+            names = os.listdir(workdir)
+            self.assertTrue(names)
+            self.assertTrue(all(name.startswith("layer_") for name in names))
+
+        #runs are merged in several passes when there are more than the fan-in allows
+        game = TileGame(3, TileGameState(((2, 1, 6), (4, 3, 5), (7, 9, 8))))
+        fan_in = external_search.MAX_MERGE_FAN_IN
+        external_search.MAX_MERGE_FAN_IN = 2
+        try:
+            path, _ = external_bfs(game, TileGameState.to_bytes, TileGameState.from_bytes, buffer_size=3)
+        finally:
+            external_search.MAX_MERGE_FAN_IN = fan_in
+        self.assertEqual(len(path), len(bfs(game)[0]))
+
+        #directed graphs need every earlier layer for duplicate detection
+        graph = DirectedGraph([[None, 1, None, None],
+                               [None, None, 1, None],
+                               [1, None, None, 1],
+                               [None, None, None, None]], {3})
+        path, _ = external_bfs(graph, lambda node: node.to_bytes(4, "big"),
+                               lambda data: int.from_bytes(data, "big"), buffer_size=1)
+        self.assertEqual(path, [0, 1, 2, 3])
+
+        #an unreachable goal returns None once the layers run out
+        graph.goal_indices = {4}
+        graph.matrix = [row + [None] for row in graph.matrix] + [[None] * 5]
+        path, _ = external_bfs(graph, lambda node: node.to_bytes(4, "big"),
+                               lambda data: int.from_bytes(data, "big"))
+        self.assertIsNone(path)
+
+    def test_cached_heuristic(self):
+        states = [TileGameState(((1, 2), (3, 4))), TileGameState(((3, 2), (1, 4))),
+                  TileGameState(((4, 3), (2, 1))), TileGameState(((4, 2), (3, 1)))]
+
+        for policy in ["lru", "clock"]:
+            cached = CachedHeuristic(admissible_heuristic, max_entries=2, policy=policy)
+            for state in states:
+                self.assertEqual(cached(state), admissible_heuristic(state))
+            self.assertEqual(len(cached), 2)
+            self.assertEqual(cached.stats(), {"entries": 2, "hits": 0, "misses": 4, "evictions": 2})
+            #the two most recent states are still cached
+            cached(states[2])
+            cached(states[3])
+            self.assertEqual(cached.hits, 2)
+
+        #a byte cap still keeps at least one state
+        cached = CachedHeuristic(admissible_heuristic, max_bytes=1)
+        cached(states[0])
+        cached(states[1])
+        self.assertEqual(len(cached), 1)
+        #caps that leave no room at all are refused
+        for caps in [{"max_entries": 0}, {"max_entries": -1}, {"max_bytes": 0}]:
+            for policy in ["lru", "clock"]:
+                with self.assertRaises(ValueError):
+                    CachedHeuristic(admissible_heuristic, policy=policy, **caps)
+
+        #scaled heuristics share their base cache, and astar gives the same answer with it
+        base_heuristic = CachedHeuristic(admissible_heuristic)
+        for scale in [1, 2, 3]:
+            game = HeuristicTileGame(2, ScaledHeuristic(base_heuristic, scale), states[2])
+            cached_path, _ = astar(game)
+            game = HeuristicTileGame(2, ScaledHeuristic(admissible_heuristic, scale), states[2])
+            self.assertEqual(cached_path, astar(game)[0])
+        self.assertGreater(base_heuristic.hits, 0)
+
+    def test_shared_tables(self):
+        boards = [TileGameState((tiles[:2], tiles[2:])) for tiles in itertools.permutations((1, 2, 3, 4))]
+        with build_distance_table(2) as distances, build_manhattan_table(2) as manhattan:
+            exact = ExactDistanceHeuristic(distances)
+            admissible = ManhattanTableHeuristic(manhattan, 0.5)
+            #what a worker process would receive: just the table's path, mapped again
+            worker_exact = pickle.loads(pickle.dumps(exact))
+            self.assertLess(len(pickle.dumps(exact)), 200)
+            for board in boards:
+                distance = len(bfs(TileGame(2, board))[0]) - 1
+                self.assertEqual(exact(board), distance)
+                self.assertEqual(worker_exact(board), distance)
+                self.assertEqual(admissible(board), admissible_heuristic(board))
+            worker_exact.table.close()
+            #a worker process attaches to the same file and reads the distances from it
+            with multiprocessing.Pool(1) as pool:
+                pid, path, values = pool.apply(evaluate_in_worker, (exact, boards))
+            self.assertNotEqual(pid, os.getpid())
+            self.assertEqual(path, distances.path)
+            self.assertEqual(values, [exact(board) for board in boards])
+
+        #completion_rate takes either a heuristic or one made per board size
+        with self.assertRaises(ValueError):
+            completion_rate()
+
+        #a table dropped without being closed still has its file removed
+        table = build_manhattan_table(2)
+        path = table.path
+        del table
+        gc.collect()
+        self.assertFalse(os.path.exists(path))
+
+    def test_hda_star(self):
+        for start_state in [TileGameState(((1, 2), (3, 4))),
+                            TileGameState(((4, 3), (2, 1))),
+                            TileGameState(((5, 1, 3), (4, 2, 6), (7, 8, 9))),
+                            TileGameState(((2, 1, 6), (4, 3, 5), (7, 9, 8)))]:
+            game = HeuristicTileGame(len(start_state.board), admissible_heuristic, start_state)
+            path, stats = hda_star(game, num_workers=2, batch_size=4)
+            self.assertEqual(path[0], start_state)
+            self.assertTrue(game.is_goal_state(path[-1]))
+            self.assertEqual(len(path), astar(game)[1]["path_length"])
+            self.assertEqual(stats["path_length"], len(path))
+            self.assertEqual(stats["total_cost"], len(path) - 1)
+            self.assertEqual(len(stats["workers"]), 2)
+            self.assertEqual(stats["states_expanded"],
+                             sum(worker["states_expanded"] for worker in stats["workers"]))
+            for state, next_state in zip(path, path[1:]):
+                self.assertIn(next_state, game.get_successors(state))
+
+        #a worker that crashes is reported instead of waited on forever
+        game = HeuristicTileGame(2, failing_heuristic, TileGameState(((4, 3), (2, 1))))
+        with self.assertRaises(RuntimeError):
+            hda_star(game, num_workers=2)
+
+    def test_zobrist_hash(self):
+        game = TileGame(3)
+        state = game.get_start_state()
+        for index in [0, 5, 11, 3, 3, 7]:
+            state = game.apply_swap(state, index)
+            #the hash carried through the swaps matches hashing the board from scratch
+            fresh_state = TileGameState(state.board)
+            self.assertEqual(state.zobrist, fresh_state.zobrist)
+            self.assertEqual(hash(state), hash(fresh_state))
+            self.assertEqual(state, fresh_state)
+            self.assertEqual(TileGameState.from_keyed_bytes(state.to_keyed_bytes()).zobrist, state.zobrist)
+        self.assertEqual(len(game.get_successors(state)), len(game.swaps))
+
+        #keyed records work as an external_bfs encoding
+        start_state = TileGameState(((2, 1, 6), (4, 3, 5), (7, 9, 8)))
+        path, _ = external_bfs(TileGame(3, start_state), TileGameState.to_keyed_bytes,
+                               TileGameState.from_keyed_bytes, undirected=True)
+        self.assertEqual(len(path), 5)
+
+    def test_solve_batch(self):
+        boards = [TileGameState(((1, 2), (3, 4))), TileGameState(((3, 2), (1, 4))),
+                  TileGameState(((4, 3), (2, 1))), TileGameState(((4, 2), (3, 1)))]
+        expected = {board: astar(HeuristicTileGame(2, admissible_heuristic, board)) for board in boards}
+
+        #solving in this process and in a pool should match astar board for board
+        for processes in [0, 2]:
+            summary = {}
+            results = list(solve_batch(boards, admissible_heuristic, processes=processes, summary=summary))
+            self.assertEqual(sorted(board for board, _, _ in results), sorted(boards))
+            for board, path, stats in results:
+                self.assertEqual((path, stats), expected[board])
+            self.assertEqual(summary["boards"], len(boards))
+            self.assertGreater(summary["boards_per_second"], 0)
+
+        self.assertEqual(list(solve_batch([], admissible_heuristic)), [])
+
+        #in-process batches consumed side by side keep their own games
+        small = solve_batch(boards, admissible_heuristic, processes=0)
+        big = solve_batch([TileGameState(((2, 1, 6), (4, 3, 5), (7, 9, 8)))], admissible_heuristic, processes=0)
+        self.assertEqual(next(small)[1:], expected[boards[0]])
+        self.assertEqual(len(next(big)[1]), 5)
+        self.assertEqual(next(small)[1:], expected[boards[1]])
+
+        #boards of another dimension are rejected, in this process and in a pool
+        mixed = boards[:1] + [TileGameState(((2, 1, 6), (4, 3, 5), (7, 9, 8)))]
+        for processes in [0, 2]:
+            with self.assertRaises(ValueError):
+                list(solve_batch(mixed, admissible_heuristic, processes=processes))
+
+    def test_async_search(self):
+        start_state = TileGameState(((2, 1, 6), (4, 3, 5), (7, 9, 8)))
+        game = HeuristicTileGame(3, admissible_heuristic, start_state)
+
+        async def solve():
+            return (await async_astar(game, yield_every=1),
+                    await async_iterative_deepening_search(game, yield_every=1))
+
+        (astar_path, astar_stats), (ids_path, _) = asyncio.run(solve())
+        self.assertEqual((astar_path, astar_stats), astar(game))
+        self.assertEqual(ids_path, iterative_deepening_search(game)[0])
+
+        #a long search gives way to a timeout instead of blocking the event loop
+        hard_game = HeuristicTileGame(4, admissible_heuristic,
+                                      TileGameState(((16, 15, 14, 13), (12, 11, 10, 9), (8, 7, 6, 5), (4, 3, 2, 1))))
+
+        async def solve_with_timeout():
+            await asyncio.wait_for(async_astar(hard_game, yield_every=10), timeout=0.05)
+
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(solve_with_timeout())
+
+    def test_search_server(self):
+        boards = [((1, 2), (3, 4)), ((4, 3), (2, 1)), ((4, 2), (3, 1))]
+
+        async def serve_and_request(socket_path):
+            async with SearchServer(socket_path, num_solvers=2, max_queue=1) as server:
+                responses = await asyncio.gather(*[request_solve(socket_path, board) for board in boards])
+                responses.append(await request_solve(socket_path, ((1, 2), (3, 4)), engine="nope"))
+                return responses, server.stats
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            responses, server_stats = asyncio.run(serve_and_request(os.path.join(tmpdir, "search.sock")))
+        for board, response in zip(boards, responses):
+            path, stats = astar(HeuristicTileGame(2, admissible_heuristic, TileGameState(board)))
+            self.assertEqual(response["stats"], stats)
+            self.assertEqual([tuple(map(tuple, state)) for state in response["path"]],
+                             [state.board for state in path])
+            self.assertGreaterEqual(response["queue_seconds"], 0)
+        self.assertIn("error", responses[-1])
+        self.assertEqual(server_stats["jobs"], 4)
+
+        hard_board = ((16, 15, 14, 13), (12, 11, 10, 9), (8, 7, 6, 5), (4, 3, 2, 1))
+
+        async def bad_and_slow_requests(socket_path):
+            async with SearchServer(socket_path, job_timeout=0.2, yield_every=10) as server:
+                invalid = await request_solve(socket_path, ((1, 1), (2, 3)), engine="ids")
+                slow = await request_solve(socket_path, hard_board)
+                valid = await request_solve(socket_path, ((4, 3), (2, 1)))
+            return invalid, slow, valid
+
+        async def close_during_job(socket_path):
+            server = SearchServer(socket_path, yield_every=10)
+            await server.start()
+            request = asyncio.create_task(request_solve(socket_path, hard_board))
+            await asyncio.sleep(0.1)
+            await asyncio.wait_for(server.close(), timeout=2)
+            with self.assertRaises(json.JSONDecodeError):
+                await request
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            invalid, slow, valid = asyncio.run(bad_and_slow_requests(os.path.join(tmpdir, "search.sock")))
+            asyncio.run(close_during_job(os.path.join(tmpdir, "close.sock")))
+        self.assertIn("error", invalid)
+        self.assertIn("error", slow)
+        self.assertIn("within 0.2 seconds", slow["error"])
+        self.assertGreaterEqual(invalid["queue_seconds"], 0)
+        self.assertGreaterEqual(slow["queue_seconds"], 0)
+        self.assertEqual(valid["stats"], astar(HeuristicTileGame(2, admissible_heuristic, TileGameState(((4, 3), (2, 1)))))[1])
+
+    def test_bounded_search(self):
+        for start_state in [TileGameState(((1, 2), (3, 4))),
+                            TileGameState(((4, 3), (2, 1))),
+                            TileGameState(((2, 1, 6), (4, 3, 5), (7, 9, 8))),
+                            TileGameState(((3, 9, 1), (5, 7, 4), (2, 6, 8)))]:
+            game = HeuristicTileGame(len(start_state.board), admissible_heuristic, start_state)
+            optimal_length = astar(game)[1]["path_length"]
+
+            #bounded_astar stays optimal whenever the optimal path fits, and never goes over the cap
+            for cap in [max(2, optimal_length) if len(start_state.board) == 2 else 50, 1000]:
+                path, stats = bounded_astar(game, cap)
+                self.assertEqual(len(path), optimal_length)
+                self.assertLessEqual(stats["max_frontier_size"], cap)
+                for state, next_state in zip(path, path[1:]):
+                    self.assertIn(next_state, game.get_successors(state))
+            if len(start_state.board) == 2 and optimal_length > 2:
+                self.assertIsNone(bounded_astar(game, optimal_length - 1)[0])
+
+            #beam search trades path length for a frontier of at most beam_width states
+            path, stats = beam_search(game, 3)
+            self.assertEqual(path[0], start_state)
+            self.assertTrue(game.is_goal_state(path[-1]))
+            self.assertGreaterEqual(len(path), optimal_length)
+            self.assertLessEqual(stats["max_frontier_size"], 3)
+            for state, next_state in zip(path, path[1:]):
+                self.assertIn(next_state, game.get_successors(state))
+
+        #a 12 move board with a small cap, and caps too small to hold any solution
+        game = HeuristicTileGame(3, admissible_heuristic, TileGameState(((6, 7, 5), (2, 4, 8), (9, 3, 1))))
+        path, stats = bounded_astar(game, 50)
+        self.assertEqual(len(path), 13)
+        self.assertGreater(stats["states_pruned"], 0)
+        self.assertIsNone(bounded_astar(game, 2)[0])
+        self.assertIsNone(bounded_astar(HeuristicTileGame(2, admissible_heuristic, TileGameState(((4, 3), (2, 1)))), 2)[0])
+        self.assertEqual(len(bounded_astar(HeuristicTileGame(2, admissible_heuristic, TileGameState(((3, 2), (1, 4)))), 2)[0]), 2)
+        with self.assertRaises(ValueError):
+            bounded_astar(game, 1)
+
+    def test_symmetry(self):
+        #all eight symmetric images of a board share one canonical state
+        state = TileGameState(((3, 9, 1), (5, 7, 4), (2, 6, 8)))
+        images = [TileGameState.from_bytes(bytes(rearrange(state.to_bytes().translate(relabel))))
+                  for rearrange, relabel in board_symmetries(3)]
+        self.assertEqual(len(set(images)), 8)
+        self.assertEqual({canonicalize(image) for image in images}, {canonicalize(state)})
+        for image in images:
+            self.assertEqual(astar(HeuristicTileGame(3, admissible_heuristic, image))[1]["path_length"],
+                             astar(HeuristicTileGame(3, admissible_heuristic, state))[1]["path_length"])
+        self.assertEqual(canonicalize(TileGameState(((1, 2), (3, 4)))), TileGameState(((1, 2), (3, 4))))
+        self.assertEqual(canonicalize(TileGameState(((2, 1), (3, 4)))), canonicalize(TileGameState(((3, 2), (1, 4)))))
+
+        for start_state in [TileGameState(((1, 2), (3, 4))),
+                            TileGameState(((4, 3), (2, 1))),
+                            TileGameState(((2, 1, 6), (4, 3, 5), (7, 9, 8))),
+                            TileGameState(((3, 9, 1), (5, 7, 4), (2, 6, 8)))]:
+            game = HeuristicTileGame(len(start_state.board), admissible_heuristic, start_state)
+            expected_path, expected_stats = astar(game)
+            path, stats = symmetric_search(astar, game)
+            self.assertEqual(len(path), len(expected_path))
+            self.assertLessEqual(stats["states_expanded"], expected_stats["states_expanded"])
+            self.assertEqual(path[0], start_state)
+            self.assertTrue(game.is_goal_state(path[-1]))
+            for s, next_state in zip(path, path[1:]):
+                self.assertIn(next_state, game.get_successors(s))
+
+        #the whole 2x2 space shrinks, and the table of distances with it
+        self.assertLess(bfs(SymmetricTileGame(2, admissible_heuristic, TileGameState(((4, 3), (2, 1)))))[1]["states_expanded"],
+                        bfs(TileGame(2, TileGameState(((4, 3), (2, 1)))))[1]["states_expanded"])
+        table = SymmetricDistanceHeuristic(2)
+        self.assertLess(len(table), 24)
+        for tiles in itertools.permutations(range(1, 5)):
+            start_state = TileGameState.from_bytes(bytes(tiles))
+            self.assertEqual(table(start_state), len(bfs(TileGame(2, start_state))[0]) - 1)
+
+    def test_mutable_board(self):
+        #applying swaps in place matches swap_tiles, hash and heuristic included
+        state = TileGameState(((3, 9, 1), (5, 7, 4), (2, 6, 8)))
+        game = TileGame(3, state)
+        board = MutableTileBoard(state)
+        for index in [0, 5, 3, 11, 5, 7]:
+            state = game.apply_swap(state, index)
+            board.apply_swap(index)
+            self.assertEqual(board.to_state(), state)
+            self.assertEqual(board.zobrist, state.zobrist)
+            self.assertEqual(board.manhattan, 2 * admissible_heuristic(state))
+        board.undo_swap(7)
+        self.assertEqual(board.to_state(), game.apply_swap(state, 7))
+
+        #heuristics read off the board agree with their values on the state
+        state = board.to_state()
+        for heuristic in [admissible_heuristic, inadmissible_heuristic, ScaledHeuristic(inadmissible_heuristic, 0.5),
+                          CachedHeuristic(admissible_heuristic), lambda s: 3]:
+            self.assertEqual(HeuristicTileGame(3, heuristic, state).board_heuristic(board), heuristic(state))
+
+        for start_state in [TileGameState(((1, 2), (3, 4))),
+                            TileGameState(((4, 3), (2, 1))),
+                            TileGameState(((2, 1, 6), (4, 3, 5), (7, 9, 8))),
+                            TileGameState(((3, 9, 1), (5, 7, 4), (2, 6, 8)))]:
+            for heuristic in [admissible_heuristic, ScaledHeuristic(inadmissible_heuristic, 0.5)]:
+                game = HeuristicTileGame(len(start_state.board), heuristic, start_state)
+                path, stats = ida_star(game)
+                self.assertEqual(len(path), astar(game)[1]["path_length"])
+                self.assertEqual(stats["path_length"], len(path))
+                self.assertEqual(path[0], start_state)
+                self.assertTrue(game.is_goal_state(path[-1]))
+                for s, next_state in zip(path, path[1:]):
+                    self.assertIn(next_state, game.get_successors(s))
+
+        #the search still works towards a goal other than the row-major one
+        game = HeuristicTileGame(2, lambda s: 0, TileGameState(((1, 2), (3, 4))), TileGameState(((2, 1), (4, 3))))
+        self.assertEqual(len(ida_star(game)[0]), 3)
+
+    def test_profile_heuristics(self):
+        self.assertAlmostEqual(effective_branching_factor(6, 2), 2, places=6)
+        self.assertAlmostEqual(effective_branching_factor(3, 3), 1, places=6)
+        self.assertIsNone(effective_branching_factor(0, 0))
+
+        report = profile_heuristics({'admissible': admissible_heuristic, 'inadmissible': inadmissible_heuristic},
+                                    sizes=[2], num_boards=5)
+        self.assertEqual([(p['heuristic'], p['size']) for p in report], [('admissible', 2), ('inadmissible', 2)])
+        admissible, inadmissible = report
+        #admissible_heuristic is consistent and never overestimates, the full Manhattan sum does both
+        self.assertEqual(admissible['consistency_violations'], 0)
+        self.assertEqual(admissible['max_overestimate'], 0)
+        self.assertLessEqual(admissible['mean_error'], 0)
+        self.assertEqual(admissible['suboptimality'], 1)
+        self.assertGreater(inadmissible['consistency_violations'], 0)
+        self.assertGreater(inadmissible['overestimate_rate'], 0)
+        self.assertGreater(admissible['edges_checked'], 0)
+        self.assertGreater(admissible['ns_per_eval'], 0)
+        self.assertEqual(admissible['unsolved'], 0)
+        json.dumps(report)
+
+        #boards not solved within the expansion cap are counted and left out of the averages
+        boards = [TileGameState(((3, 9, 1), (5, 7, 4), (2, 6, 8))), TileGameState(((2, 1, 3), (4, 5, 6), (7, 8, 9)))]
+        capped = profile_heuristic(admissible_heuristic, boards, max_expansions=5)
+        self.assertEqual(capped['unsolved'], 1)
+        self.assertEqual(capped['path_length'], 2)
+        self.assertIn('unsolved', format_report([dict(capped, heuristic='admissible', size=3)]))
+
+    def test_tile_kernels(self):
+        #the compiled kernels, when built, and the pure-Python ones agree with each other and tile_game
+        implementations = [tile_kernels.python_kernels]
+        if tile_kernels.native_kernels is not None:
+            implementations.append(tile_kernels.native_kernels)
+        boards = [TileGameState(((1,),)), TileGameState(((4, 3), (2, 1))),
+                  TileGameState(((3, 9, 1), (5, 7, 4), (2, 6, 8))),
+                  TileGameState(((2, 1, 3), (4, 5, 6), (7, 8, 9))),
+                  TileGameState(((1, 2, 3, 4), (5, 6, 7, 8), (9, 10, 11, 12), (13, 14, 16, 15)))]
+        boards += [TileGameState.from_bytes(bytes(tiles)) for tiles in itertools.permutations(range(1, 5))]
+        for dim in range(2, 6):
+            boards.append(TileGameState.from_bytes(bytes(reversed(range(1, dim * dim + 1)))))
+        for kernels in implementations:
+            for state in boards:
+                tiles = state.to_bytes()
+                dim = len(state.board)
+                game = TileGame(dim, state)
+                expected = [game.apply_swap(state, index) for index in range(len(game.swaps))]
+                keys = tile_kernels.flat_zobrist_keys(dim)
+                self.assertEqual(kernels.manhattan(tiles), inadmissible_heuristic(state))
+                self.assertEqual(kernels.my_heuristic(tiles), my_heuristic(state))
+                self.assertEqual(kernels.zobrist_hash(tiles, keys), state.zobrist)
+                self.assertEqual(kernels.successors(tiles), [s.to_bytes() for s in expected])
+                self.assertEqual(kernels.zobrist_successors(tiles, state.zobrist, keys),
+                                 [(s.to_bytes(), s.zobrist) for s in expected])
+                self.assertEqual(kernels.successors(bytearray(tiles)), kernels.successors(tiles))
+            #malformed boards are refused rather than read out of range
+            keys = tile_kernels.flat_zobrist_keys(2)
+            for tiles in [bytes([1, 2, 3, 0]), bytes([1, 2, 3, 5]), bytes([1, 2, 3])]:
+                for evaluate in [kernels.manhattan, kernels.my_heuristic, kernels.successors,
+                                 lambda tiles: kernels.zobrist_hash(tiles, keys),
+                                 lambda tiles: kernels.zobrist_successors(tiles, 0, keys)]:
+                    with self.assertRaises(ValueError):
+                        evaluate(tiles)
+        #the heuristics are evaluated by the kernels
+        for board, values in [(((2, 1, 3), (4, 5, 6), (7, 8, 9)), (1, 2, 2)),
+                              (((3, 9, 1), (5, 7, 4), (2, 6, 8)), (9, 18, 18)),
+                              (((4, 3), (2, 1)), (4, 8, 5))]:
+            state = TileGameState(board)
+            self.assertEqual((admissible_heuristic(state), inadmissible_heuristic(state), my_heuristic(state)), values)
+        #the module functions use whichever implementation is available
+        state = boards[2]
+        self.assertEqual(tile_kernels.zobrist_hash(state.to_bytes()), state.zobrist)
+        self.assertEqual(set(tile_kernels.zobrist_successors(state.to_bytes(), state.zobrist)),
+                         {(s.to_bytes(), s.zobrist) for s in TileGame(3, state).get_successors(state)})
+
+    def test_checkpoint(self):
+        start_state = TileGameState(((3, 9, 1), (5, 7, 4), (2, 6, 8)))
+        game = HeuristicTileGame(3, admissible_heuristic, start_state)
+        expected_path, expected_stats = astar(game)
+        with tempfile.TemporaryDirectory() as workdir:
+            checkpoint_path = os.path.join(workdir, "astar.checkpoint")
+            path, stats = resumable_astar(game, checkpoint_path)
+            self.assertEqual(path, expected_path)
+            self.assertEqual({key: stats[key] for key in expected_stats}, expected_stats)
+            self.assertFalse(stats["resumed"])
+
+            for use_fork in [True, False]:
+                #interrupted after a snapshot, the search carries on from it to the same answer
+                steps = resumable_astar_steps(game, Checkpointer(checkpoint_path, 0, use_fork))
+                for _ in range(30):
+                    next(steps)
+                steps.close()
+                self.assertTrue(os.path.exists(checkpoint_path))
+                self.assertEqual(os.listdir(workdir), ["astar.checkpoint"])
+                path, stats = resumable_astar(game, checkpoint_path)
+                self.assertEqual(path, expected_path)
+                self.assertEqual({key: stats[key] for key in expected_stats}, expected_stats)
+                self.assertTrue(stats["resumed"])
+                self.assertFalse(os.path.exists(checkpoint_path))
+
+            #a checkpoint only resumes the search it was taken from
+            steps = resumable_astar_steps(game, Checkpointer(checkpoint_path, 0))
+            next(steps)
+            steps.close()
+            with self.assertRaises(ValueError):
+                resumable_astar(HeuristicTileGame(2, admissible_heuristic, TileGameState(((4, 3), (2, 1)))), checkpoint_path)
+
+    def test_budgeted_search(self):
+        game = HeuristicTileGame(3, admissible_heuristic, TileGameState(((6, 7, 5), (2, 4, 8), (9, 3, 1))))
+        expected_path, expected_stats = astar(game)
+
+        #within budget it is plain A*
+        path, stats = budgeted_search(game, 1 << 30)
+        self.assertEqual(path, expected_path)
+        self.assertEqual(stats["engine"], "astar")
+        self.assertEqual(stats["states_expanded"], expected_stats["states_expanded"])
+        self.assertGreater(stats["peak_memory_bytes"], 0)
+
+        #over budget it finishes with IDA*, from the best f A* had reached, or frontier search
+        short_game = HeuristicTileGame(3, admissible_heuristic, TileGameState(((2, 1, 6), (4, 3, 5), (7, 9, 8))))
+        for fallback, problem in [("ida_star", game), ("frontier_search", short_game)]:
+            expected_length = len(astar(problem)[0])
+            path, stats = budgeted_search(problem, 5000, fallback)
+            self.assertEqual(stats["engine"], "astar+" + fallback)
+            self.assertEqual(len(path), expected_length)
+            self.assertEqual(stats["path_length"], len(path))
+            self.assertEqual(path[0], problem.get_start_state())
+            self.assertTrue(problem.is_goal_state(path[-1]))
+            for s, next_state in zip(path, path[1:]):
+                self.assertIn(next_state, problem.get_successors(s))
+        path, stats = budgeted_search(game, 20000)
+        self.assertGreaterEqual(stats["fallback_bound"], admissible_heuristic(game.get_start_state()))
+        self.assertLessEqual(stats["fallback_bound"], expected_stats["total_cost"])
+        self.assertLess(stats["peak_memory_bytes"], budgeted_search(game, 1 << 30)[1]["peak_memory_bytes"])
+        with self.assertRaises(ValueError):
+            budgeted_search(game, 20000, "bfs")
+
+    def test_landmarks(self):
+        graph = DirectedGraph(grid_graph(12, seed=3), {143}, 6)
+
+        def distance(source, target):
+            path, _ = bfs(DirectedGraph(graph.matrix, {target}, source))
+            return float("inf") if path is None else len(path) - 1
+
+        table = LandmarkTable(graph, num_landmarks=4)
+        self.assertEqual(len(set(table.landmarks)), 4)
+        #the stored distances are the true (move counting) distances
+        for i, landmark in enumerate(table.landmarks):
+            for node in [0, 50, 143]:
+                self.assertEqual(table.forward[i][node], distance(landmark, node))
+                self.assertEqual(table.backward[i][node], distance(node, landmark))
+
+        #the heuristic never overestimates, so astar still finds shortest paths, with fewer expansions
+        problem = LandmarkGraph(graph, table=table)
+        blind_path, blind_stats = astar(LandmarkGraph(graph, num_landmarks=0))
+        path, stats = astar(problem)
+        self.assertEqual(len(path), len(bfs(graph)[0]))
+        self.assertEqual(len(path), len(blind_path))
+        self.assertLess(stats["states_expanded"], blind_stats["states_expanded"])
+        for node in range(0, 144, 7):
+            self.assertLessEqual(problem.heuristic(node), distance(node, 143))
+        for s, next_state in zip(path, path[1:]):
+            self.assertIn(next_state, graph.get_successors(s))
+
+        #a goal that cannot be reached is infinitely far
+        graph = DirectedGraph([[None, 1, None], [1, None, None], [None, None, None]], {2})
+        self.assertEqual(LandmarkGraph(graph, num_landmarks=2).heuristic(0), float("inf"))
+        self.assertIsNone(astar(LandmarkGraph(graph, num_landmarks=2))[0])
+
+    def test_instance_generator(self):
+        #exact distances on small boards
+        boards = generate_boards(2, 40, min_distance=2, max_distance=3, seed=1)
+        self.assertEqual(boards.shape, (40, 4))
+        self.assertEqual(boards.dtype, np.uint8)
+        lengths = [len(bfs(TileGame(2, state))[0]) - 1 for state in to_states(boards)]
+        self.assertEqual(set(lengths), {2, 3})
+        self.assertTrue(np.array_equal(boards, generate_boards(2, 40, min_distance=2, max_distance=3, seed=1)))
+        #the distance table is built once per size, or passed in
+        self.assertIs(distance_table(2), distance_table(2))
+        with build_distance_table(2) as table:
+            passed = np.concatenate(list(iter_boards(2, 40, min_distance=2, max_distance=3, seed=1, table=table)))
+        self.assertTrue(np.array_equal(boards, passed))
+
+        #Manhattan bounds and walk lengths on larger ones
+        boards = generate_boards(3, 10, min_distance=5, max_distance=7, seed=2, exact=False)
+        bounds = manhattan_bounds(boards)
+        for state, bound in zip(to_states(boards), bounds):
+            self.assertIn(astar(HeuristicTileGame(3, admissible_heuristic, state))[1]["total_cost"], range(5, 8))
+            self.assertEqual(bound, math.ceil(admissible_heuristic(state)))
+        for rank, board in zip(board_ranks(boards), boards):
+            self.assertEqual(rank, board_rank(board.tobytes()))
+
+        #streamed to disk and mapped back
+        with tempfile.TemporaryDirectory() as workdir:
+            path = os.path.join(workdir, "boards.npy")
+            save_boards(path, 3, 25, max_distance=6, seed=3, batch_size=7, exact=False)
+            loaded = load_boards(path)
+            self.assertIsInstance(loaded, np.memmap)
+            expected = np.concatenate(list(iter_boards(3, 25, max_distance=6, seed=3, batch_size=7, exact=False)))
+            self.assertTrue(np.array_equal(loaded, expected))
+            del loaded
+
+        with self.assertRaises(ValueError):
+            generate_boards(2, 1, min_distance=7, max_distance=9)
+
+    def test_result_io(self):
+        boards = [TileGameState(((1, 2, 3), (4, 5, 6), (7, 8, 9))),
+                  TileGameState(((2, 1, 6), (4, 3, 5), (7, 9, 8))),
+                  TileGameState(((6, 7, 5), (2, 4, 8), (9, 3, 1)))]
+        results = [astar(HeuristicTileGame(3, admissible_heuristic, board)) for board in boards]
+        for path, _ in results:
+            self.assertEqual(decode_moves(path[0], encode_moves(path)), path)
+        self.assertEqual(len(encode_moves(results[2][0])), 12)
+        self.assertIsNone(encode_moves(None))
+        with self.assertRaises(ValueError):
+            encode_moves([boards[0], boards[2]])
+
+        with tempfile.TemporaryDirectory() as workdir:
+            solutions_path = os.path.join(workdir, "runs.sol")
+            stats_path = os.path.join(workdir, "runs.stats")
+            #two runs append to the same files
+            for run in [results[:2], results[2:]]:
+                with SolutionWriter(solutions_path, 3) as solutions, StatsWriter(stats_path, buffer_rows=1) as rows:
+                    for path, stats in run:
+                        solutions.append(path[0], encode_moves(path))
+                        rows.append(stats, seconds=0.5)
+            with SolutionWriter(solutions_path, 3) as solutions:
+                solutions.append(boards[1], None)
+            with self.assertRaises(ValueError):
+                SolutionWriter(solutions_path, 2)
+
+            reader = SolutionReader(solutions_path)
+            self.assertEqual(len(reader), 4)
+            for i, (path, _) in enumerate(results):
+                self.assertEqual(reader.path(i), path)
+                self.assertEqual(list(reader.moves_array(i)), list(encode_moves(path)))
+            start, moves = reader[3]
+            self.assertEqual(bytes(start), boards[1].to_bytes())
+            self.assertIsNone(moves)
+            self.assertIsNone(reader.path(3))
+            del start, moves
+            reader.close()
+
+            table = read_stats(stats_path)
+            self.assertEqual(table.dtype, STATS_DTYPE)
+            self.assertIsInstance(table, np.memmap)
+            self.assertEqual(len(table), 3)
+            for row, (_, stats) in zip(table, results):
+                for key in ["path_length", "states_expanded", "total_cost", "max_frontier_size"]:
+                    self.assertEqual(row[key], stats[key])
+            self.assertTrue((table["seconds"] == 0.5).all())
+            del table
+
+            #a run killed mid-flush leaves a partial last record, which is left out and then cut off
+            with open(solutions_path, "rb+") as f:
+                f.truncate(os.path.getsize(solutions_path) - 5)
+            with SolutionReader(solutions_path) as reader:
+                self.assertEqual(len(reader), 3)
+                self.assertEqual(reader.partial_bytes, 6)
+                self.assertEqual(reader.path(2), results[2][0])
+            with SolutionWriter(solutions_path, 3) as solutions:
+                solutions.append(boards[0], b"")
+            with SolutionReader(solutions_path) as reader:
+                self.assertEqual((len(reader), reader.partial_bytes), (4, 0))
+                self.assertEqual(reader.path(3), [boards[0]])
+            with open(stats_path, "rb+") as f:
+                f.truncate(os.path.getsize(stats_path) - 10)
+            table = read_stats(stats_path)
+            self.assertEqual(len(table), 2)
+            self.assertEqual(table[1]["states_expanded"], results[1][1]["states_expanded"])
+            del table
+            with StatsWriter(stats_path) as rows:
+                rows.append(results[2][1])
+            table = read_stats(stats_path)
+            self.assertEqual(list(table["total_cost"]), [stats["total_cost"] for _, stats in results])
+            del table
+
+        #batches can send their paths back packed
+        for processes in [0, 2]:
+            for board, moves, stats in solve_batch(boards, admissible_heuristic, processes=processes, compact_paths=True):
+                self.assertIsInstance(moves, bytes)
+                self.assertEqual(decode_moves(board, moves), astar(HeuristicTileGame(3, admissible_heuristic, board))[0])
+
 #FIXME: add stats testing
 
 if __name__ == "__main__":